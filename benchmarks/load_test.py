@@ -0,0 +1,280 @@
+"""
+End-to-end load test of the API.
+
+    python -m benchmarks.load_test                                 # default mix, in-process, memory backend
+    python -m benchmarks.load_test --concurrency 1,16,64 --duration 20
+    python -m benchmarks.load_test --mix browse --products 20000 --json results.json
+    python -m benchmarks.load_test --base-url http://localhost:8000
+                                  # drive a running server; it must share the
+                                  # MongoDB deployment this process seeds (MONGODB_URI)
+
+main:app is booted in this process with its lifespan and driven through
+httpx.ASGITransport, so the numbers cover routing, validation, services and
+serialization without a network hop. Unless DATABASE_BACKEND is set, the
+in-process stand-in of database/memory_client.py is used: it shows regressions
+of the application layers, not the latency of a real deployment.
+
+Each virtual user logs in, opens its own cart and then runs scenarios picked by
+weight until the duration ends. Latency percentiles and throughput are reported
+per route for each concurrency level.
+"""
+import os
+import sys
+import time
+import json
+import random
+import asyncio
+import argparse
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+os.environ.setdefault("DATABASE_BACKEND", "memory")
+os.environ.setdefault("SECRET_KEY", "benchmark-secret")
+os.environ.setdefault("ALGORITHM", "HS256")
+os.environ.setdefault("ACCESS_TOKEN_EXPIRE_MINUTES", "600")
+os.environ.setdefault("FILENAME_LENGTH", "24")
+
+import httpx
+from main import app, lifespan
+from .seed import seed, Seeded
+
+Scenario = Callable[['VirtualUser'], Awaitable[None]]
+
+PAGE_SIZE = 20
+
+
+class Recorder:
+    """
+    Latencies and failures per route of a run.
+    :param:  enabled: bool - nothing is kept while False, during the warm-up.
+    :return: None.
+    :rtype: none.
+    """
+
+    def __init__(self) -> None:
+        self.enabled: bool = False
+        self.__latencies: Dict[str, List[float]] = {}
+        self.__errors: Dict[str, int] = {}
+
+    def add(self, route: str, seconds: float, failed: bool) -> None:
+        if not self.enabled:
+            return
+        self.__latencies.setdefault(route, []).append(seconds)
+        if failed:
+            self.__errors[route] = self.__errors.get(route, 0) + 1
+
+    def report(self, elapsed: float) -> Dict[str, Dict[str, float]]:
+        """
+        Requests, errors, throughput and latency percentiles (ms) per route and in total.
+        :param elapsed: float - measured seconds.
+        :return: Dict[str, Dict[str, float]]
+        """
+        routes: Dict[str, Dict[str, float]] = {route: summarize(latencies, self.__errors.get(route, 0), elapsed)
+                                               for route, latencies in sorted(self.__latencies.items())}
+        everything: List[float] = [latency for latencies in self.__latencies.values() for latency in latencies]
+        routes['total'] = summarize(everything, sum(self.__errors.values()), elapsed)
+        return routes
+
+
+def percentile(ordered: List[float], fraction: float) -> float:
+    """
+    Nearest-rank percentile of sorted values.
+    """
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, max(0, int(round(fraction * len(ordered) + 0.5)) - 1))]
+
+
+def summarize(latencies: List[float], errors: int, elapsed: float) -> Dict[str, float]:
+    ordered: List[float] = sorted(latencies)
+    return {'requests': len(ordered),
+            'errors': errors,
+            'rps': round(len(ordered) / elapsed, 1) if elapsed else 0.0,
+            'p50': round(percentile(ordered, 0.50) * 1000, 2),
+            'p95': round(percentile(ordered, 0.95) * 1000, 2),
+            'p99': round(percentile(ordered, 0.99) * 1000, 2),
+            'max': round(ordered[-1] * 1000, 2) if ordered else 0.0}
+
+
+class VirtualUser:
+    """
+    One simulated user: its http client, token, cart and random generator.
+    :param:  client: httpx.AsyncClient
+    :param:  seeded: Seeded - identifiers of the seeded documents.
+    :param:  recorder: Recorder
+    :param:  rng: random.Random
+    :return: None.
+    :rtype: none.
+    """
+
+    def __init__(self, client: httpx.AsyncClient, seeded: Seeded, recorder: Recorder, rng: random.Random) -> None:
+        self.client: httpx.AsyncClient = client
+        self.seeded: Seeded = seeded
+        self.recorder: Recorder = recorder
+        self.rng: random.Random = rng
+        self.credentials: Tuple[str, str] = rng.choice(seeded.users)
+        self.headers: Dict[str, str] = {}
+        self.order_id: Optional[str] = None
+        self.next_after: Optional[str] = None
+
+    async def request(self, method: str, path: str, route: Optional[str] = None, **kwargs) -> httpx.Response:
+        """
+        Send a request and record its latency under 'METHOD path'.
+        """
+        started: float = time.perf_counter()
+        response: httpx.Response = await self.client.request(method, path, headers=self.headers, **kwargs)
+        self.recorder.add(route or f'{method} {path}', time.perf_counter() - started, response.status_code >= 400)
+        return response
+
+    async def login(self) -> None:
+        email, password = self.credentials
+        response: httpx.Response = await self.request('POST', '/login/users',
+                                                      json={'email': email, 'password': password})
+        if response.status_code == 201:
+            self.headers = {'Authorization': f"Bearer {response.json()['access_token']}"}
+
+    async def open_cart(self) -> None:
+        response: httpx.Response = await self.request('POST', '/orders/',
+                                                      json={'client_id': self.rng.choice(self.seeded.clients)})
+        if response.status_code < 400:
+            self.order_id = response.json()['_id']
+
+
+async def browse_catalog(user: VirtualUser) -> None:
+    # follow the keyset pages from the start, like a client scrolling the catalog
+    params: Dict = {'limit': PAGE_SIZE}
+    if user.next_after:
+        params['after'] = user.next_after
+    response: httpx.Response = await user.request('GET', '/products/all', params=params)
+    user.next_after = response.headers.get('X-Next-After')
+
+
+async def view_product(user: VirtualUser) -> None:
+    await user.request('GET', '/products/', params={'product_id': user.rng.choice(user.seeded.products)})
+
+
+async def search_products(user: VirtualUser) -> None:
+    await user.request('GET', '/products/many', params={'search': user.rng.choice(user.seeded.words)})
+
+
+async def autocomplete(user: VirtualUser) -> None:
+    await user.request('GET', '/products/autocomplete', params={'prefix': user.rng.choice(user.seeded.words)[:3]})
+
+
+async def cart_round_trip(user: VirtualUser) -> None:
+    if user.order_id is None:
+        return
+    product_id: str = user.rng.choice(user.seeded.products)
+    item: Dict = {'order_id': user.order_id, 'product_id': product_id}
+    await user.request('PUT', '/orders/add', json={**item, 'quantity': user.rng.randint(1, 3)})
+    await user.request('PUT', '/orders/remove', json=item)
+
+
+async def change_status(user: VirtualUser) -> None:
+    await user.request('PUT', '/orders/status', json={'order_id': user.rng.choice(user.seeded.orders),
+                                                      'status': user.rng.choice(['paid', 'shipped', 'delivered'])})
+
+
+async def order_stats(user: VirtualUser) -> None:
+    await user.request('GET', '/orders/stats/status')
+
+
+async def login_again(user: VirtualUser) -> None:
+    await user.login()
+
+
+MIXES: Dict[str, List[Tuple[Scenario, int]]] = {
+    'default': [(browse_catalog, 6), (view_product, 5), (search_products, 3), (autocomplete, 2),
+                (cart_round_trip, 3), (change_status, 1), (order_stats, 1), (login_again, 1)],
+    'browse': [(browse_catalog, 5), (view_product, 5), (search_products, 3), (autocomplete, 2)],
+    'write': [(cart_round_trip, 5), (change_status, 3), (view_product, 2)],
+    'login': [(login_again, 1)],
+}
+
+
+async def run_level(client: httpx.AsyncClient, seeded: Seeded, mix: List[Tuple[Scenario, int]],
+                    concurrency: int, duration: float, warmup: float, seed_value: int) -> Dict:
+    """
+    Run the mix with concurrency virtual users: warm-up first, then the measured duration.
+    :return: Dict - the report of the level.
+    """
+    recorder: Recorder = Recorder()
+    scenarios: List[Scenario] = [scenario for scenario, _ in mix]
+    weights: List[int] = [weight for _, weight in mix]
+    users: List[VirtualUser] = [VirtualUser(client, seeded, recorder, random.Random(seed_value * 1000 + index))
+                                for index in range(concurrency)]
+    for user in users:
+        await user.login()
+        await user.open_cart()
+    measure_from: float = time.perf_counter() + warmup
+    stop_at: float = measure_from + duration
+
+    async def loop(user: VirtualUser) -> None:
+        while True:
+            now: float = time.perf_counter()
+            if now >= stop_at:
+                return
+            recorder.enabled = now >= measure_from
+            await user.rng.choices(scenarios, weights)[0](user)
+
+    await asyncio.gather(*[loop(user) for user in users])
+    return {'concurrency': concurrency, 'duration': duration, 'routes': recorder.report(duration)}
+
+
+def print_report(level: Dict) -> None:
+    print(f"\nconcurrency {level['concurrency']} - {level['duration']}s")
+    print(f"{'route':<32}{'requests':>10}{'errors':>8}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}"
+          f"{'p99 ms':>10}{'max ms':>10}")
+    for route, stats in level['routes'].items():
+        print(f"{route:<32}{stats['requests']:>10}{stats['errors']:>8}{stats['rps']:>10}{stats['p50']:>10}"
+              f"{stats['p95']:>10}{stats['p99']:>10}{stats['max']:>10}")
+
+
+async def load_test(args: argparse.Namespace) -> List[Dict]:
+    rng: random.Random = random.Random(args.seed)
+    async with lifespan(app):
+        started: float = time.perf_counter()
+        seeded: Seeded = await seed(args.users, args.clients, args.products, args.orders, rng)
+        print(f"seeded {args.users} users, {args.clients} clients, {args.products} products, "
+              f"{args.orders} orders in {time.perf_counter() - started:.1f}s")
+        transport: Optional[httpx.AsyncBaseTransport] = None if args.base_url else httpx.ASGITransport(app=app)
+        limits: httpx.Limits = httpx.Limits(max_connections=max(args.concurrency))
+        async with httpx.AsyncClient(transport=transport, base_url=args.base_url or 'http://benchmark',
+                                     limits=limits, timeout=args.timeout) as client:
+            levels: List[Dict] = []
+            for concurrency in args.concurrency:
+                level: Dict = await run_level(client, seeded, MIXES[args.mix], concurrency,
+                                              args.duration, args.warmup, args.seed)
+                print_report(level)
+                levels.append(level)
+    return levels
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="End-to-end load test of the API.")
+    parser.add_argument('--mix', choices=sorted(MIXES), default='default', help="weighted scenarios to run")
+    parser.add_argument('--concurrency', type=lambda value: [int(level) for level in value.split(',')],
+                        default=[1, 8, 32], help="comma separated virtual users per level")
+    parser.add_argument('--duration', type=float, default=10, help="measured seconds per level")
+    parser.add_argument('--warmup', type=float, default=2, help="unmeasured seconds before each level")
+    parser.add_argument('--users', type=int, default=8, help="seeded users able to log in")
+    parser.add_argument('--clients', type=int, default=200)
+    parser.add_argument('--products', type=int, default=2000)
+    parser.add_argument('--orders', type=int, default=1000)
+    parser.add_argument('--seed', type=int, default=42, help="random seed of the data and of the scenarios")
+    parser.add_argument('--timeout', type=float, default=30, help="seconds before a request fails")
+    parser.add_argument('--base-url', help="drive a running server instead of the in-process app")
+    parser.add_argument('--json', help="write the reports to this file")
+    args = parser.parse_args()
+    if args.base_url and os.environ["DATABASE_BACKEND"] == "memory":
+        parser.error("--base-url needs a shared deployment: set DATABASE_BACKEND=mongodb and MONGODB_URI")
+    levels: List[Dict] = asyncio.run(load_test(args))
+    if args.json:
+        with open(args.json, 'w') as file:
+            json.dump({'config': {key: value for key, value in vars(args).items() if key != 'json'},
+                       'levels': levels}, file, indent=2)
+    failed: int = sum(level['routes']['total']['errors'] for level in levels)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
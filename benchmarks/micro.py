@@ -0,0 +1,255 @@
+"""
+Microbenchmarks of the per-request hot paths: serializers, utils, model validators
+and token verification.
+
+    python -m benchmarks.micro                    # run every case and print ns per call
+    python -m benchmarks.micro -k serializers     # only the cases whose name contains the text
+    python -m benchmarks.micro --save             # store the results in benchmarks/baseline.json
+    python -m benchmarks.micro --compare          # compare with the baseline, exit 1 on regressions
+
+Every case is timed with timeit: the number of calls is sized so one repeat lasts
+about 0.2s, and the best of the repeats is kept, which is the least noisy estimate.
+The baseline is only meaningful on the machine and Python that recorded it (both
+are stored with it): refresh it with --save in the same change as an optimization.
+"""
+import os
+import sys
+import json
+import time
+import timeit
+import platform
+import argparse
+from datetime import datetime, timedelta
+from typing import Any, Callable, Coroutine, Dict, List, Optional
+
+os.environ.setdefault("SECRET_KEY", "benchmark-secret")
+os.environ.setdefault("ALGORITHM", "HS256")
+os.environ.setdefault("ACCESS_TOKEN_EXPIRE_MINUTES", "600")
+
+import jwt
+from bson import ObjectId
+from starlette.requests import Request
+from serializers import dumps, validator_headers, is_not_modified
+from utils import CpfValidator, convert_objectid_to_str, convert_datetime_to_str, remove_datetime_fields, \
+    keyset_filter
+from models import User, OrderId, OrderIds, ProductQuery
+from cache import users_identity_cache
+from dependencies.users import token_user_verify, SECRET_KEY, ALGORITHM
+
+BASELINE = os.path.join(os.path.dirname(__file__), 'baseline.json')
+
+Case = Callable[[], Callable[[], Any]]
+
+
+def product(index: int = 0) -> Dict:
+    now: datetime = datetime(2024, 1, 1, 12, 0, 0)
+    return {'_id': ObjectId(f'{index:024x}'), 'name': f'camiseta azul {index}', 'brand': 'Nike', 'price': 59.9,
+            'description': 'camiseta azul esportiva de algodao', 'quantity': 120,
+            'photos': ['/static/images/products/a.png'], 'created_at': now, 'last_modified': now}
+
+
+def run_sync(coroutine: Coroutine) -> Any:
+    """
+    Run a coroutine that never suspends, without the cost of an event loop.
+    """
+    try:
+        coroutine.send(None)
+    except StopIteration as stop:
+        return stop.value
+    raise RuntimeError('the coroutine suspended')
+
+
+def user_token() -> str:
+    token: str = jwt.encode({'token': {'_id': f'{1:024x}', 'email': 'user0@bench.local', 'password': 'hash',
+                                       'is_user': True},
+                             'exp': datetime.utcnow() + timedelta(days=1)},
+                            key=SECRET_KEY, algorithm=ALGORITHM)
+    # the identity cache answers, as for every request after the first one of a token
+    users_identity_cache.set(token.rsplit('.', 1)[-1], f'{1:024x}', time.time() + 86400)
+    return token
+
+
+def case_dumps_product() -> Callable[[], Any]:
+    document: Dict = product()
+    return lambda: dumps(document)
+
+
+def case_dumps_page() -> Callable[[], Any]:
+    page: List[Dict] = [product(index) for index in range(100)]
+    return lambda: dumps(page)
+
+
+def case_validator_headers() -> Callable[[], Any]:
+    document: Dict = product()
+    return lambda: validator_headers(document)
+
+
+def case_is_not_modified() -> Callable[[], Any]:
+    headers: Dict[str, str] = validator_headers(product())
+    return lambda: is_not_modified(headers, headers['ETag'], None)
+
+
+def case_convert_objectid_to_str() -> Callable[[], Any]:
+    # the function converts in place: the shallow copy is part of the measure
+    document: Dict = product()
+    return lambda: convert_objectid_to_str(dict(document))
+
+
+def case_convert_datetime_to_str() -> Callable[[], Any]:
+    document: Dict = product()
+    return lambda: convert_datetime_to_str(dict(document))
+
+
+def case_remove_datetime_fields() -> Callable[[], Any]:
+    document: Dict = product()
+    return lambda: remove_datetime_fields(dict(document))
+
+
+def case_keyset_filter() -> Callable[[], Any]:
+    after: str = f'{7:024x}'
+    return lambda: keyset_filter(after)
+
+
+def case_cpf_is_valid() -> Callable[[], Any]:
+    validator: CpfValidator = CpfValidator('52998224725')
+    return validator.is_valid
+
+
+def case_password_must_be_valid() -> Callable[[], Any]:
+    return lambda: User.password_must_be_valid('Bench#2024pass')
+
+
+def case_user_model() -> Callable[[], Any]:
+    payload: Dict = {'name': 'Usuario', 'email': 'user0@bench.local', 'cpf': '52998224725',
+                     'phone': '11999999999', 'password': 'Bench#2024pass', 'rep_password': 'Bench#2024pass'}
+    return lambda: User(**payload)
+
+
+def case_order_id() -> Callable[[], Any]:
+    order_id: str = f'{7:024x}'
+    return lambda: OrderId(order_id=order_id)
+
+
+def case_order_ids_1000() -> Callable[[], Any]:
+    order_ids: List[str] = [f'{index:024x}' for index in range(1000)]
+    return lambda: OrderIds(order_ids=order_ids)
+
+
+def case_product_query_params() -> Callable[[], Any]:
+    query: ProductQuery = ProductQuery(search='camiseta azul', brand='Ni', min_price=10, max_price=100)
+    return query.params
+
+
+def case_jwt_decode() -> Callable[[], Any]:
+    token: str = user_token()
+    return lambda: jwt.decode(token, key=SECRET_KEY, algorithms=[ALGORITHM])
+
+
+def case_token_user_verify() -> Callable[[], Any]:
+    request: Request = Request({'type': 'http', 'headers': [(b'authorization', f'Bearer {user_token()}'.encode())]})
+    return lambda: run_sync(token_user_verify(request))
+
+
+CASES: Dict[str, Case] = {
+    'serializers.dumps.product': case_dumps_product,
+    'serializers.dumps.page_100': case_dumps_page,
+    'serializers.validator_headers': case_validator_headers,
+    'serializers.is_not_modified.etag': case_is_not_modified,
+    'utils.convert_objectid_to_str': case_convert_objectid_to_str,
+    'utils.convert_datetime_to_str': case_convert_datetime_to_str,
+    'utils.remove_datetime_fields': case_remove_datetime_fields,
+    'utils.keyset_filter': case_keyset_filter,
+    'utils.CpfValidator.is_valid': case_cpf_is_valid,
+    'models.User.password_must_be_valid': case_password_must_be_valid,
+    'models.User': case_user_model,
+    'models.OrderId': case_order_id,
+    'models.OrderIds.1000': case_order_ids_1000,
+    'models.ProductQuery.params': case_product_query_params,
+    'dependencies.jwt.decode': case_jwt_decode,
+    'dependencies.token_user_verify.cached': case_token_user_verify,
+}
+
+
+def measure(function: Callable[[], Any], repeat: int) -> float:
+    """
+    Best time of a call in nanoseconds.
+    :param function: Callable[[], Any]
+    :param repeat: int - number of timed repeats.
+    :return: float
+    """
+    timer: timeit.Timer = timeit.Timer(function)
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat=repeat, number=number)) / number * 1e9
+
+
+def run(names: List[str], repeat: int) -> Dict[str, float]:
+    results: Dict[str, float] = {}
+    for name in names:
+        results[name] = round(measure(CASES[name](), repeat), 1)
+        print(f"{name:<44}{results[name]:>14,.1f} ns")
+    return results
+
+
+def compare(results: Dict[str, float], baseline: Dict, threshold: float) -> int:
+    """
+    Print the ratio of every case to the baseline.
+    :return: int - number of cases slower than the baseline by more than threshold.
+    """
+    recorded: Dict[str, float] = baseline['results']
+    if baseline.get('python') != platform.python_version() or baseline.get('machine') != platform.machine():
+        print(f"baseline recorded with Python {baseline.get('python')} on {baseline.get('machine')}: "
+              f"ratios are indicative only")
+    regressions: int = 0
+    print(f"\n{'case':<44}{'baseline ns':>14}{'now ns':>14}{'ratio':>8}")
+    for name, nanoseconds in results.items():
+        if name not in recorded:
+            print(f"{name:<44}{'-':>14}{nanoseconds:>14,.1f}{'new':>8}")
+            continue
+        ratio: float = nanoseconds / recorded[name]
+        flag: str = ''
+        if ratio > 1 + threshold:
+            regressions += 1
+            flag = '  slower'
+        elif ratio < 1 - threshold:
+            flag = '  faster'
+        print(f"{name:<44}{recorded[name]:>14,.1f}{nanoseconds:>14,.1f}{ratio:>8.2f}{flag}")
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Microbenchmarks of the per-request hot paths.")
+    parser.add_argument('-k', dest='keyword', help="only the cases whose name contains this text")
+    parser.add_argument('--repeat', type=int, default=5, help="timed repeats per case, the best one is kept")
+    action = parser.add_mutually_exclusive_group()
+    action.add_argument('--save', action='store_true', help="write the results to the baseline file")
+    action.add_argument('--compare', action='store_true', help="compare the results with the baseline file")
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help="relative slowdown reported as a regression by --compare")
+    parser.add_argument('--baseline', default=BASELINE, help="baseline file")
+    args = parser.parse_args()
+    names: List[str] = [name for name in CASES if not args.keyword or args.keyword in name]
+    results: Dict[str, float] = run(names, args.repeat)
+    if args.save:
+        stored: Dict[str, float] = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline) as file:
+                stored = json.load(file)['results']
+        # cases that were removed would otherwise stay in the baseline, with figures nothing measures anymore
+        stored = {name: nanoseconds for name, nanoseconds in stored.items() if name in CASES}
+        stored.update(results)
+        with open(args.baseline, 'w') as file:
+            json.dump({'python': platform.python_version(), 'machine': platform.machine(),
+                       'results': stored}, file, indent=2)
+            file.write('\n')
+        print(f"\nbaseline written to {args.baseline}")
+    elif args.compare:
+        with open(args.baseline) as file:
+            baseline: Optional[Dict] = json.load(file)
+        regressions: int = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n{regressions} case(s) slower than the baseline by more than {args.threshold:.0%}")
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
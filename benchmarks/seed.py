@@ -0,0 +1,129 @@
+"""
+Seed the database with generated clients, products, orders and users for the benchmarks.
+Documents are built with the models, so they pass the same validators as the API,
+and written in batches straight to the collections.
+"""
+import random
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Dict, List, Tuple
+from database import DB
+from models import FullClient, FullProduct, FullUser, OrderStatus
+from utils import hashing_pool
+
+PASSWORD = 'Bench#2024pass'
+
+BATCH_SIZE = 1000
+
+NOUNS = ['camiseta', 'bola', 'tenis', 'mochila', 'bone', 'jaqueta', 'meia', 'luva', 'bermuda', 'garrafa']
+
+ADJECTIVES = ['azul', 'verde', 'preta', 'branca', 'leve', 'esportiva', 'classica', 'infantil']
+
+BRANDS = ['Nike', 'Adidas', 'Puma', 'Olympikus', 'Mizuno', 'Penalty']
+
+
+@dataclass
+class Seeded:
+    """
+    Identifiers of the seeded documents, used by the scenarios to build requests.
+    """
+    users: List[Tuple[str, str]] = field(default_factory=list)
+    clients: List[str] = field(default_factory=list)
+    products: List[str] = field(default_factory=list)
+    orders: List[str] = field(default_factory=list)
+    words: List[str] = field(default_factory=lambda: NOUNS + ADJECTIVES)
+
+
+def make_cpf(number: int) -> str:
+    """
+    Valid cpf whose first nine digits are the number, check digits as in utils.CpfValidator.
+    :param number: int - below 10 ** 9.
+    :return: str
+    """
+    digits: str = f'{number:09d}'
+    first: int = sum(int(digit) * (index + 1) for index, digit in enumerate(digits)) % 11 % 10
+    digits += str(first)
+    second: int = sum(int(digit) * index for index, digit in enumerate(digits)) % 11 % 10
+    return digits + str(second)
+
+
+def cpf_numbers(start: int):
+    number: int = start
+    while True:
+        # cpfs made of a single repeated digit are not valid
+        if len(set(f'{number:09d}')) > 1:
+            yield number
+        number += 1
+
+
+async def insert_batches(collection, documents: List[Dict]) -> List[str]:
+    inserted: List[str] = []
+    for start in range(0, len(documents), BATCH_SIZE):
+        result = await collection.insert_many(documents[start:start + BATCH_SIZE])
+        inserted.extend(str(_id) for _id in result.inserted_ids)
+    return inserted
+
+
+async def seed(users: int, clients: int, products: int, orders: int, rng: random.Random) -> Seeded:
+    """
+    Insert the documents. Passwords are hashed once and shared, so seeding
+    does not pay bcrypt for every account.
+    :param users: int - users able to log in.
+    :param clients: int
+    :param products: int
+    :param orders: int - each with one to three items of random products.
+    :param rng: random.Random - generator of the run, for reproducible data.
+    :return: Seeded
+    """
+    seeded: Seeded = Seeded()
+    password: str = await hashing_pool.hash(PASSWORD)
+    numbers = cpf_numbers(100000000)
+
+    user_documents: List[Dict] = []
+    for index in range(users):
+        user: Dict = FullUser(name=f'Usuario {index}', email=f'user{index}@bench.local',
+                              cpf=make_cpf(next(numbers)), phone=f'119{index:08d}',
+                              password=PASSWORD, rep_password=PASSWORD).to_dict()
+        user['password'] = password
+        user_documents.append(user)
+        seeded.users.append((user['email'], PASSWORD))
+    await insert_batches(DB.users, user_documents)
+
+    client_documents: List[Dict] = []
+    for index in range(clients):
+        client: Dict = FullClient(name=f'Cliente {index}', email=f'client{index}@bench.local',
+                                  cpf=make_cpf(next(numbers)), phone=f'219{index:08d}',
+                                  password=PASSWORD, rep_password=PASSWORD).to_dict()
+        client['password'] = password
+        client_documents.append(client)
+    seeded.clients = await insert_batches(DB.clients, client_documents)
+
+    product_documents: List[Dict] = []
+    for index in range(products):
+        noun, adjective = rng.choice(NOUNS), rng.choice(ADJECTIVES)
+        product_documents.append(FullProduct(name=f'{noun} {adjective} {index}', brand=rng.choice(BRANDS),
+                                             price=f'{rng.uniform(5, 500):.2f}',
+                                             description=f'{noun} {adjective} de {rng.choice(NOUNS)}',
+                                             quantity=1_000_000).to_dict())
+    seeded.products = await insert_batches(DB.products, product_documents)
+
+    now: datetime = datetime.now()
+    statuses: List[str] = [status.value for status in OrderStatus]
+    order_documents: List[Dict] = []
+    for _ in range(orders if client_documents and product_documents else 0):
+        client: Dict = rng.choice(client_documents)
+        items: List[Dict] = []
+        for product in rng.sample(product_documents, min(rng.randint(1, 3), len(product_documents))):
+            items.append({'_id': str(product['_id']), 'name': product['name'], 'brand': product['brand'],
+                          'price': product['price'], 'description': product['description'],
+                          'quantity': rng.randint(1, 5)})
+        created_at: datetime = now - timedelta(days=rng.uniform(0, 30))
+        order_documents.append({'client': {'_id': str(client['_id']), 'name': client['name'],
+                                           'email': client['email'], 'cpf': client['cpf'],
+                                           'phone': client['phone']},
+                                'status': rng.choice(statuses),
+                                'items': items,
+                                'created_at': created_at,
+                                'last_modified': created_at})
+    seeded.orders = await insert_batches(DB.orders, order_documents)
+    return seeded
@@ -0,0 +1,6 @@
+from .ttl_cache import TTLCache
+from .identity import IdentityCache, users_identity_cache, clients_identity_cache
+from .prefix_index import PrefixIndex, products_prefix_index, AUTOCOMPLETE_MAX_RESULTS
+from .backend import CacheBackend, MemoryBackend
+from .products import ProductsCache, products_cache
+from .watcher import ChangeWatcher, change_watcher
@@ -0,0 +1,67 @@
+"""
+Storage used by the read-through caches
+"""
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Hashable, Optional
+from .ttl_cache import TTLCache
+
+
+class CacheBackend(ABC):
+    """
+    Where a read-through cache keeps its entries. Methods are coroutines so a
+    shared backend (e.g. redis) can be plugged in without touching the callers.
+    """
+
+    @property
+    @abstractmethod
+    def stats(self) -> Dict[str, int]:
+        pass
+
+    @abstractmethod
+    async def get(self, key: Hashable) -> Optional[Any]:
+        pass
+
+    @abstractmethod
+    async def set(self, key: Hashable, value: Any) -> None:
+        pass
+
+    @abstractmethod
+    async def delete(self, key: Hashable) -> None:
+        pass
+
+    @abstractmethod
+    async def clear(self) -> None:
+        pass
+
+
+class MemoryBackend(CacheBackend):
+    """
+    In-process LRU backend with time to live.
+    :param:  max_size: int - maximum number of entries kept.
+    :param:  ttl: float - seconds an entry stays valid.
+    :return: None.
+    :rtype: none.
+    """
+
+    def __init__(self, max_size: int, ttl: float) -> None:
+        self.__cache: TTLCache = TTLCache(max_size, ttl)
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        """Getter method for accessing the cache counters.
+        Returns:
+            Hits, misses and current size.
+        """
+        return self.__cache.stats
+
+    async def get(self, key: Hashable) -> Optional[Any]:
+        return self.__cache.get(key)
+
+    async def set(self, key: Hashable, value: Any) -> None:
+        self.__cache.set(key, value)
+
+    async def delete(self, key: Hashable) -> None:
+        self.__cache.delete(key)
+
+    async def clear(self) -> None:
+        self.__cache.clear()
@@ -0,0 +1,85 @@
+"""
+Cache of verified JWT identities
+"""
+import os
+import time
+from typing import Dict, Optional, Set
+from dotenv import load_dotenv, find_dotenv
+from .ttl_cache import TTLCache
+
+load_dotenv(find_dotenv())
+
+IDENTITY_CACHE_TTL = float(os.environ.get("IDENTITY_CACHE_TTL", 60))
+
+IDENTITY_CACHE_MAX_SIZE = int(os.environ.get("IDENTITY_CACHE_MAX_SIZE", 10000))
+
+
+class IdentityCache:
+    """
+    Remember which tokens were already checked against the database, keyed by the
+    token signature. The token must still be decoded on every request: the cache only
+    replaces the database lookup, never the signature and expiration checks.
+    :param:  max_size: int - maximum number of tokens kept.
+    :param:  ttl: float - seconds a verification stays valid.
+    :return: None.
+    :rtype: none.
+    """
+
+    def __init__(self, max_size: int, ttl: float) -> None:
+        self.__cache: TTLCache = TTLCache(max_size, ttl)
+        self.__signatures: Dict[str, Set[str]] = {}
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        """Getter method for accessing the cache counters.
+        Returns:
+            Hits, misses and current size.
+        """
+        return self.__cache.stats
+
+    def get(self, signature: str) -> Optional[str]:
+        """
+        Return the _id verified for this token signature, if any.
+        :param signature: str
+        :return: str | None
+        """
+        return self.__cache.get(signature)
+
+    def set(self, signature: str, subject_id: str, expires_at: float) -> None:
+        """
+        Remember a verified token, never beyond its own expiration.
+        :param signature: str - token signature.
+        :param subject_id: str - user or client _id.
+        :param expires_at: float - token 'exp' claim, as a unix timestamp.
+        :return: None
+        """
+        remaining: float = expires_at - time.time()
+        if remaining <= 0:
+            return
+        self.__cache.set(signature, subject_id, min(self.__cache.ttl, remaining))
+        signatures: Set[str] = {item for item in self.__signatures.get(subject_id, set())
+                                if item in self.__cache}
+        signatures.add(signature)
+        self.__signatures[subject_id] = signatures
+
+    def invalidate_subject(self, subject_id: str) -> None:
+        """
+        Forget every token verified for a user or client, e.g. after a password change.
+        :param subject_id: str
+        :return: None
+        """
+        for signature in self.__signatures.pop(subject_id, set()):
+            self.__cache.delete(signature)
+
+    def clear(self) -> None:
+        """
+        Forget every verified token.
+        :return: None
+        """
+        self.__signatures.clear()
+        self.__cache.clear()
+
+
+users_identity_cache: IdentityCache = IdentityCache(IDENTITY_CACHE_MAX_SIZE, IDENTITY_CACHE_TTL)
+
+clients_identity_cache: IdentityCache = IdentityCache(IDENTITY_CACHE_MAX_SIZE, IDENTITY_CACHE_TTL)
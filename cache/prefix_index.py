@@ -0,0 +1,140 @@
+"""
+In-process prefix index of product names, for autocomplete
+"""
+import os
+import re
+import unicodedata
+from bisect import bisect_left, insort
+from typing import Dict, Iterable, List, Set, Tuple
+from dotenv import load_dotenv, find_dotenv
+
+load_dotenv(find_dotenv())
+
+AUTOCOMPLETE_MAX_RESULTS = int(os.environ.get("AUTOCOMPLETE_MAX_RESULTS", 20))
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+
+def normalize_tokens(text: str) -> List[str]:
+    """
+    Lowercase words of a text, without accents, so 'Café' is found by 'cafe'.
+    :param text: str
+    :return: List[str]
+    """
+    decomposed: str = unicodedata.normalize('NFKD', text)
+    stripped: str = ''.join(char for char in decomposed if not unicodedata.combining(char))
+    return TOKEN_PATTERN.findall(stripped.lower())
+
+
+class PrefixIndex:
+    """
+    Sorted list of (word, _id) pairs: every word of a name is an entry, so a prefix
+    is answered with a binary search instead of a scan of the catalog.
+    The index starts empty; load() fills it once and add()/remove() keep it in sync
+    with the writes made by this process.
+    :return: None.
+    :rtype: none.
+    """
+
+    def __init__(self) -> None:
+        self.__entries: List[Tuple[str, str]] = []
+        self.__names: Dict[str, str] = {}
+        self.__tokens: Dict[str, List[str]] = {}
+        self.__loaded: bool = False
+
+    @property
+    def loaded(self) -> bool:
+        """Getter method for accessing the loading state.
+        Returns:
+            True once load() has been called.
+        """
+        return self.__loaded
+
+    def __len__(self) -> int:
+        return len(self.__names)
+
+    def load(self, products: Iterable[Dict]) -> None:
+        """
+        Replace the whole index.
+        :param products: Iterable[Dict] - documents with _id and name.
+        :return: None
+        """
+        self.__entries = []
+        self.__names = {}
+        self.__tokens = {}
+        for product in products:
+            _id: str = str(product['_id'])
+            tokens: List[str] = normalize_tokens(product.get('name', ''))
+            self.__names[_id] = product.get('name', '')
+            self.__tokens[_id] = tokens
+            self.__entries.extend((token, _id) for token in set(tokens))
+        self.__entries.sort()
+        self.__loaded = True
+
+    def add(self, _id: str, name: str) -> None:
+        """
+        Index a product name, replacing the previous one.
+        :param _id: str
+        :param name: str
+        :return: None
+        """
+        if not self.__loaded:
+            return
+        self.remove(_id)
+        tokens: List[str] = normalize_tokens(name)
+        self.__names[_id] = name
+        self.__tokens[_id] = tokens
+        for token in set(tokens):
+            insort(self.__entries, (token, _id))
+
+    def remove(self, _id: str) -> None:
+        """
+        Drop a product from the index.
+        :param _id: str
+        :return: None
+        """
+        self.__names.pop(_id, None)
+        for token in set(self.__tokens.pop(_id, [])):
+            position: int = bisect_left(self.__entries, (token, _id))
+            if position < len(self.__entries) and self.__entries[position] == (token, _id):
+                del self.__entries[position]
+
+    def search(self, prefix: str, limit: int = AUTOCOMPLETE_MAX_RESULTS) -> List[Dict[str, str]]:
+        """
+        Names whose words start with every word of the prefix. Names starting
+        with the prefix come first, then the others in alphabetical order.
+        :param prefix: str
+        :param limit: int
+        :return: List[Dict[str, str]] - _id and name of each product.
+        """
+        words: List[str] = normalize_tokens(prefix)
+        if not words:
+            return []
+        # the longest word narrows the range of the binary search the most
+        pivot: str = max(words, key=len)
+        matches: Set[str] = set()
+        position: int = bisect_left(self.__entries, (pivot, ''))
+        while position < len(self.__entries) and self.__entries[position][0].startswith(pivot):
+            matches.add(self.__entries[position][1])
+            position += 1
+        others: List[str] = [word for word in words if word != pivot]
+        found: List[str] = [_id for _id in matches
+                            if all(any(token.startswith(word) for token in self.__tokens[_id])
+                                   for word in others)]
+        phrase: str = ' '.join(words)
+        found.sort(key=lambda _id: (not ' '.join(self.__tokens[_id]).startswith(phrase),
+                                    self.__names[_id].lower()))
+        return [{'_id': _id, 'name': self.__names[_id]} for _id in found[:limit]]
+
+    def clear(self) -> None:
+        """
+        Empty the index; the next search loads it again.
+        :return: None
+        """
+        self.__entries = []
+        self.__names = {}
+        self.__tokens = {}
+        self.__loaded = False
+
+
+products_prefix_index: PrefixIndex = PrefixIndex()
@@ -0,0 +1,139 @@
+"""
+Read-through cache of the product catalog
+"""
+import os
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+from dotenv import load_dotenv, find_dotenv
+from .backend import CacheBackend, MemoryBackend
+
+load_dotenv(find_dotenv())
+
+PRODUCTS_CACHE_TTL = float(os.environ.get("PRODUCTS_CACHE_TTL", 30))
+
+PRODUCTS_CACHE_MAX_SIZE = int(os.environ.get("PRODUCTS_CACHE_MAX_SIZE", 10000))
+
+PRODUCTS_CACHE_MAX_PAGES = int(os.environ.get("PRODUCTS_CACHE_MAX_PAGES", 256))
+
+
+class ProductsCache:
+    """
+    Products by _id and bounded pages of /products/all. Every page remembers the
+    _id range it covers (after, its last _id, whether it is full), so a write to a
+    product only drops the pages that hold it or that it would fall into, e.g. the
+    last page for a new product. Writes bump a generation: a read that started
+    before a write does not store what it read once the write invalidated the cache.
+    Callers get copies, so they can change what they receive.
+    :param:  documents: CacheBackend - products by _id.
+    :param:  pages: CacheBackend - listing pages by (limit, after).
+    :param:  max_pages: int - pages whose range is tracked, the oldest are dropped past it.
+    :return: None.
+    :rtype: none.
+    """
+
+    def __init__(self, documents: CacheBackend, pages: CacheBackend, max_pages: int) -> None:
+        self.__documents: CacheBackend = documents
+        self.__pages: CacheBackend = pages
+        self.__max_pages: int = max(max_pages, 1)
+        self.__ranges: OrderedDict[Tuple[int, Optional[str]], Tuple[Optional[str], Optional[str], bool]] = \
+            OrderedDict()
+        self.__generation: int = 0
+
+    @property
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """Getter method for accessing the cache counters.
+        Returns:
+            Hits, misses and size of the products and of the pages.
+        """
+        return {'products': self.__documents.stats,
+                'pages': self.__pages.stats}
+
+    @property
+    def generation(self) -> int:
+        """Getter method for accessing the write generation.
+        Returns:
+            A number that changes on every invalidation; read it before the database.
+        """
+        return self.__generation
+
+    async def get_product(self, _id: str) -> Optional[Dict]:
+        """
+        Return a cached product.
+        :param _id: str
+        :return: Dict | None
+        """
+        product: Optional[Dict] = await self.__documents.get(_id)
+        return dict(product) if product is not None else None
+
+    async def set_product(self, _id: str, product: Dict, generation: int) -> None:
+        """
+        Cache a full product document, unless a write happened since it was read.
+        :param _id: str
+        :param product: Dict
+        :param generation: int - the generation read before the database.
+        :return: None
+        """
+        if generation == self.__generation:
+            await self.__documents.set(_id, dict(product))
+
+    async def get_page(self, limit: int, after: Optional[str]) -> Optional[List[Dict]]:
+        """
+        Return a cached page of the listing.
+        :param limit: int
+        :param after: str | None
+        :return: List[Dict] | None
+        """
+        page: Optional[List[Dict]] = await self.__pages.get((limit, after))
+        return [dict(product) for product in page] if page is not None else None
+
+    async def set_page(self, limit: int, after: Optional[str], page: List[Dict], generation: int) -> None:
+        """
+        Cache a page of the listing, unless a write happened since it was read.
+        :param limit: int - pages without a limit are the whole catalog and are never cached.
+        :param after: str | None
+        :param page: List[Dict]
+        :param generation: int - the generation read before the database.
+        :return: None
+        """
+        if generation != self.__generation:
+            return
+        key: Tuple[int, Optional[str]] = (limit, after)
+        last: Optional[str] = str(page[-1]['_id']) if page else None
+        self.__ranges[key] = (after, last, len(page) >= limit)
+        self.__ranges.move_to_end(key)
+        await self.__pages.set(key, [dict(product) for product in page])
+        while len(self.__ranges) > self.__max_pages:
+            oldest, _ = self.__ranges.popitem(last=False)
+            await self.__pages.delete(oldest)
+
+    async def invalidate(self, *ids: str) -> None:
+        """
+        Forget products after they were written, and the pages they are or would be listed in.
+        :param ids: str - products _id.
+        :return: None
+        """
+        self.__generation += 1
+        written: List[str] = [str(_id) for _id in ids]
+        for _id in written:
+            await self.__documents.delete(_id)
+        stale: List[Tuple[int, Optional[str]]] = [key for key, (after, last, full) in self.__ranges.items()
+                                                  if any((after is None or _id > after) and
+                                                         (not full or _id <= last) for _id in written)]
+        for key in stale:
+            del self.__ranges[key]
+            await self.__pages.delete(key)
+
+    async def clear(self) -> None:
+        """
+        Forget everything.
+        :return: None
+        """
+        self.__generation += 1
+        self.__ranges.clear()
+        await self.__documents.clear()
+        await self.__pages.clear()
+
+
+products_cache: ProductsCache = ProductsCache(MemoryBackend(PRODUCTS_CACHE_MAX_SIZE, PRODUCTS_CACHE_TTL),
+                                              MemoryBackend(PRODUCTS_CACHE_MAX_PAGES, PRODUCTS_CACHE_TTL),
+                                              PRODUCTS_CACHE_MAX_PAGES)
@@ -0,0 +1,94 @@
+"""
+In-process LRU cache with time to live
+"""
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+
+class TTLCache:
+    """
+    Least recently used cache whose entries expire after a time to live.
+    Meant to be used from the event loop thread only.
+    :param:  max_size: int - maximum number of entries kept.
+    :param:  ttl: float - seconds an entry stays valid.
+    :return: None.
+    :rtype: none.
+    """
+
+    def __init__(self, max_size: int, ttl: float) -> None:
+        self.__max_size: int = max_size
+        self.__ttl: float = ttl
+        self.__entries: OrderedDict[Hashable, Tuple[float, Any]] = OrderedDict()
+        self.__hits: int = 0
+        self.__misses: int = 0
+
+    @property
+    def ttl(self) -> float:
+        """Getter method for accessing the default time to live.
+        Returns:
+            The current value of the ttl attribute.
+        """
+        return self.__ttl
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        """Getter method for accessing the cache counters.
+        Returns:
+            Hits, misses and current size.
+        """
+        return {'hits': self.__hits,
+                'misses': self.__misses,
+                'size': len(self.__entries)}
+
+    def __contains__(self, key: Hashable) -> bool:
+        entry: Optional[Tuple[float, Any]] = self.__entries.get(key)
+        return entry is not None and entry[0] > time.monotonic()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """
+        Return the cached value or None when it is missing or expired.
+        :param key: Hashable
+        :return: Any
+        """
+        entry: Optional[Tuple[float, Any]] = self.__entries.get(key)
+        if entry is None:
+            self.__misses += 1
+            return None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self.__entries[key]
+            self.__misses += 1
+            return None
+        self.__entries.move_to_end(key)
+        self.__hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        """
+        Store a value, evicting the least recently used entry when the cache is full.
+        :param key: Hashable
+        :param value: Any
+        :param ttl: float - overrides the default time to live.
+        :return: None
+        """
+        expires_at: float = time.monotonic() + (self.__ttl if ttl is None else ttl)
+        self.__entries[key] = (expires_at, value)
+        self.__entries.move_to_end(key)
+        while len(self.__entries) > self.__max_size:
+            self.__entries.popitem(last=False)
+
+    def delete(self, key: Hashable) -> None:
+        """
+        Drop a single entry.
+        :param key: Hashable
+        :return: None
+        """
+        self.__entries.pop(key, None)
+
+    def clear(self) -> None:
+        """
+        Drop every entry.
+        :return: None
+        """
+        self.__entries.clear()
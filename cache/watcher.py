@@ -0,0 +1,219 @@
+"""
+Keeps the in-process caches coherent with the writes made by other workers
+"""
+import os
+import asyncio
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+from pymongo import errors
+from motor.motor_asyncio import AsyncIOMotorCollection
+from dotenv import load_dotenv, find_dotenv
+from .identity import users_identity_cache, clients_identity_cache
+from .prefix_index import products_prefix_index
+from .products import products_cache
+
+load_dotenv(find_dotenv())
+
+# 'auto' uses change streams and falls back to polling; 'stream' and 'poll' force one of them
+CACHE_WATCHER_MODE = os.environ.get("CACHE_WATCHER_MODE", "auto")
+
+CACHE_WATCHER_POLL_INTERVAL = float(os.environ.get("CACHE_WATCHER_POLL_INTERVAL", 5))
+
+# $changeStream is only supported on replica sets / unrecognized pipeline stage
+CHANGE_STREAMS_UNSUPPORTED = {40573, 40324}
+
+# the resume token is no longer in the oplog
+CHANGE_STREAM_HISTORY_LOST = 286
+
+ChangeHandler = Callable[[str, Optional[Dict]], Awaitable[None]]
+
+ResetHandler = Callable[[], Awaitable[None]]
+
+
+class ChangeWatcher:
+    """
+    Background tasks that follow the writes of every registered collection and call
+    the handlers with the _id of each changed document, so caches can drop it.
+    A change stream is used when the deployment supports it; otherwise the collection
+    is polled for documents whose last_modified moved. Polling cannot see deletes:
+    deleted documents leave the caches when their time to live ends.
+    :param:  poll_interval: float - seconds between two polls.
+    :param:  mode: str - 'auto', 'stream' or 'poll'.
+    :return: None.
+    :rtype: none.
+    """
+
+    def __init__(self, poll_interval: float, mode: str = 'auto') -> None:
+        if mode not in ('auto', 'stream', 'poll'):
+            raise ValueError("mode must be 'auto', 'stream' or 'poll'")
+        self.__poll_interval: float = poll_interval
+        self.__mode: str = mode
+        self.__handlers: Dict[str, Tuple[ChangeHandler, ResetHandler, Tuple[str, ...]]] = {}
+        self.__tasks: List[asyncio.Task] = []
+        self.__modes: Dict[str, str] = {}
+
+    @property
+    def status(self) -> Dict[str, str]:
+        """Getter method for accessing how each collection is followed.
+        Returns:
+            'stream' or 'poll' per collection name.
+        """
+        return dict(self.__modes)
+
+    def register(self, collection_name: str, on_change: ChangeHandler, on_reset: ResetHandler,
+                 fields: Tuple[str, ...] = ()) -> None:
+        """
+        Follow a collection.
+        :param collection_name: str
+        :param on_change: ChangeHandler - called with the _id and the changed fields, None on delete.
+        :param on_reset: ResetHandler - called when changes may have been missed.
+        :param fields: Tuple[str, ...] - fields read when polling, passed to on_change.
+        :return: None
+        """
+        self.__handlers[collection_name] = (on_change, on_reset, fields)
+
+    def start(self, collections: Dict[str, AsyncIOMotorCollection]) -> None:
+        """
+        Start one task per registered collection. Must be called from the event loop.
+        :param collections: Dict[str, AsyncIOMotorCollection] - collections by name.
+        :return: None
+        """
+        for name in self.__handlers:
+            if name in collections:
+                self.__tasks.append(asyncio.create_task(self.__follow(name, collections[name]),
+                                                        name=f"cache-watcher-{name}"))
+
+    async def stop(self) -> None:
+        """
+        Cancel the tasks and wait for them.
+        :return: None
+        """
+        for task in self.__tasks:
+            task.cancel()
+        await asyncio.gather(*self.__tasks, return_exceptions=True)
+        self.__tasks = []
+        self.__modes = {}
+
+    async def __follow(self, name: str, collection: AsyncIOMotorCollection) -> None:
+        if self.__mode != 'poll':
+            if await self.__stream(name, collection) or self.__mode == 'stream':
+                return
+        await self.__poll(name, collection)
+
+    async def __stream(self, name: str, collection: AsyncIOMotorCollection) -> bool:
+        """
+        Follow the change stream until cancelled.
+        :return: False when the deployment has no change streams.
+        """
+        resume_token: Optional[Dict] = None
+        backoff: float = 1
+        while True:
+            try:
+                async with collection.watch(resume_after=resume_token) as stream:
+                    self.__modes[name] = 'stream'
+                    backoff = 1
+                    async for change in stream:
+                        resume_token = stream.resume_token
+                        if change['operationType'] == 'invalidate':
+                            resume_token = None
+                        await self.__dispatch(name, change)
+            except errors.OperationFailure as error:
+                if error.code in CHANGE_STREAMS_UNSUPPORTED:
+                    print(f"{name}: change streams not available, polling last_modified")
+                    return False
+                print(error)
+                if error.code == CHANGE_STREAM_HISTORY_LOST:
+                    resume_token = None
+                    await self.__reset(name)
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, 30)
+            except errors.PyMongoError as error:
+                print(error)
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, 30)
+
+    async def __poll(self, name: str, collection: AsyncIOMotorCollection) -> None:
+        """
+        Look for documents modified since the last poll. Writers stamp last_modified
+        with their own clock, so the query looks one interval back and documents
+        already seen with the same last_modified are skipped.
+        """
+        self.__modes[name] = 'poll'
+        projection: Dict[str, int] = {'last_modified': 1, **{field: 1 for field in self.__handlers[name][2]}}
+        since: datetime = datetime.now()
+        seen: Dict[str, datetime] = {}
+        while True:
+            await asyncio.sleep(self.__poll_interval)
+            window_start: datetime = since - timedelta(seconds=self.__poll_interval)
+            try:
+                async for document in collection.find({'last_modified': {'$gt': window_start}}, projection):
+                    _id: str = str(document['_id'])
+                    modified: datetime = document['last_modified']
+                    if seen.get(_id) == modified:
+                        continue
+                    seen[_id] = modified
+                    since = max(since, modified)
+                    await self.__call(name, _id, document)
+                seen = {_id: modified for _id, modified in seen.items() if modified > window_start}
+            except errors.PyMongoError as error:
+                print(error)
+
+    async def __dispatch(self, name: str, change: Dict) -> None:
+        operation: str = change['operationType']
+        if operation in ('insert', 'replace'):
+            await self.__call(name, str(change['documentKey']['_id']), change.get('fullDocument', {}))
+        elif operation == 'update':
+            await self.__call(name, str(change['documentKey']['_id']),
+                              change['updateDescription']['updatedFields'])
+        elif operation == 'delete':
+            await self.__call(name, str(change['documentKey']['_id']), None)
+        else:
+            # drop, rename, dropDatabase, invalidate: every cached document may be gone
+            await self.__reset(name)
+
+    async def __call(self, name: str, _id: str, fields: Optional[Dict]) -> None:
+        try:
+            await self.__handlers[name][0](_id, fields)
+        except Exception as error:
+            print(error)
+
+    async def __reset(self, name: str) -> None:
+        try:
+            await self.__handlers[name][1]()
+        except Exception as error:
+            print(error)
+
+
+async def on_product_change(_id: str, fields: Optional[Dict]) -> None:
+    await products_cache.invalidate(_id)
+    if fields is None:
+        products_prefix_index.remove(_id)
+    elif 'name' in fields:
+        products_prefix_index.add(_id, fields['name'])
+
+
+async def on_products_reset() -> None:
+    await products_cache.clear()
+    products_prefix_index.clear()
+
+
+async def on_user_change(_id: str, fields: Optional[Dict]) -> None:
+    users_identity_cache.invalidate_subject(_id)
+
+
+async def on_users_reset() -> None:
+    users_identity_cache.clear()
+
+
+async def on_client_change(_id: str, fields: Optional[Dict]) -> None:
+    clients_identity_cache.invalidate_subject(_id)
+
+
+async def on_clients_reset() -> None:
+    clients_identity_cache.clear()
+
+
+change_watcher: ChangeWatcher = ChangeWatcher(CACHE_WATCHER_POLL_INTERVAL, CACHE_WATCHER_MODE)
+change_watcher.register('products', on_product_change, on_products_reset, ('name',))
+change_watcher.register('users', on_user_change, on_users_reset)
+change_watcher.register('clients', on_client_change, on_clients_reset)
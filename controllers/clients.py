@@ -1,4 +1,5 @@
-from typing import Dict, List
+from typing import Dict, List, Optional
+from motor.motor_asyncio import AsyncIOMotorCursor
 from services import ClientsService
 from .interface import IController
 from models import Client, ClientUpdate, ClientQuery, ClientId
@@ -8,32 +9,34 @@ class ClientsController(IController):
     def __init__(self):
         self.service: ClientsService = ClientsService()
 
-    def get_all(self) -> List[Dict]:
-        self.service.get_all()
-        response: List[Dict] = self.service.all
+    async def get_all(self, limit: Optional[int] = None, after: Optional[str] = None) -> List[Dict]:
+        response: List[Dict] = await self.service.get_all(limit, after)
         return response
 
-    def get_many(self, query: ClientQuery) -> List[Dict] | Dict:
-        self.service.get_many(query)
-        response: List[Dict] = self.service.many
+    def find_all(self, limit: Optional[int] = None, after: Optional[str] = None) -> AsyncIOMotorCursor:
+        response: AsyncIOMotorCursor = self.service.find_all(limit, after)
         return response
 
-    def get_one_by_id(self, _id: ClientId) -> Dict:
-        self.service.get_one_by_id(_id)
-        response: Dict = self.service.one
+    async def get_many(self, query: ClientQuery) -> List[Dict] | Dict:
+        response: List[Dict] = await self.service.get_many(query)
         return response
 
-    def create_one(self, client: Client) -> Dict:
-        self.service.create_one(client)
-        response: Dict = self.service.create_result
+    async def get_one_by_id(self, _id: ClientId) -> Dict:
+        response: Dict = await self.service.get_one_by_id(_id)
         return response
 
-    def update_one_by_id(self, updates: ClientUpdate) -> Dict:
-        self.service.update_one_by_id(updates)
-        response: Dict = self.service.update_result
+    async def get_last_modified(self, _id: ClientId) -> Dict:
+        response: Dict = await self.service.get_last_modified(_id)
         return response
 
-    def delete_one_by_id(self, _id: str) -> Dict:
-        self.service.delete_one_by_id(_id)
-        response: Dict = self.service.delete_result
+    async def create_one(self, client: Client) -> Dict:
+        response: Dict = await self.service.create_one(client)
+        return response
+
+    async def update_one_by_id(self, updates: ClientUpdate) -> Dict:
+        response: Dict = await self.service.update_one_by_id(updates)
+        return response
+
+    async def delete_one_by_id(self, _id: str) -> Dict:
+        response: Dict = await self.service.delete_one_by_id(_id)
         return response
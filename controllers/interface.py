@@ -4,21 +4,21 @@ from typing import List, Dict
 
 class IController(ABC):
     @abstractmethod
-    def get_all(self) -> List[Dict]:
+    async def get_all(self) -> List[Dict]:
         pass
 
     @abstractmethod
-    def get_one_by_id(self, _id: str) -> Dict:
+    async def get_one_by_id(self, _id: str) -> Dict:
         pass
 
     @abstractmethod
-    def create_one(self, user: Dict) -> Dict:
+    async def create_one(self, user: Dict) -> Dict:
         pass
 
     @abstractmethod
-    def update_one_by_id(self, updates: Dict) -> Dict:
+    async def update_one_by_id(self, updates: Dict) -> Dict:
         pass
 
     @abstractmethod
-    def delete_one_by_id(self, _id: str) -> Dict:
+    async def delete_one_by_id(self, _id: str) -> Dict:
         pass
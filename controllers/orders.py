@@ -1,47 +1,65 @@
-from typing import List, Dict
+from typing import List, Dict, Optional
+from motor.motor_asyncio import AsyncIOMotorCursor
 from services import OrdersService
 from .interface import IController
-from models import AddItem, RemoveItem, ClientId, OrderId, ChangeStatus
+from models import AddItem, RemoveItem, ClientId, OrderId, OrderIds, ChangeStatus, OrderStatsQuery
 
 
 class OrdersController(IController):
     def __init__(self):
         self.service: OrdersService = OrdersService()
 
-    def get_all(self) -> List[Dict]:
-        self.service.get_all()
-        response: List[Dict] = self.service.all
+    async def get_all(self, limit: Optional[int] = None, after: Optional[str] = None) -> List[Dict]:
+        response: List[Dict] = await self.service.get_all(limit, after)
         return response
 
-    def get_one_by_id(self, _id: OrderId) -> Dict:
-        self.service.get_one_by_id(_id)
-        response: Dict = self.service.one
+    def find_all(self, limit: Optional[int] = None, after: Optional[str] = None) -> AsyncIOMotorCursor:
+        response: AsyncIOMotorCursor = self.service.find_all(limit, after)
         return response
 
-    def create_one(self, _id: ClientId) -> Dict:
-        self.service.create_one(_id)
-        response: Dict = self.service.create_result
+    async def get_one_by_id(self, _id: OrderId) -> Dict:
+        response: Dict = await self.service.get_one_by_id(_id)
         return response
 
-    def update_one_by_id(self, updates: Dict) -> Dict:
+    async def get_last_modified(self, _id: OrderId) -> Dict:
+        response: Dict = await self.service.get_last_modified(_id)
+        return response
+
+    async def create_one(self, _id: ClientId) -> Dict:
+        response: Dict = await self.service.create_one(_id)
+        return response
+
+    async def update_one_by_id(self, updates: Dict) -> Dict:
         pass
 
-    def add_item(self, item: AddItem) -> Dict:
-        self.service.add_product(item)
-        response: Dict = self.service.update_result
+    async def add_item(self, item: AddItem) -> Dict:
+        response: Dict = await self.service.add_product(item)
+        return response
+
+    async def remove_item(self, item: RemoveItem) -> Dict:
+        response: Dict = await self.service.remove_product(item)
+        return response
+
+    async def change_status(self, status: ChangeStatus) -> Dict:
+        response: Dict = await self.service.change_status(status)
+        return response
+
+    async def delete_one_by_id(self, _id: str) -> Dict:
+        response: Dict = await self.service.delete_one_by_id(_id)
+        return response
+
+    async def delete_many_by_ids(self, order_ids: OrderIds) -> Dict:
+        response: Dict = await self.service.delete_many_by_ids(order_ids)
         return response
 
-    def remove_item(self, item: RemoveItem) -> Dict:
-        self.service.remove_product(item)
-        response: Dict = self.service.update_result
+    async def revenue_per_day(self, query: OrderStatsQuery) -> List[Dict] | Dict:
+        response: List[Dict] | Dict = await self.service.revenue_per_day(query)
         return response
 
-    def change_status(self, status: ChangeStatus) -> Dict:
-        self.service.change_status(status)
-        response: Dict = self.service.update_result
+    async def units_per_product(self, query: OrderStatsQuery, limit: Optional[int] = None) -> List[Dict] | Dict:
+        response: List[Dict] | Dict = await self.service.units_per_product(query, limit)
         return response
 
-    def delete_one_by_id(self, _id: str) -> Dict:
-        self.service.delete_one_by_id(_id)
-        response: Dict = self.service.delete_result
+    async def count_per_status(self, query: OrderStatsQuery) -> List[Dict] | Dict:
+        response: List[Dict] | Dict = await self.service.count_per_status(query)
         return response
@@ -1,4 +1,5 @@
-from typing import Dict, List, Union
+from typing import Dict, List, Union, Optional
+from motor.motor_asyncio import AsyncIOMotorCursor
 from services import ProductsService
 from .interface import IController
 from models import Product
@@ -9,32 +10,42 @@ class ProductsController(IController):
     def __init__(self):
         self.service: ProductsService = ProductsService()
 
-    def get_all(self) -> List[Dict] | Dict:
-        self.service.get_all()
-        response: List[Dict] | Dict = self.service.all
+    async def get_all(self, limit: Optional[int] = None, after: Optional[str] = None) -> List[Dict] | Dict:
+        response: List[Dict] | Dict = await self.service.get_all(limit, after)
         return response
 
-    def get_one_by_id(self, _id: str) -> Dict:
-        self.service.get_one_by_id(_id)
-        response: Dict = self.service.one
+    def find_all(self, limit: Optional[int] = None, after: Optional[str] = None) -> AsyncIOMotorCursor:
+        response: AsyncIOMotorCursor = self.service.find_all(limit, after)
         return response
 
-    def get_many(self, query: ProductQuery) -> List[Dict] | Dict:
-        self.service.get_many(query)
-        response: List[Dict] = self.service.many
+    async def get_one_by_id(self, _id: str) -> Dict:
+        response: Dict = await self.service.get_one_by_id(_id)
         return response
 
-    def create_one(self, product: Product) -> Dict:
-        self.service.create_one(product)
-        response: Dict = self.service.create_result
+    async def get_last_modified(self, _id: str) -> Dict:
+        response: Dict = await self.service.get_last_modified(_id)
         return response
 
-    def update_one_by_id(self, updates: ProductUpdate) -> Dict:
-        self.service.update_one_by_id(updates)
-        response: Dict = self.service.update_result
+    async def get_many(self, query: ProductQuery) -> List[Dict] | Dict:
+        response: List[Dict] = await self.service.get_many(query)
         return response
 
-    def delete_one_by_id(self, _id: str) -> Dict:
-        self.service.delete_one_by_id(_id)
-        response: Dict = self.service.delete_result
+    async def autocomplete(self, prefix: str, limit: int) -> List[Dict] | Dict:
+        response: List[Dict] | Dict = await self.service.autocomplete(prefix, limit)
+        return response
+
+    async def cache_stats(self) -> Dict:
+        response: Dict = await self.service.cache_stats()
+        return response
+
+    async def create_one(self, product: Product) -> Dict:
+        response: Dict = await self.service.create_one(product)
+        return response
+
+    async def update_one_by_id(self, updates: ProductUpdate) -> Dict:
+        response: Dict = await self.service.update_one_by_id(updates)
+        return response
+
+    async def delete_one_by_id(self, _id: str) -> Dict:
+        response: Dict = await self.service.delete_one_by_id(_id)
         return response
@@ -1,3 +1,4 @@
+from typing import Dict
 from services import ClientsService, ProductsService
 
 
@@ -6,22 +7,27 @@ class UploadsController:
         self.service_clients: ClientsService = ClientsService()
         self.service_products: ProductsService = ProductsService()
 
-    def upload_photo_client(self, client_id: str, photo_url: str):
-        self.service_clients.get_one_by_id(client_id)
-        self.service_clients.insert_photo(photo_url)
-        return self.service_clients.insert_new_photo_result
-
-    def upload_photo_product(self, product_id: str, photo_url: str):
-        self.service_products.get_one_by_id(product_id)
-        self.service_products.insert_photo(photo_url)
-        return self.service_products.insert_new_photo_result
-
-    def remove_photo_client(self, client_id: str, photo_url: str):
-        self.service_clients.get_one_by_id(client_id)
-        self.service_clients.remove_photo(photo_url)
-        return self.service_clients.insert_new_photo_result
-
-    def remove_photo_product(self, product_id: str, photo_url: str):
-        self.service_products.get_one_by_id(product_id)
-        self.service_products.remove_photo(photo_url)
-        return self.service_products.insert_new_photo_result
+    async def upload_photo_client(self, client_id: str, photo_url: str) -> Dict:
+        response: Dict = await self.service_clients.insert_photo(client_id, photo_url)
+        return response
+
+    async def upload_photo_product(self, product_id: str, photo_url: str) -> Dict:
+        response: Dict = await self.service_products.insert_photo(product_id, photo_url)
+        return response
+
+    async def upload_photo_variants_client(self, client_id: str, photo_url: str, variants: Dict[str, Dict]) -> Dict:
+        response: Dict = await self.service_clients.insert_photo_variants(client_id, photo_url, variants)
+        return response
+
+    async def upload_photo_variants_product(self, product_id: str, photo_url: str,
+                                            variants: Dict[str, Dict]) -> Dict:
+        response: Dict = await self.service_products.insert_photo_variants(product_id, photo_url, variants)
+        return response
+
+    async def remove_photo_client(self, client_id: str, photo_url: str) -> Dict:
+        response: Dict = await self.service_clients.remove_photo(client_id, photo_url)
+        return response
+
+    async def remove_photo_product(self, product_id: str, photo_url: str) -> Dict:
+        response: Dict = await self.service_products.remove_photo(product_id, photo_url)
+        return response
@@ -1 +1,6 @@
-from .database_config import DB
+from .database_config import DB, mongoDBClient, SETTINGS
+from .monitoring import RequestCommands, CommandCounter, command_counter, current_commands, \
+    PoolMonitor, pool_monitor
+from .memory_client import MemoryClient
+from .settings import DatabaseSettings
+from .constants import COLLECTIONS_NAMES
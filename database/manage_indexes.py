@@ -0,0 +1,116 @@
+"""
+Compare the indexes of the deployment with the registry in schemas/indexes.py.
+
+    python -m database.manage_indexes            # print the differences
+    python -m database.manage_indexes --apply    # create the missing indexes
+    python -m database.manage_indexes --apply --drop
+                                                 # also drop and rebuild changed indexes,
+                                                 # and drop the ones not in the registry
+    python -m database.manage_indexes --check    # exit with status 1 on any difference
+"""
+import argparse
+import asyncio
+from typing import Dict, List
+from pymongo import IndexModel, TEXT
+from motor.motor_asyncio import AsyncIOMotorCollection
+from schemas import INDEXES
+from .database_config import DB, mongoDBClient
+
+
+def same_index(model: IndexModel, existing: Dict) -> bool:
+    """
+    Tell whether an index of the deployment matches its registry definition.
+    Only the options set in the registry are compared.
+    :param model: IndexModel - registry definition.
+    :param existing: Dict - document returned by list_indexes.
+    :return: bool
+    """
+    for option, value in model.document.items():
+        if option == 'key':
+            keys: List = list(value.items())
+            if any(direction == TEXT for _, direction in keys):
+                # text indexes are stored as _fts/_ftsx; their fields live in weights
+                if set(existing.get('weights', {})) != {field for field, _ in keys}:
+                    return False
+            elif list(existing['key'].items()) != keys:
+                return False
+        elif option == 'weights':
+            # the server keeps the weights of fields that were not weighted explicitly as 1
+            if any(existing.get('weights', {}).get(field) != weight for field, weight in value.items()):
+                return False
+        elif existing.get(option) != value:
+            return False
+    return True
+
+
+async def diff_indexes(collection: AsyncIOMotorCollection, models: List[IndexModel]) -> Dict[str, List]:
+    """
+    Indexes to create, to rebuild and to drop so the collection matches the registry.
+    :param collection: AsyncIOMotorCollection
+    :param models: List[IndexModel] - registry definitions.
+    :return: Dict[str, List] - 'missing' and 'changed' IndexModels, 'extra' index names.
+    """
+    existing: Dict[str, Dict] = {index['name']: index
+                                 async for index in collection.list_indexes()}
+    wanted: Dict[str, IndexModel] = {model.document['name']: model for model in models}
+    return {
+        'missing': [model for name, model in wanted.items() if name not in existing],
+        'changed': [model for name, model in wanted.items()
+                    if name in existing and not same_index(model, existing[name])],
+        'extra': [name for name in existing if name not in wanted and name != '_id_'],
+    }
+
+
+async def manage_indexes(apply: bool = False, drop: bool = False) -> int:
+    """
+    Print the differences of every collection, and apply them when asked.
+    :param apply: bool - create the missing indexes.
+    :param drop: bool - with apply, rebuild changed indexes and drop the extra ones.
+    :return: int - number of differences found.
+    """
+    differences: int = 0
+    for collection_name, models in INDEXES.items():
+        collection: AsyncIOMotorCollection = getattr(DB, collection_name)
+        diff: Dict[str, List] = await diff_indexes(collection, models)
+        for model in diff['missing']:
+            print(f"{collection_name}: missing {model.document['name']}")
+        for model in diff['changed']:
+            print(f"{collection_name}: changed {model.document['name']}")
+        for name in diff['extra']:
+            print(f"{collection_name}: not in registry {name}")
+        differences += sum(len(items) for items in diff.values())
+        if not apply:
+            continue
+        if drop:
+            for name in diff['extra'] + [model.document['name'] for model in diff['changed']]:
+                await collection.drop_index(name)
+                print(f"{collection_name}: dropped {name}")
+            to_create: List[IndexModel] = diff['missing'] + diff['changed']
+        else:
+            to_create: List[IndexModel] = diff['missing']
+        if to_create:
+            created: List[str] = await collection.create_indexes(to_create)
+            print(f"{collection_name}: created {', '.join(created)}")
+    if not differences:
+        print("indexes are up to date")
+    return differences
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Diff and apply the registered mongodb indexes.")
+    parser.add_argument('--apply', action='store_true', help="create the missing indexes")
+    parser.add_argument('--drop', action='store_true',
+                        help="with --apply, rebuild changed indexes and drop the ones not in the registry")
+    parser.add_argument('--check', action='store_true',
+                        help="exit with status 1 when the deployment differs from the registry")
+    args = parser.parse_args()
+    try:
+        differences: int = asyncio.run(manage_indexes(args.apply, args.drop))
+    finally:
+        mongoDBClient.close()
+    if args.check and differences and not args.apply:
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,1141 @@
+"""
+In-process stand-in for the motor client, used with DATABASE_BACKEND=memory.
+
+It implements the subset of the collection API the services use, so the
+application, its benchmarks and load tests run without a deployment:
+find/find_one/count_documents, insert_one, update_one, delete_one,
+find_one_and_update/find_one_and_delete, bulk_write and aggregate with the
+stages and expressions of the order statistics. Unique indexes are enforced;
+validators are stored but not applied, and $text matches whole words without
+stemming. Datetimes are stored as BSON keeps them: naive UTC, truncated to
+milliseconds. Data lives in the process and is lost when it exits.
+"""
+import re
+import copy
+import time
+import itertools
+from datetime import datetime, timedelta, timezone
+from typing import Any, AsyncIterator, Callable, Dict, Hashable, Iterable, List, Optional, Sequence, Set, Tuple, \
+    Union
+from bson import encode, ObjectId
+from bson.codec_options import CodecOptions, DEFAULT_CODEC_OPTIONS
+from bson.raw_bson import RawBSONDocument
+from pymongo import IndexModel, InsertOne, UpdateOne, UpdateMany, DeleteOne, DeleteMany, ReturnDocument, TEXT
+from pymongo import errors, monitoring
+from pymongo.results import InsertOneResult, InsertManyResult, UpdateResult, DeleteResult, BulkWriteResult
+
+# raised by the watcher of cache/watcher.py to fall back to polling
+CHANGE_STREAMS_UNSUPPORTED_CODE = 40573
+
+UNRECOGNIZED_STAGE_CODE = 40324
+
+DUPLICATE_KEY_CODE = 11000
+
+_MISSING = object()
+
+_REQUEST_IDS = itertools.count(1)
+
+
+def _path_values(value: Any, parts: List[str]) -> List[Any]:
+    """
+    Values reached by a dotted path, traversing arrays like the query language does.
+    """
+    if not parts:
+        return [value]
+    if isinstance(value, dict):
+        if parts[0] not in value:
+            return []
+        return _path_values(value[parts[0]], parts[1:])
+    if isinstance(value, list):
+        if parts[0].isdigit():
+            index: int = int(parts[0])
+            return _path_values(value[index], parts[1:]) if index < len(value) else []
+        found: List[Any] = []
+        for element in value:
+            if isinstance(element, (dict, list)):
+                found.extend(_path_values(element, parts))
+        return found
+    return []
+
+
+def _candidates(document: Dict, path: str) -> List[Any]:
+    """
+    Values a query condition is compared with: each value and, for arrays, their elements.
+    """
+    candidates: List[Any] = []
+    for value in _path_values(document, path.split('.')):
+        candidates.append(value)
+        if isinstance(value, list):
+            candidates.extend(value)
+    return candidates
+
+
+def _type_rank(value: Any) -> int:
+    # BSON comparison order
+    if value is None or value is _MISSING:
+        return 1
+    if isinstance(value, bool):
+        return 8
+    if isinstance(value, (int, float)):
+        return 2
+    if isinstance(value, str):
+        return 3
+    if isinstance(value, dict):
+        return 4
+    if isinstance(value, list):
+        return 5
+    if isinstance(value, ObjectId):
+        return 7
+    if isinstance(value, datetime):
+        return 9
+    return 10
+
+
+def _compare(left: Any, right: Any) -> Optional[int]:
+    """
+    -1, 0 or 1, or None when the values are of different types.
+    """
+    if _type_rank(left) != _type_rank(right):
+        return None
+    try:
+        return (left > right) - (left < right)
+    except TypeError:
+        return None
+
+
+def _sort_key(value: Any) -> Tuple[int, Any]:
+    rank: int = _type_rank(value)
+    if rank in (4, 5, 10):
+        return rank, repr(value)
+    if rank == 1:
+        return rank, 0
+    return rank, value
+
+
+def _hashable(value: Any) -> Hashable:
+    if isinstance(value, dict):
+        return tuple((key, _hashable(item)) for key, item in value.items())
+    if isinstance(value, list):
+        return tuple(_hashable(item) for item in value)
+    return value
+
+
+def _bson_dates(value: Any) -> Any:
+    # BSON dates are UTC milliseconds: a server hands back neither the microseconds nor the timezone
+    if isinstance(value, datetime):
+        if value.tzinfo is not None:
+            value = value.astimezone(timezone.utc).replace(tzinfo=None)
+        return value.replace(microsecond=value.microsecond // 1000 * 1000)
+    if isinstance(value, dict):
+        return {key: _bson_dates(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_bson_dates(item) for item in value]
+    return value
+
+
+def _regex(condition: Dict) -> re.Pattern:
+    pattern: Union[str, re.Pattern] = condition['$regex']
+    if isinstance(pattern, re.Pattern):
+        return pattern
+    flags: int = 0
+    for option in condition.get('$options', ''):
+        flags |= {'i': re.IGNORECASE, 'm': re.MULTILINE, 's': re.DOTALL, 'x': re.VERBOSE}.get(option, 0)
+    return re.compile(pattern, flags)
+
+
+def _match_operator(operator: str, argument: Any, candidates: List[Any], condition: Dict) -> bool:
+    if operator == '$eq':
+        return any(_compare(candidate, argument) == 0 for candidate in candidates) \
+            or (argument is None and not candidates)
+    if operator == '$ne':
+        return not _match_operator('$eq', argument, candidates, condition)
+    if operator in ('$gt', '$gte', '$lt', '$lte'):
+        accepted: Tuple[int, ...] = {'$gt': (1,), '$gte': (0, 1), '$lt': (-1,), '$lte': (-1, 0)}[operator]
+        return any(_compare(candidate, argument) in accepted for candidate in candidates)
+    if operator == '$in':
+        return any(_match_value(candidates, value) for value in argument)
+    if operator == '$nin':
+        return not any(_match_value(candidates, value) for value in argument)
+    if operator == '$exists':
+        return bool(candidates) == bool(argument)
+    if operator == '$regex':
+        pattern: re.Pattern = _regex(condition)
+        return any(isinstance(candidate, str) and pattern.search(candidate) for candidate in candidates)
+    if operator == '$options':
+        return True
+    if operator == '$size':
+        return any(isinstance(candidate, list) and len(candidate) == argument for candidate in candidates)
+    if operator == '$elemMatch':
+        return any(isinstance(candidate, list) and any(isinstance(element, dict) and _matches(element, argument)
+                                                       for element in candidate)
+                   for candidate in candidates)
+    if operator == '$not':
+        return not _match_condition(candidates, argument)
+    raise errors.OperationFailure(f"unknown operator: {operator}", code=2)
+
+
+def _match_value(candidates: List[Any], value: Any) -> bool:
+    if isinstance(value, re.Pattern):
+        return any(isinstance(candidate, str) and value.search(candidate) for candidate in candidates)
+    if value is None and not candidates:
+        return True
+    return any(_compare(candidate, value) == 0 for candidate in candidates)
+
+
+def _match_condition(candidates: List[Any], condition: Any) -> bool:
+    if isinstance(condition, dict) and condition and all(key.startswith('$') for key in condition):
+        return all(_match_operator(operator, argument, candidates, condition)
+                   for operator, argument in condition.items())
+    return _match_value(candidates, condition)
+
+
+def _matches(document: Dict, query: Dict, text: Optional[Callable[[Dict, str], float]] = None) -> bool:
+    """
+    Whether a document satisfies a query filter.
+    :param text: scores a document against a $text search, 0 when it does not match.
+    """
+    for key, condition in query.items():
+        if key == '$and':
+            if not all(_matches(document, sub_query, text) for sub_query in condition):
+                return False
+        elif key == '$or':
+            if not any(_matches(document, sub_query, text) for sub_query in condition):
+                return False
+        elif key == '$nor':
+            if any(_matches(document, sub_query, text) for sub_query in condition):
+                return False
+        elif key == '$text':
+            if text is None:
+                raise errors.OperationFailure("text index required for $text query", code=27)
+            if not text(document, condition['$search']):
+                return False
+        elif key.startswith('$'):
+            raise errors.OperationFailure(f"unknown top level operator: {key}", code=2)
+        elif not _match_condition(_candidates(document, key), condition):
+            return False
+    return True
+
+
+def _project_tree(paths: Iterable[str]) -> Dict:
+    tree: Dict = {}
+    for path in paths:
+        node: Dict = tree
+        parts: List[str] = path.split('.')
+        for part in parts[:-1]:
+            node = node.setdefault(part, {})
+            if node is True:
+                break
+        else:
+            node[parts[-1]] = True
+    return tree
+
+
+def _include(value: Any, tree: Dict) -> Any:
+    if isinstance(value, list):
+        return [_include(element, tree) for element in value if isinstance(element, (dict, list))]
+    included: Dict = {}
+    for key, node in tree.items():
+        if key in value:
+            if node is True:
+                included[key] = copy.deepcopy(value[key])
+            elif isinstance(value[key], (dict, list)):
+                included[key] = _include(value[key], node)
+    return included
+
+
+def _exclude(value: Any, tree: Dict) -> None:
+    if isinstance(value, list):
+        for element in value:
+            if isinstance(element, (dict, list)):
+                _exclude(element, tree)
+        return
+    for key, node in tree.items():
+        if key in value:
+            if node is True:
+                del value[key]
+            elif isinstance(value[key], (dict, list)):
+                _exclude(value[key], node)
+
+
+def _project(document: Dict, projection: Optional[Union[Dict, List[str]]], score: float = 0) -> Dict:
+    if not projection:
+        return copy.deepcopy(document)
+    if isinstance(projection, (list, tuple)):
+        projection = {field: 1 for field in projection}
+    meta: Dict[str, float] = {key: score for key, value in projection.items()
+                              if isinstance(value, dict) and value.get('$meta') == 'textScore'}
+    fields: Dict = {key: value for key, value in projection.items() if key not in meta}
+    with_id: bool = bool(fields.pop('_id', True))
+    if any(fields.values()):
+        projected: Dict = _include(document, _project_tree(fields))
+        if with_id and '_id' in document:
+            projected = {'_id': document['_id'], **projected}
+    else:
+        projected = copy.deepcopy(document)
+        _exclude(projected, _project_tree(fields))
+        if not with_id:
+            projected.pop('_id', None)
+    projected.update(meta)
+    return projected
+
+
+def _set_path(document: Dict, path: str, value: Any) -> None:
+    parts: List[str] = path.split('.')
+    for part in parts[:-1]:
+        document = document.setdefault(part, {})
+    document[parts[-1]] = value
+
+
+def _get_path(document: Dict, path: str) -> Any:
+    for part in path.split('.'):
+        if not isinstance(document, dict) or part not in document:
+            return _MISSING
+        document = document[part]
+    return document
+
+
+def _unset_path(document: Dict, path: str) -> None:
+    parts: List[str] = path.split('.')
+    for part in parts[:-1]:
+        document = document.get(part)
+        if not isinstance(document, dict):
+            return
+    document.pop(parts[-1], None)
+
+
+def _write_error(message: str, code: int) -> None:
+    raise errors.WriteError(message, code, {'index': 0, 'code': code, 'errmsg': message})
+
+
+def _apply_update(document: Dict, update: Dict) -> None:
+    if not update or not all(key.startswith('$') for key in update):
+        raise ValueError('update only works with $ operators')
+    for operator, fields in update.items():
+        for path, argument in fields.items():
+            current: Any = _get_path(document, path)
+            if (path == '_id' or path.startswith('_id.')) and (operator != '$set' or current != argument):
+                _write_error("Performing an update on the path '_id' would modify the immutable field '_id'", 66)
+            if operator == '$set':
+                _set_path(document, path, copy.deepcopy(argument))
+            elif operator == '$unset':
+                _unset_path(document, path)
+            elif operator == '$inc':
+                _set_path(document, path, argument if current is _MISSING else current + argument)
+            elif operator in ('$min', '$max'):
+                order: Optional[int] = None if current is _MISSING else _compare(argument, current)
+                if order is None or (operator == '$min' and order < 0) or (operator == '$max' and order > 0):
+                    _set_path(document, path, copy.deepcopy(argument))
+            elif operator in ('$push', '$addToSet'):
+                if current is _MISSING:
+                    current = []
+                    _set_path(document, path, current)
+                elif not isinstance(current, list):
+                    _write_error(f"The field '{path}' must be an array", 2)
+                values: List[Any] = argument['$each'] if isinstance(argument, dict) and '$each' in argument \
+                    else [argument]
+                for value in values:
+                    if operator == '$push' or value not in current:
+                        current.append(copy.deepcopy(value))
+            elif operator == '$pull':
+                if isinstance(current, list):
+                    current[:] = [element for element in current if not _pulls(element, argument)]
+            else:
+                _write_error(f"Unknown modifier: {operator}", 9)
+
+
+def _pulls(element: Any, condition: Any) -> bool:
+    if isinstance(condition, dict) and condition and not all(key.startswith('$') for key in condition):
+        return isinstance(element, dict) and _matches(element, condition)
+    return _match_condition([element], condition)
+
+
+def _evaluate(expression: Any, document: Dict, variables: Dict[str, Any]) -> Any:
+    """
+    Value of an aggregation expression for a document.
+    """
+    if isinstance(expression, str) and expression.startswith('$$'):
+        name, _, path = expression[2:].partition('.')
+        value: Any = document if name in ('ROOT', 'CURRENT') else variables.get(name)
+        return _expression_path(value, path.split('.')) if path else value
+    if isinstance(expression, str) and expression.startswith('$'):
+        return _expression_path(document, expression[1:].split('.'))
+    if isinstance(expression, list):
+        return [_evaluate(item, document, variables) for item in expression]
+    if isinstance(expression, dict):
+        if len(expression) == 1:
+            operator, argument = next(iter(expression.items()))
+            if operator.startswith('$'):
+                return _operator(operator, argument, document, variables)
+        return {key: _evaluate(value, document, variables) for key, value in expression.items()}
+    return expression
+
+
+def _expression_path(value: Any, parts: List[str]) -> Any:
+    for index, part in enumerate(parts):
+        if isinstance(value, list):
+            return [item for item in (_expression_path(element, parts[index:]) for element in value)
+                    if item is not None]
+        if not isinstance(value, dict):
+            return None
+        value = value.get(part)
+    return value
+
+
+def _numbers(values: Any) -> List[Union[int, float]]:
+    return [value for value in values if isinstance(value, (int, float)) and not isinstance(value, bool)]
+
+
+def _operator(operator: str, argument: Any, document: Dict, variables: Dict[str, Any]) -> Any:
+    if operator == '$literal':
+        return argument
+    if operator == '$map':
+        items: Any = _evaluate(argument['input'], document, variables)
+        name: str = argument.get('as', 'this')
+        return [_evaluate(argument['in'], document, {**variables, name: item}) for item in items or []]
+    if operator == '$dateToString':
+        date: Any = _evaluate(argument['date'], document, variables)
+        return date.strftime(argument.get('format', '%Y-%m-%dT%H:%M:%S.%LZ').replace('%L', '000')) \
+            if isinstance(date, datetime) else None
+    if operator == '$cond':
+        if isinstance(argument, list):
+            argument = dict(zip(('if', 'then', 'else'), argument))
+        branch: str = 'then' if _evaluate(argument['if'], document, variables) else 'else'
+        return _evaluate(argument[branch], document, variables)
+    values: Any = _evaluate(argument, document, variables)
+    if operator == '$sum':
+        if isinstance(argument, list):
+            values = [sum(_numbers(value)) if isinstance(value, list) else value for value in values]
+        return sum(_numbers(values if isinstance(values, list) else [values]))
+    if operator in ('$avg', '$min', '$max'):
+        numbers: List = _numbers(values if isinstance(values, list) else [values])
+        if not numbers:
+            return None
+        return {'$avg': lambda: sum(numbers) / len(numbers), '$min': lambda: min(numbers),
+                '$max': lambda: max(numbers)}[operator]()
+    if operator == '$multiply':
+        product: Union[int, float] = 1
+        for value in values:
+            if value is None:
+                return None
+            product *= value
+        return product
+    if operator == '$add':
+        return None if None in values else sum(values)
+    if operator == '$subtract':
+        return None if None in values else values[0] - values[1]
+    if operator == '$divide':
+        return None if None in values else values[0] / values[1]
+    if operator == '$round':
+        value, places = (values + [0])[:2] if isinstance(values, list) else (values, 0)
+        return None if value is None else round(value, places)
+    if operator == '$size':
+        return len(values)
+    if operator == '$toString':
+        return None if values is None else str(values)
+    if operator == '$concat':
+        return None if None in values else ''.join(values)
+    if operator == '$ifNull':
+        return next((value for value in values if value is not None), None)
+    comparisons: Dict[str, Tuple[int, ...]] = {'$eq': (0,), '$ne': (-1, 1), '$gt': (1,), '$gte': (0, 1),
+                                               '$lt': (-1,), '$lte': (-1, 0)}
+    if operator in comparisons:
+        order: Optional[int] = _compare(values[0], values[1])
+        if order is None:
+            order = (_type_rank(values[0]) > _type_rank(values[1])) - (_type_rank(values[0]) < _type_rank(values[1]))
+        return order in comparisons[operator]
+    raise errors.OperationFailure(f"Unrecognized expression '{operator}'", code=168)
+
+
+def _accumulate(operator: str, values: List[Any]) -> Any:
+    if operator == '$sum':
+        return sum(_numbers(values))
+    if operator == '$avg':
+        numbers: List = _numbers(values)
+        return sum(numbers) / len(numbers) if numbers else None
+    if operator == '$first':
+        return values[0] if values else None
+    if operator == '$last':
+        return values[-1] if values else None
+    if operator in ('$min', '$max'):
+        present: List[Any] = [value for value in values if value is not None]
+        if not present:
+            return None
+        function: Callable = min if operator == '$min' else max
+        return function(present, key=_sort_key)
+    if operator == '$push':
+        return values
+    if operator == '$addToSet':
+        unique: Dict[Hashable, Any] = {}
+        for value in values:
+            unique.setdefault(_hashable(value), value)
+        return list(unique.values())
+    raise errors.OperationFailure(f"unknown group operator '{operator}'", code=15952)
+
+
+def _sort(documents: List[Dict], keys: List[Tuple[str, Any]], score: Callable[[Dict], float]) -> List[Dict]:
+    for key, direction in reversed(keys):
+        if isinstance(direction, dict):
+            # {'$meta': 'textScore'}: best matches first
+            documents = sorted(documents, key=score, reverse=True)
+        else:
+            documents = sorted(documents, key=lambda document: min(
+                (_sort_key(value) for value in _candidates(document, key)), default=_sort_key(None)),
+                               reverse=direction == -1)
+    return documents
+
+
+def _sort_keys(key_or_list: Union[str, List, Dict], direction: Optional[int] = None) -> List[Tuple[str, Any]]:
+    if isinstance(key_or_list, str):
+        return [(key_or_list, direction or 1)]
+    if isinstance(key_or_list, dict):
+        return list(key_or_list.items())
+    return list(key_or_list)
+
+
+class _Monitor:
+    """
+    Publishes a command event pair per operation to the listeners given to the
+    client, as the driver does, so command monitoring also works on this backend.
+    """
+    connection_id: Tuple[str, int] = ('memory', 0)
+
+    def __init__(self, listeners: Sequence[monitoring.CommandListener], database_name: str) -> None:
+        self.listeners: List[monitoring.CommandListener] = list(listeners)
+        self.database_name: str = database_name
+
+    def run(self, name: str, collection: str, function: Callable[[], Any]) -> Any:
+        if not self.listeners:
+            return function()
+        request_id: int = next(_REQUEST_IDS)
+        started_event = monitoring.CommandStartedEvent({name: collection or 1}, self.database_name, request_id,
+                                                       self.connection_id, request_id)
+        for listener in self.listeners:
+            listener.started(started_event)
+        started: float = time.perf_counter()
+        try:
+            result: Any = function()
+        except errors.PyMongoError as error:
+            failed_event = monitoring.CommandFailedEvent(timedelta(seconds=time.perf_counter() - started),
+                                                         {'ok': 0.0, 'errmsg': str(error)}, name, request_id,
+                                                         self.connection_id, request_id)
+            for listener in self.listeners:
+                listener.failed(failed_event)
+            raise
+        succeeded_event = monitoring.CommandSucceededEvent(timedelta(seconds=time.perf_counter() - started),
+                                                           {'ok': 1.0}, name, request_id, self.connection_id,
+                                                           request_id)
+        for listener in self.listeners:
+            listener.succeeded(succeeded_event)
+        return result
+
+
+class MemoryCursor:
+    """
+    Cursor over the result of a query or pipeline, computed on first iteration.
+    :param:  produce: Callable[[], List[Dict]] - documents of the result.
+    :param:  output: Callable[[Dict], Any] - applies the codec options of the collection.
+    :param:  score: Callable[[Dict], float] - text score of a document, for $meta sorts.
+    :return: None.
+    :rtype: none.
+    """
+
+    def __init__(self, produce: Callable[[], List[Dict]], output: Callable[[Dict], Any],
+                 score: Callable[[Dict], float] = lambda document: 0) -> None:
+        self.__produce: Callable[[], List[Dict]] = produce
+        self.__output: Callable[[Dict], Any] = output
+        self.__score: Callable[[Dict], float] = score
+        self.__sort: List[Tuple[str, Any]] = []
+        self.__skip: int = 0
+        self.__limit: int = 0
+
+    def sort(self, key_or_list: Union[str, List, Dict], direction: Optional[int] = None) -> 'MemoryCursor':
+        self.__sort = _sort_keys(key_or_list, direction)
+        return self
+
+    def skip(self, skip: int) -> 'MemoryCursor':
+        self.__skip = skip
+        return self
+
+    def limit(self, limit: int) -> 'MemoryCursor':
+        self.__limit = limit
+        return self
+
+    def batch_size(self, batch_size: int) -> 'MemoryCursor':
+        return self
+
+    def __documents(self) -> List[Any]:
+        documents: List[Dict] = self.__produce()
+        if self.__sort:
+            documents = _sort(documents, self.__sort, self.__score)
+        documents = documents[self.__skip:]
+        if self.__limit:
+            documents = documents[:abs(self.__limit)]
+        return [self.__output(document) for document in documents]
+
+    async def to_list(self, length: Optional[int] = None) -> List[Any]:
+        documents: List[Any] = self.__documents()
+        return documents[:length] if length else documents
+
+    async def __aiter__(self) -> AsyncIterator[Any]:
+        for document in self.__documents():
+            yield document
+
+    def close(self) -> None:
+        pass
+
+
+class _Store:
+    """
+    Documents and indexes of a collection, shared by the handles returned by with_options.
+    unique maps the key of every document in each unique index to the document _id.
+    """
+
+    def __init__(self, validator: Optional[Dict] = None) -> None:
+        self.documents: Dict[Hashable, Dict] = {}
+        self.indexes: Dict[str, Dict] = {'_id_': {'v': 2, 'key': {'_id': 1}, 'name': '_id_'}}
+        self.unique: Dict[str, Dict[Hashable, Hashable]] = {}
+        self.validator: Optional[Dict] = validator
+
+
+class MemoryCollection:
+    """
+    Collection kept in a dict of documents by _id. Every operation runs to completion
+    inside the event loop, so single document writes are atomic as on a server.
+    :param:  name: str - collection name.
+    :param:  store: _Store - documents and indexes.
+    :param:  codec_options: CodecOptions - RawBSONDocument results when asked.
+    :param:  monitor: _Monitor - publishes the command events.
+    :return: None.
+    :rtype: none.
+    """
+
+    def __init__(self, name: str, store: Optional[_Store] = None,
+                 codec_options: CodecOptions = DEFAULT_CODEC_OPTIONS, read_preference: Any = None,
+                 monitor: Optional[_Monitor] = None) -> None:
+        self.__name: str = name
+        self.__store: _Store = store or _Store()
+        self.__codec_options: CodecOptions = codec_options
+        self.__read_preference: Any = read_preference
+        self.__monitor: _Monitor = monitor or _Monitor((), '')
+
+    @property
+    def name(self) -> str:
+        """Getter method for accessing the collection name.
+        Returns:
+            The name of the collection.
+        """
+        return self.__name
+
+    @property
+    def codec_options(self) -> CodecOptions:
+        """Getter method for accessing the codec options.
+        Returns:
+            The codec options of this handle.
+        """
+        return self.__codec_options
+
+    @property
+    def read_preference(self) -> Any:
+        """Getter method for accessing the read preference.
+        Returns:
+            The read preference of this handle; every read is served by the process.
+        """
+        return self.__read_preference
+
+    def with_options(self, codec_options: Optional[CodecOptions] = None, read_preference: Any = None,
+                     **kwargs: Any) -> 'MemoryCollection':
+        return MemoryCollection(self.__name, self.__store,
+                                codec_options or self.__codec_options,
+                                read_preference or self.__read_preference,
+                                self.__monitor)
+
+    def __command(self, name: str, function: Callable[[], Any]) -> Any:
+        return self.__monitor.run(name, self.__name, function)
+
+    def __output(self, document: Dict) -> Any:
+        if self.__codec_options.document_class is RawBSONDocument:
+            return RawBSONDocument(encode(document))
+        return document
+
+    def __text_fields(self) -> Dict[str, int]:
+        for index in self.__store.indexes.values():
+            if 'weights' in index:
+                return index['weights']
+        return {}
+
+    def __text_score(self, document: Dict, search: str) -> float:
+        fields: Dict[str, int] = self.__text_fields()
+        if not fields:
+            raise errors.OperationFailure("text index required for $text query", code=27)
+        terms = set(re.findall(r'\w+', search.lower()))
+        score: float = 0
+        for field, weight in fields.items():
+            for value in _candidates(document, field):
+                if isinstance(value, str):
+                    words: List[str] = re.findall(r'\w+', value.lower())
+                    score += weight * sum(1 for word in words if word in terms)
+        return score
+
+    def __select(self, query: Optional[Dict]) -> List[Dict]:
+        query = query or {}
+        if set(query) == {'_id'} and not isinstance(query['_id'], dict):
+            document: Optional[Dict] = self.__store.documents.get(_hashable(query['_id']))
+            return [document] if document is not None else []
+        return [document for document in self.__store.documents.values()
+                if _matches(document, query, self.__text_score)]
+
+    def __scorer(self, query: Optional[Dict]) -> Callable[[Dict], float]:
+        search: Optional[str] = (query or {}).get('$text', {}).get('$search')
+        if search is None:
+            return lambda document: 0
+        return lambda document: self.__text_score(document, search)
+
+    def find(self, filter: Optional[Dict] = None, projection: Optional[Union[Dict, List[str]]] = None,
+             skip: int = 0, limit: int = 0, sort: Optional[List] = None) -> MemoryCursor:
+        score: Callable[[Dict], float] = self.__scorer(filter)
+        cursor: MemoryCursor = MemoryCursor(lambda: self.__command('find', lambda: self.__select(filter)),
+                                            lambda document: self.__output(_project(document, projection,
+                                                                                    score(document))),
+                                            score)
+        if sort:
+            cursor.sort(sort)
+        return cursor.skip(skip).limit(limit)
+
+    async def find_one(self, filter: Optional[Any] = None, projection: Optional[Union[Dict, List[str]]] = None,
+                       sort: Optional[List] = None) -> Optional[Any]:
+        if filter is not None and not isinstance(filter, dict):
+            filter = {'_id': filter}
+        documents: List[Any] = await self.find(filter, projection, sort=sort).limit(1).to_list(length=1)
+        return documents[0] if documents else None
+
+    async def count_documents(self, filter: Dict, limit: Optional[int] = None, skip: int = 0) -> int:
+        # the driver counts with an aggregate command
+        count: int = max(len(self.__command('aggregate', lambda: self.__select(filter))) - skip, 0)
+        return min(count, limit) if limit else count
+
+    async def estimated_document_count(self) -> int:
+        return len(self.__store.documents)
+
+    @staticmethod
+    def __index_key(index: Dict, document: Dict) -> Hashable:
+        # a missing field is indexed as null
+        return tuple(_hashable(None if value is _MISSING else value)
+                     for value in (_get_path(document, field) for field in index['key']))
+
+    def __check_unique(self, document: Dict, own_id: Optional[Hashable] = None) -> None:
+        """
+        Raise DuplicateKeyError when another document holds the same key in a unique index.
+        :param own_id: _id of the document being replaced, which may keep its keys.
+        """
+        for name, keys in self.__store.unique.items():
+            index: Dict = self.__store.indexes[name]
+            holder: Optional[Hashable] = keys.get(self.__index_key(index, document))
+            if holder is not None and holder != own_id:
+                self.__duplicate(index, document)
+
+    def __register(self, document: Dict) -> None:
+        for name, keys in self.__store.unique.items():
+            keys[self.__index_key(self.__store.indexes[name], document)] = _hashable(document['_id'])
+
+    def __unregister(self, document: Dict) -> None:
+        for name, keys in self.__store.unique.items():
+            keys.pop(self.__index_key(self.__store.indexes[name], document), None)
+
+    def __duplicate(self, index: Dict, document: Dict) -> None:
+        key: Dict[str, Any] = {field: None if _get_path(document, field) is _MISSING else _get_path(document, field)
+                               for field in index['key']}
+        message: str = f"E11000 duplicate key error collection: {self.__name} index: {index['name']} " \
+                       f"dup key: {key}"
+        raise errors.DuplicateKeyError(message, DUPLICATE_KEY_CODE,
+                                       {'index': 0, 'code': DUPLICATE_KEY_CODE, 'errmsg': message,
+                                        'keyPattern': dict(index['key']), 'keyValue': key})
+
+    def __insert(self, document: Dict) -> Any:
+        if '_id' not in document:
+            # like pymongo, the generated _id is added to the caller's document
+            document['_id'] = ObjectId()
+        stored: Dict = _bson_dates(copy.deepcopy(document))
+        if _hashable(stored['_id']) in self.__store.documents:
+            self.__duplicate(self.__store.indexes['_id_'], stored)
+        self.__check_unique(stored)
+        self.__store.documents[_hashable(stored['_id'])] = stored
+        self.__register(stored)
+        return stored['_id']
+
+    def __update(self, document: Dict, update: Dict) -> bool:
+        """
+        Apply an update in place, leaving the document untouched when it fails.
+        :return: bool - whether the document changed.
+        """
+        updated: Dict = copy.deepcopy(document)
+        _apply_update(updated, update)
+        updated = _bson_dates(updated)
+        if updated == document:
+            return False
+        self.__check_unique(updated, _hashable(document['_id']))
+        self.__unregister(document)
+        document.clear()
+        document.update(updated)
+        self.__register(document)
+        return True
+
+    def __remove(self, document: Dict) -> None:
+        self.__unregister(document)
+        del self.__store.documents[_hashable(document['_id'])]
+
+    def __upsert(self, filter: Dict, update: Dict) -> Any:
+        document: Dict = {key: value for key, value in filter.items()
+                          if not key.startswith('$') and not isinstance(value, dict)}
+        document['_id'] = document.get('_id', ObjectId())
+        _apply_update(document, {operator: fields for operator, fields in update.items()
+                                 if operator != '$setOnInsert'})
+        for path, value in update.get('$setOnInsert', {}).items():
+            _set_path(document, path, copy.deepcopy(value))
+        return self.__insert(document)
+
+    async def insert_one(self, document: Dict, **kwargs: Any) -> InsertOneResult:
+        return InsertOneResult(self.__command('insert', lambda: self.__insert(document)), True)
+
+    async def insert_many(self, documents: List[Dict], **kwargs: Any) -> InsertManyResult:
+        return InsertManyResult(self.__command('insert', lambda: [self.__insert(document) for document in documents]),
+                                True)
+
+    async def update_one(self, filter: Dict, update: Dict, upsert: bool = False, **kwargs: Any) -> UpdateResult:
+        return UpdateResult(self.__command('update', lambda: self.__update_documents(filter, update, upsert, False)),
+                            True)
+
+    async def update_many(self, filter: Dict, update: Dict, upsert: bool = False, **kwargs: Any) -> UpdateResult:
+        return UpdateResult(self.__command('update', lambda: self.__update_documents(filter, update, upsert, True)),
+                            True)
+
+    def __update_documents(self, filter: Dict, update: Dict, upsert: bool, many: bool) -> Dict:
+        documents: List[Dict] = self.__select(filter)
+        if not many:
+            documents = documents[:1]
+        if not documents and upsert:
+            return {'n': 1, 'nModified': 0, 'upserted': self.__upsert(filter, update), 'ok': 1.0}
+        modified: int = sum(self.__update(document, update) for document in documents)
+        return {'n': len(documents), 'nModified': modified, 'ok': 1.0}
+
+    async def delete_one(self, filter: Dict, **kwargs: Any) -> DeleteResult:
+        return DeleteResult({'n': self.__command('delete', lambda: self.__delete(filter, False)), 'ok': 1.0}, True)
+
+    async def delete_many(self, filter: Dict, **kwargs: Any) -> DeleteResult:
+        return DeleteResult({'n': self.__command('delete', lambda: self.__delete(filter, True)), 'ok': 1.0}, True)
+
+    def __delete(self, filter: Dict, many: bool) -> int:
+        documents: List[Dict] = self.__select(filter)
+        if not many:
+            documents = documents[:1]
+        for document in documents:
+            self.__remove(document)
+        return len(documents)
+
+    async def find_one_and_update(self, filter: Dict, update: Dict, projection: Optional[Dict] = None,
+                                  sort: Optional[List] = None, upsert: bool = False,
+                                  return_document: bool = ReturnDocument.BEFORE, **kwargs: Any) -> Optional[Any]:
+        return self.__command('findAndModify', lambda: self.__find_one_and_update(filter, update, projection, sort,
+                                                                                 upsert, return_document))
+
+    def __find_one_and_update(self, filter: Dict, update: Dict, projection: Optional[Dict], sort: Optional[List],
+                              upsert: bool, return_document: bool) -> Optional[Any]:
+        documents: List[Dict] = self.__select(filter)
+        if sort:
+            documents = _sort(documents, _sort_keys(sort), self.__scorer(filter))
+        if not documents:
+            if not upsert:
+                return None
+            _id: Any = self.__upsert(filter, update)
+            if return_document == ReturnDocument.BEFORE:
+                return None
+            return self.__output(_project(self.__store.documents[_hashable(_id)], projection))
+        document: Dict = documents[0]
+        before: Dict = _project(document, projection)
+        self.__update(document, update)
+        if return_document == ReturnDocument.BEFORE:
+            return self.__output(before)
+        return self.__output(_project(document, projection))
+
+    async def find_one_and_delete(self, filter: Dict, projection: Optional[Dict] = None,
+                                  sort: Optional[List] = None, **kwargs: Any) -> Optional[Any]:
+        return self.__command('findAndModify', lambda: self.__find_one_and_delete(filter, projection, sort))
+
+    def __find_one_and_delete(self, filter: Dict, projection: Optional[Dict], sort: Optional[List]) -> Optional[Any]:
+        documents: List[Dict] = self.__select(filter)
+        if sort:
+            documents = _sort(documents, _sort_keys(sort), self.__scorer(filter))
+        if not documents:
+            return None
+        self.__remove(documents[0])
+        return self.__output(_project(documents[0], projection))
+
+    async def bulk_write(self, requests: List[Any], ordered: bool = True, **kwargs: Any) -> BulkWriteResult:
+        kinds: Set[str] = {'insert' if isinstance(request, InsertOne)
+                          else 'delete' if isinstance(request, (DeleteOne, DeleteMany)) else 'update'
+                          for request in requests}
+        return self.__command(kinds.pop() if len(kinds) == 1 else 'bulkWrite',
+                              lambda: self.__bulk_write(requests, ordered))
+
+    def __bulk_write(self, requests: List[Any], ordered: bool) -> BulkWriteResult:
+        result: Dict[str, Any] = {'writeErrors': [], 'writeConcernErrors': [], 'nInserted': 0, 'nUpserted': 0,
+                                  'nMatched': 0, 'nModified': 0, 'nRemoved': 0, 'upserted': []}
+        for index, request in enumerate(requests):
+            try:
+                if isinstance(request, InsertOne):
+                    self.__insert(request._doc)
+                    result['nInserted'] += 1
+                elif isinstance(request, (UpdateOne, UpdateMany)):
+                    raw: Dict = self.__update_documents(request._filter, request._doc, bool(request._upsert),
+                                                        many=isinstance(request, UpdateMany))
+                    if 'upserted' in raw:
+                        result['nUpserted'] += 1
+                        result['upserted'].append({'index': index, '_id': raw['upserted']})
+                    else:
+                        result['nMatched'] += raw['n']
+                        result['nModified'] += raw['nModified']
+                elif isinstance(request, (DeleteOne, DeleteMany)):
+                    result['nRemoved'] += self.__delete(request._filter, many=isinstance(request, DeleteMany))
+                else:
+                    raise TypeError(f"{request!r} is not a valid request")
+            except errors.OperationFailure as error:
+                result['writeErrors'].append({'index': index, 'code': error.code, 'errmsg': str(error),
+                                              'op': getattr(request, '_doc', None)})
+                if ordered:
+                    break
+        if result['writeErrors']:
+            raise errors.BulkWriteError(result)
+        return BulkWriteResult(result, True)
+
+    def aggregate(self, pipeline: List[Dict], **kwargs: Any) -> MemoryCursor:
+        return MemoryCursor(lambda: self.__command('aggregate', lambda: self.__pipeline(pipeline)), self.__output)
+
+    def __pipeline(self, pipeline: List[Dict]) -> List[Dict]:
+        documents: List[Dict] = [copy.deepcopy(document) for document in self.__store.documents.values()]
+        for stage in pipeline:
+            (name, argument), = stage.items()
+            if name == '$match':
+                documents = [document for document in documents
+                             if _matches(document, argument, self.__text_score)]
+            elif name == '$project':
+                documents = [self.__project_stage(document, argument) for document in documents]
+            elif name in ('$addFields', '$set'):
+                for document in documents:
+                    for path, expression in argument.items():
+                        _set_path(document, path, _evaluate(expression, document, {}))
+            elif name == '$unset':
+                for document in documents:
+                    for path in [argument] if isinstance(argument, str) else argument:
+                        _unset_path(document, path)
+            elif name == '$unwind':
+                documents = self.__unwind_stage(documents, argument)
+            elif name == '$group':
+                documents = self.__group_stage(documents, argument)
+            elif name == '$sort':
+                documents = _sort(documents, _sort_keys(argument), lambda document: 0)
+            elif name == '$skip':
+                documents = documents[argument:]
+            elif name == '$limit':
+                documents = documents[:argument]
+            elif name == '$count':
+                documents = [{argument: len(documents)}] if documents else []
+            else:
+                raise errors.OperationFailure(f"Unrecognized pipeline stage name: '{name}'",
+                                              code=UNRECOGNIZED_STAGE_CODE)
+        return documents
+
+    @staticmethod
+    def __project_stage(document: Dict, specification: Dict) -> Dict:
+        # numbers and booleans include or exclude a field, anything else is an expression
+        flags: Dict = {key: value for key, value in specification.items() if isinstance(value, (bool, int))}
+        computed: Dict = {key: value for key, value in specification.items() if key not in flags}
+        if not computed and not any(value for key, value in flags.items() if key != '_id'):
+            return _project(document, specification)
+        projected: Dict = {}
+        if flags.get('_id', True) and '_id' not in computed and '_id' in document:
+            projected['_id'] = document['_id']
+        projected.update(_include(document, _project_tree(key for key, value in flags.items()
+                                                          if value and key != '_id')))
+        for key, expression in computed.items():
+            _set_path(projected, key, _evaluate(expression, document, {}))
+        return projected
+
+    @staticmethod
+    def __unwind_stage(documents: List[Dict], argument: Union[str, Dict]) -> List[Dict]:
+        path: str = (argument if isinstance(argument, str) else argument['path'])[1:]
+        preserve: bool = isinstance(argument, dict) and argument.get('preserveNullAndEmptyArrays', False)
+        unwound: List[Dict] = []
+        for document in documents:
+            values: Any = _get_path(document, path)
+            if isinstance(values, list) and values:
+                for value in values:
+                    element: Dict = copy.deepcopy(document)
+                    _set_path(element, path, value)
+                    unwound.append(element)
+            elif isinstance(values, list) or values is _MISSING or values is None:
+                if preserve:
+                    unwound.append(document)
+            else:
+                unwound.append(document)
+        return unwound
+
+    @staticmethod
+    def __group_stage(documents: List[Dict], specification: Dict) -> List[Dict]:
+        groups: Dict[Hashable, Tuple[Any, List[Dict]]] = {}
+        for document in documents:
+            key: Any = _evaluate(specification['_id'], document, {})
+            groups.setdefault(_hashable(key), (key, []))[1].append(document)
+        grouped: List[Dict] = []
+        for key, members in groups.values():
+            group: Dict = {'_id': key}
+            for field, accumulator in specification.items():
+                if field == '_id':
+                    continue
+                (operator, expression), = accumulator.items()
+                group[field] = _accumulate(operator, [_evaluate(expression, member, {}) for member in members])
+            grouped.append(group)
+        return grouped
+
+    async def create_indexes(self, indexes: List[IndexModel], **kwargs: Any) -> List[str]:
+        return self.__command('createIndexes', lambda: self.__create_indexes(indexes))
+
+    def __create_indexes(self, indexes: List[IndexModel]) -> List[str]:
+        names: List[str] = []
+        for model in indexes:
+            index: Dict = {'v': 2, **model.document}
+            index['key'] = dict(index['key'])
+            text_fields: List[str] = [field for field, direction in index['key'].items() if direction == TEXT]
+            if text_fields:
+                index['weights'] = {field: index.get('weights', {}).get(field, 1) for field in text_fields}
+            if index.get('unique') and index['name'] not in self.__store.unique:
+                keys: Dict[Hashable, Hashable] = {}
+                for document in self.__store.documents.values():
+                    key: Hashable = self.__index_key(index, document)
+                    if key in keys:
+                        self.__duplicate(index, document)
+                    keys[key] = _hashable(document['_id'])
+                self.__store.unique[index['name']] = keys
+            self.__store.indexes[index['name']] = index
+            names.append(index['name'])
+        return names
+
+    async def create_index(self, keys: Union[str, List], **kwargs: Any) -> str:
+        return (await self.create_indexes([IndexModel(keys, **kwargs)]))[0]
+
+    def list_indexes(self) -> MemoryCursor:
+        return MemoryCursor(lambda: self.__command('listIndexes', lambda: [copy.deepcopy(index) for index
+                                                                           in self.__store.indexes.values()]),
+                            lambda document: document)
+
+    async def index_information(self) -> Dict[str, Dict]:
+        return {name: {**index, 'key': list(index['key'].items())} for name, index in self.__store.indexes.items()}
+
+    async def drop_index(self, index_or_name: str, **kwargs: Any) -> None:
+        if index_or_name == '_id_' or index_or_name not in self.__store.indexes:
+            raise errors.OperationFailure(f"index not found with name [{index_or_name}]", code=27)
+        del self.__store.indexes[index_or_name]
+        self.__store.unique.pop(index_or_name, None)
+
+    async def drop(self) -> None:
+        self.__store.documents.clear()
+        self.__store.indexes = {'_id_': self.__store.indexes['_id_']}
+        self.__store.unique = {}
+
+    def watch(self, *args: Any, **kwargs: Any) -> None:
+        raise errors.OperationFailure("The $changeStream stage is only supported on replica sets",
+                                      code=CHANGE_STREAMS_UNSUPPORTED_CODE)
+
+
+class MemoryDatabase:
+    """
+    Named set of MemoryCollections.
+    :param:  name: str - database name.
+    :return: None.
+    :rtype: none.
+    """
+
+    def __init__(self, name: str, event_listeners: Sequence[monitoring.CommandListener] = ()) -> None:
+        self.__name: str = name
+        self.__collections: Dict[str, MemoryCollection] = {}
+        self.__monitor: _Monitor = _Monitor(event_listeners, name)
+
+    @property
+    def name(self) -> str:
+        """Getter method for accessing the database name.
+        Returns:
+            The name of the database.
+        """
+        return self.__name
+
+    def __getitem__(self, name: str) -> MemoryCollection:
+        if name not in self.__collections:
+            self.__collections[name] = MemoryCollection(name, monitor=self.__monitor)
+        return self.__collections[name]
+
+    def get_collection(self, name: str, **kwargs: Any) -> MemoryCollection:
+        return self[name].with_options(**kwargs)
+
+    async def list_collection_names(self, **kwargs: Any) -> List[str]:
+        return self.__monitor.run('listCollections', '', lambda: list(self.__collections))
+
+    async def create_collection(self, name: str, check_exists: bool = True, validator: Optional[Dict] = None,
+                                **kwargs: Any) -> MemoryCollection:
+        if name in self.__collections:
+            if check_exists:
+                raise errors.CollectionInvalid(f"collection {name} already exists")
+            return self.__collections[name]
+        # the validator is kept for reference only, documents are not validated
+        self.__collections[name] = self.__monitor.run('create', name,
+                                                      lambda: MemoryCollection(name, _Store(validator),
+                                                                               monitor=self.__monitor))
+        return self.__collections[name]
+
+    async def drop_collection(self, name: str, **kwargs: Any) -> None:
+        self.__collections.pop(name, None)
+
+    async def command(self, command: Union[str, Dict], **kwargs: Any) -> Dict:
+        name: str = command if isinstance(command, str) else next(iter(command))
+        return self.__monitor.run(name, '', lambda: self.__command(name))
+
+    @staticmethod
+    def __command(name: str) -> Dict:
+        if name in ('ping', 'hello', 'isMaster', 'ismaster'):
+            return {'ok': 1.0}
+        raise errors.OperationFailure(f"no such command: '{name}'", code=59)
+
+
+class MemoryClient:
+    """
+    Stand-in for AsyncIOMotorClient: databases live in this object.
+    :param:  event_listeners: Sequence[CommandListener] - notified of every command, as with the driver.
+    :return: None.
+    :rtype: none.
+    """
+
+    def __init__(self, event_listeners: Sequence[monitoring.CommandListener] = ()) -> None:
+        self.__databases: Dict[str, MemoryDatabase] = {}
+        self.__event_listeners: Sequence[monitoring.CommandListener] = event_listeners
+
+    def __getitem__(self, name: str) -> MemoryDatabase:
+        if name not in self.__databases:
+            self.__databases[name] = MemoryDatabase(name, self.__event_listeners)
+        return self.__databases[name]
+
+    def get_database(self, name: str, **kwargs: Any) -> MemoryDatabase:
+        return self[name]
+
+    @property
+    def admin(self) -> MemoryDatabase:
+        """Getter method for accessing the admin database.
+        Returns:
+            The admin MemoryDatabase.
+        """
+        return self['admin']
+
+    async def list_database_names(self) -> List[str]:
+        return list(self.__databases)
+
+    async def drop_database(self, name: str) -> None:
+        self.__databases.pop(name, None)
+
+    def close(self) -> None:
+        pass
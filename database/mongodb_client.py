@@ -2,7 +2,10 @@
 Create mongoDB Atlas client
 """
 from typing import Union
-from pymongo.mongo_client import MongoClient
+from motor.motor_asyncio import AsyncIOMotorClient
+from .settings import DatabaseSettings
+from .memory_client import MemoryClient
+from .monitoring import command_counter, pool_monitor
 
 
 class DatabaseConnectionError(Exception):
@@ -18,37 +21,72 @@ class DatabaseConnectionError(Exception):
 
 class MongoDBClient:
     """
-    Initialize connection with mongodb database.
-    :param:  conn_string: str - database param to connection.
+    Initialize an asyncio connection with mongodb database.
+    Nothing is done at construction: the AsyncIOMotorClient (and the DNS lookup of
+    a mongodb+srv:// string) is created on first access, from the application lifespan.
+    With settings.backend == 'memory' the client is the in-process MemoryClient instead.
+    :param:  settings: DatabaseSettings - connection string, pool, timeouts and read preference.
     :return: None.
     :rtype: none.
     """
 
-    def __init__(self, conn_string: str) -> None:
-        self.__conn_string: str = conn_string
-        self.__client: Union[MongoClient, None] = self.__create_conn()
-        if self.__client is None:
-            raise DatabaseConnectionError("Failed to connect to the database.")
+    def __init__(self, settings: DatabaseSettings) -> None:
+        self.__settings: DatabaseSettings = settings
+        self.__client: Union[AsyncIOMotorClient, MemoryClient, None] = None
+
+    @property
+    def settings(self) -> DatabaseSettings:
+        """Getter method for accessing the connection settings.
+        Returns:
+            The DatabaseSettings the client is created with.
+        """
+        return self.__settings
 
     @property
-    def client(self):
-        """Getter method for accessing the MongoClient instance.
+    def client(self) -> Union[AsyncIOMotorClient, MemoryClient]:
+        """Getter method for accessing the AsyncIOMotorClient instance.
         Returns:
-            The current value of the client attribute.
+            The current value of the client attribute, created on first access.
         """
+        if self.__client is None:
+            self.__client = self.__create_conn()
+            if self.__client is None:
+                raise DatabaseConnectionError("Failed to connect to the database.")
         return self.__client
 
-    def __create_conn(self) -> Union[MongoClient, None]:
+    def close(self) -> None:
+        """
+        Close the client if it was ever created.
+        :return: None.
+        """
+        if self.__client is not None:
+            self.__client.close()
+
+    def __create_conn(self) -> Union[AsyncIOMotorClient, MemoryClient, None]:
         """
-        Return a MongoClient instance to initialize the database connection.
-        :return: MongoClient instance or None.
-        :rtype: MongoClient or None
+        Return an AsyncIOMotorClient instance. The driver connects lazily, so no network
+        round-trip happens here; call ping() from the running event loop to check the deployment.
+        :return: AsyncIOMotorClient instance, MemoryClient instance or None.
+        :rtype: AsyncIOMotorClient, MemoryClient or None
         """
-        client: MongoClient = MongoClient(self.__conn_string)
+        if self.__settings.backend == 'memory':
+            return MemoryClient(event_listeners=[command_counter])
         try:
-            client.admin.command('ping')
-            print("Pinged your deployment. You successfully connected to MongoDB!")
-            return client
+            return AsyncIOMotorClient(self.__settings.uri, event_listeners=[command_counter, pool_monitor],
+                                      **self.__settings.client_options())
         except Exception as error:
             print(error)
             return None
+
+    async def ping(self) -> None:
+        """
+        Ping the deployment without blocking the event loop.
+        :return: None.
+        :raises: DatabaseConnectionError if the deployment is unreachable.
+        """
+        try:
+            await self.client.admin.command('ping')
+            print("Pinged your deployment. You successfully connected to MongoDB!")
+        except Exception as error:
+            print(error)
+            raise DatabaseConnectionError("Failed to connect to the database.")
@@ -1,12 +1,15 @@
 """
 Initialize mongodb database collections.
 """
-from typing import List
-from pymongo.collection import Collection
-from pymongo.database import Database
+from typing import Dict, List
+from motor.motor_asyncio import AsyncIOMotorCollection, AsyncIOMotorDatabase
+from .mongodb_database import MongoDBDatabase
 from schemas import \
     create_clients_collection,\
     create_products_collection,\
+    create_products_search_index,\
+    update_products_validator,\
+    update_clients_validator,\
     create_orders_collection,\
     create_users_collection
 
@@ -14,100 +17,131 @@ from schemas import \
 class MongoDBCollections:
     """
     Initialize mongodb database collections.
-    :param:  conn_string: str - database param to connection.
-    :param:  database_name: List - collections names.
+    Collection handles are created on first access, so importing this module never
+    touches the network; bootstrap() must be awaited once from the event loop to
+    create the missing collections with their validators.
+    :param:  mongodb_database: MongoDBDatabase - mongodb database.
     :return: None.
     :rtype: none.
     """
 
-    def __init__(self, database: Database) -> None:
-        self.__database = database
-        self.__collections_names_created: List[str] = self.__database.list_collection_names()
-        self.__clients_collection = self.__set_collection_clients()
-        self.__products_collection = self.__set_collection_products()
-        self.__orders_collection = self.__set_collection_orders()
-        self.__users_collection = self.__set_collection_users()
+    def __init__(self, mongodb_database: MongoDBDatabase) -> None:
+        self.__mongodb_database: MongoDBDatabase = mongodb_database
+        self.__collections_names_created: List[str] = []
+        self.__collections: Dict[str, AsyncIOMotorCollection] = {}
 
     @property
-    def clients(self):
+    def __database(self) -> AsyncIOMotorDatabase:
+        return self.__mongodb_database.database
+
+    def __collection(self, name: str) -> AsyncIOMotorCollection:
+        if name not in self.__collections:
+            self.__collections[name] = self.__database[name]
+        return self.__collections[name]
+
+    @property
+    def clients(self) -> AsyncIOMotorCollection:
         """Getter method for accessing the clients' collection.
         Returns:
             The current value of the clients collection attribute.
         """
-        return self.__clients_collection
+        return self.__collection('clients')
 
     @property
-    def products(self):
+    def products(self) -> AsyncIOMotorCollection:
         """Getter method for accessing the products' collection.
         Returns:
             The current value of the products collection attribute.
         """
-        return self.__products_collection
+        return self.__collection('products')
 
     @property
-    def orders(self):
+    def orders(self) -> AsyncIOMotorCollection:
         """Getter method for accessing the orders' collection.
         Returns:
             The current value of the orders collection attribute.
         """
-        return self.__orders_collection
+        return self.__collection('orders')
 
     @property
-    def users(self):
+    def users(self) -> AsyncIOMotorCollection:
         """Getter method for accessing the users' collection.
         Returns:
             The current value of the users collection attribute.
         """
-        return self.__users_collection
+        return self.__collection('users')
+
+    async def bootstrap(self) -> None:
+        """Create the collections that do not exist yet.
+        Returns: None
+        """
+        self.__collections_names_created = await self.__database.list_collection_names()
+        self.__collections['clients'] = await self.__set_collection_clients()
+        self.__collections['products'] = await self.__set_collection_products()
+        self.__collections['orders'] = await self.__set_collection_orders()
+        self.__collections['users'] = await self.__set_collection_users()
 
-    def __set_collection_clients(self) -> Collection:
+    async def __set_collection_clients(self) -> AsyncIOMotorCollection:
         """Private method for setting collections.
-            Returns: None
+            Returns: AsyncIOMotorCollection
         """
         if 'clients' not in self.__collections_names_created:
             try:
-                clients = create_clients_collection(self.__database)
+                clients = await create_clients_collection(self.__database)
                 return clients
             except Exception as error:
                 print(error)
         else:
-            return self.__database['clients']
+            # created by an earlier version: bring its validator up to date
+            try:
+                await update_clients_validator(self.__database)
+            except Exception as error:
+                print(error)
+        return self.__database['clients']
 
-    def __set_collection_products(self) -> Collection:
+    async def __set_collection_products(self) -> AsyncIOMotorCollection:
         """Private method for setting collections.
-        Returns: None
+        Returns: AsyncIOMotorCollection
         """
         if 'products' not in self.__collections_names_created:
             try:
-                products = create_products_collection(self.__database)
+                products = await create_products_collection(self.__database)
                 return products
             except Exception as error:
                 print(error)
         else:
-            return self.__database['products']
+            # created by an earlier version: bring its validator up to date
+            try:
+                await update_products_validator(self.__database)
+            except Exception as error:
+                print(error)
+        products: AsyncIOMotorCollection = self.__database['products']
+        try:
+            await create_products_search_index(products)
+        except Exception as error:
+            print(error)
+        return products
 
-    def __set_collection_orders(self) -> Collection:
+    async def __set_collection_orders(self) -> AsyncIOMotorCollection:
         """Private method for setting collections.
-        Returns: None
+        Returns: AsyncIOMotorCollection
         """
         if 'orders' not in self.__collections_names_created:
             try:
-                orders = create_orders_collection(self.__database)
+                orders = await create_orders_collection(self.__database)
                 return orders
             except Exception as error:
                 print(error)
-        else:
-            return self.__database['orders']
+        return self.__database['orders']
 
-    def __set_collection_users(self) -> Collection:
+    async def __set_collection_users(self) -> AsyncIOMotorCollection:
         """Private method for setting collections.
-            Returns: None
+            Returns: AsyncIOMotorCollection
         """
         if 'users' not in self.__collections_names_created:
             try:
-                users = create_users_collection(self.__database)
+                users = await create_users_collection(self.__database)
                 return users
             except Exception as error:
                 print(error)
-        else:
-            return self.__database['users']
+        return self.__database['users']
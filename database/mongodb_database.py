@@ -2,28 +2,27 @@
 Gives a mongoDB Atlas database
 """
 
-from pymongo.database import Database
-from pymongo.mongo_client import MongoClient
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from .mongodb_client import MongoDBClient
 
 
 class MongoDBDatabase:
     """
-    Initialize a mongodb database.
-    :param:  client: MongoClient - mongodb client.
+    Initialize a mongodb database, resolved from the client on first access.
+    :param:  client: MongoDBClient - mongodb client.
     :param:  database_name: str - database name.
     :return: None.
     :rtype: none.
     """
 
-    def __init__(self, client: MongoClient, database_name: str) -> None:
-        self.__client: MongoClient = client
+    def __init__(self, client: MongoDBClient, database_name: str) -> None:
+        self.__client: MongoDBClient = client
         self.__database_name: str = database_name
-        self.__database: Database = self.__client[self.__database_name]
 
     @property
-    def database(self) -> Database:
+    def database(self) -> AsyncIOMotorDatabase:
         """Getter method for accessing the database attribute.
         Returns:
-            The current value of the database attribute.
+            The database of the current client.
         """
-        return self.__database
+        return self.__client.client[self.__database_name]
@@ -0,0 +1,206 @@
+"""
+Attribute the database commands to the request that sent them, and follow the connection pools
+"""
+import time
+from contextvars import ContextVar
+from threading import Lock, local
+from typing import Dict, List, Optional, Tuple
+from pymongo import monitoring
+
+
+class RequestCommands:
+    """
+    Commands sent while serving one request. Motor runs the driver in executor threads
+    with a copy of the request context, so the listener finds this object there.
+    :return: None.
+    :rtype: none.
+    """
+
+    def __init__(self) -> None:
+        self.__commands: List[Tuple[str, str, float, bool]] = []
+
+    @property
+    def count(self) -> int:
+        """Getter method for accessing the number of commands.
+        Returns:
+            How many commands the request sent so far.
+        """
+        return len(self.__commands)
+
+    @property
+    def duration_ms(self) -> float:
+        """Getter method for accessing the time spent in commands.
+        Returns:
+            Sum of the command durations, in milliseconds.
+        """
+        return sum(duration for _, _, duration, _ in self.__commands)
+
+    @property
+    def breakdown(self) -> Dict[str, Dict[str, float]]:
+        """Getter method for accessing the commands grouped by name and collection.
+        Returns:
+            {'find products': {'count': 2, 'ms': 1.3, 'failed': 0}, ...} in order of first use.
+        """
+        grouped: Dict[str, Dict[str, float]] = {}
+        for name, collection, duration, failed in self.__commands:
+            entry: Dict[str, float] = grouped.setdefault(f'{name} {collection}'.strip(),
+                                                         {'count': 0, 'ms': 0.0, 'failed': 0})
+            entry['count'] += 1
+            entry['ms'] = round(entry['ms'] + duration, 3)
+            entry['failed'] += failed
+        return grouped
+
+    def add(self, name: str, collection: str, duration_ms: float, failed: bool = False) -> None:
+        """
+        Record a finished command. list.append is atomic, so executor threads can call it.
+        :param name: str - command name, e.g. find.
+        :param collection: str - target collection, empty for database commands.
+        :param duration_ms: float
+        :param failed: bool
+        :return: None
+        """
+        self.__commands.append((name, collection, duration_ms, failed))
+
+
+current_commands: ContextVar[Optional[RequestCommands]] = ContextVar('current_commands', default=None)
+
+
+class CommandCounter(monitoring.CommandListener):
+    """
+    Driver listener that adds every command to the RequestCommands of the current
+    request, and keeps process-wide counts per command name.
+    :return: None.
+    :rtype: none.
+    """
+
+    def __init__(self) -> None:
+        self.__pending: Dict[Tuple, Tuple[Optional[RequestCommands], str]] = {}
+        self.__totals: Dict[str, int] = {}
+        self.__lock: Lock = Lock()
+
+    @property
+    def totals(self) -> Dict[str, int]:
+        """Getter method for accessing the process-wide counts.
+        Returns:
+            Number of commands per command name since the start.
+        """
+        with self.__lock:
+            return dict(self.__totals)
+
+    def started(self, event: monitoring.CommandStartedEvent) -> None:
+        target = event.command.get(event.command_name)
+        if event.command_name == 'getMore':
+            target = event.command.get('collection')
+        collection: str = target if isinstance(target, str) else ''
+        self.__pending[(event.connection_id, event.request_id)] = (current_commands.get(), collection)
+
+    def succeeded(self, event: monitoring.CommandSucceededEvent) -> None:
+        self.__finish(event, False)
+
+    def failed(self, event: monitoring.CommandFailedEvent) -> None:
+        self.__finish(event, True)
+
+    def __finish(self, event, failed: bool) -> None:
+        commands, collection = self.__pending.pop((event.connection_id, event.request_id), (None, ''))
+        with self.__lock:
+            self.__totals[event.command_name] = self.__totals.get(event.command_name, 0) + 1
+        if commands is not None:
+            commands.add(event.command_name, collection, event.duration_micros / 1000, failed)
+
+
+command_counter: CommandCounter = CommandCounter()
+
+
+class PoolMonitor(monitoring.ConnectionPoolListener):
+    """
+    Driver listener that follows the connection pool of every server: open and
+    checked out connections, checkouts, failed checkouts and the time spent waiting
+    for a connection. A check out starts and ends in the same thread, so the wait is
+    measured with a thread local clock.
+    :return: None.
+    :rtype: none.
+    """
+
+    def __init__(self) -> None:
+        self.__pools: Dict[str, Dict] = {}
+        self.__lock: Lock = Lock()
+        self.__local: local = local()
+
+    @property
+    def stats(self) -> Dict[str, Dict]:
+        """Getter method for accessing the counters of every pool.
+        Returns:
+            Per 'host:port': open, checked_out, checkouts, checkout_failures per reason,
+            clears, wait_count, wait_ms_sum and wait_ms_max.
+        """
+        with self.__lock:
+            return {address: {**pool, 'checkout_failures': dict(pool['checkout_failures'])}
+                    for address, pool in sorted(self.__pools.items())}
+
+    def pool_created(self, event: monitoring.PoolCreatedEvent) -> None:
+        self.__update(event.address)
+
+    def pool_ready(self, event: monitoring.PoolReadyEvent) -> None:
+        pass
+
+    def pool_cleared(self, event: monitoring.PoolClearedEvent) -> None:
+        self.__update(event.address, clears=1)
+
+    def pool_closed(self, event: monitoring.PoolClosedEvent) -> None:
+        pass
+
+    def connection_created(self, event: monitoring.ConnectionCreatedEvent) -> None:
+        self.__update(event.address, open=1)
+
+    def connection_ready(self, event: monitoring.ConnectionReadyEvent) -> None:
+        pass
+
+    def connection_closed(self, event: monitoring.ConnectionClosedEvent) -> None:
+        self.__update(event.address, open=-1)
+
+    def connection_check_out_started(self, event: monitoring.ConnectionCheckOutStartedEvent) -> None:
+        self.__local.started = time.perf_counter()
+
+    def connection_check_out_failed(self, event: monitoring.ConnectionCheckOutFailedEvent) -> None:
+        wait_ms: float = self.__wait_ms()
+        with self.__lock:
+            pool: Dict = self.__pool(event.address)
+            pool['checkout_failures'][event.reason] = pool['checkout_failures'].get(event.reason, 0) + 1
+            self.__add_wait(pool, wait_ms)
+
+    def connection_checked_out(self, event: monitoring.ConnectionCheckedOutEvent) -> None:
+        wait_ms: float = self.__wait_ms()
+        with self.__lock:
+            pool: Dict = self.__pool(event.address)
+            pool['checkouts'] += 1
+            pool['checked_out'] += 1
+            self.__add_wait(pool, wait_ms)
+
+    def connection_checked_in(self, event: monitoring.ConnectionCheckedInEvent) -> None:
+        self.__update(event.address, checked_out=-1)
+
+    def __wait_ms(self) -> float:
+        started: Optional[float] = getattr(self.__local, 'started', None)
+        self.__local.started = None
+        return (time.perf_counter() - started) * 1000 if started is not None else 0.0
+
+    def __pool(self, address: Tuple[str, int]) -> Dict:
+        # callers hold the lock
+        return self.__pools.setdefault(f'{address[0]}:{address[1]}',
+                                       {'open': 0, 'checked_out': 0, 'checkouts': 0, 'checkout_failures': {},
+                                        'clears': 0, 'wait_count': 0, 'wait_ms_sum': 0.0, 'wait_ms_max': 0.0})
+
+    @staticmethod
+    def __add_wait(pool: Dict, wait_ms: float) -> None:
+        pool['wait_count'] += 1
+        pool['wait_ms_sum'] += wait_ms
+        pool['wait_ms_max'] = max(pool['wait_ms_max'], wait_ms)
+
+    def __update(self, address: Tuple[str, int], **deltas: int) -> None:
+        with self.__lock:
+            pool: Dict = self.__pool(address)
+            for key, delta in deltas.items():
+                pool[key] += delta
+
+
+pool_monitor: PoolMonitor = PoolMonitor()
@@ -0,0 +1,125 @@
+"""
+Database connection settings
+"""
+import os
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+from pymongo.read_preferences import Primary, PrimaryPreferred, Secondary, SecondaryPreferred, Nearest, \
+    _ServerMode
+from dotenv import load_dotenv, find_dotenv
+
+load_dotenv(find_dotenv())
+
+# 'mongodb' connects to uri; 'memory' runs on the in-process stand-in of database/memory_client.py
+BACKENDS = ('mongodb', 'memory')
+
+READ_PREFERENCES = {
+    'primary': Primary,
+    'primaryPreferred': PrimaryPreferred,
+    'secondary': Secondary,
+    'secondaryPreferred': SecondaryPreferred,
+    'nearest': Nearest,
+}
+
+
+def _int_or_none(name: str) -> Optional[int]:
+    value: Optional[str] = os.environ.get(name)
+    return int(value) if value else None
+
+
+@dataclass(frozen=True)
+class DatabaseSettings:
+    """
+    Options of the mongodb client. Every field can be set from the environment, see from_env().
+    Timeouts are in milliseconds; None keeps the driver default.
+    """
+    uri: str
+    backend: str = 'mongodb'
+    max_pool_size: int = 100
+    min_pool_size: int = 0
+    max_idle_time_ms: Optional[int] = None
+    server_selection_timeout_ms: int = 30000
+    connect_timeout_ms: int = 20000
+    socket_timeout_ms: Optional[int] = None
+    wait_queue_timeout_ms: Optional[int] = None
+    # zstd needs the zstandard package and snappy needs python-snappy; zlib is built in
+    compressors: List[str] = field(default_factory=list)
+    read_preference: str = 'primary'
+    # listings and statistics can opt in to secondaries, e.g. 'secondaryPreferred', if they tolerate
+    # slightly stale data; pages read from a secondary are not kept in the products cache
+    listing_read_preference: str = 'primary'
+    max_staleness_seconds: int = -1
+    app_name: Optional[str] = None
+
+    def __post_init__(self) -> None:
+        if self.backend not in BACKENDS:
+            raise ValueError(f"unknown database backend '{self.backend}', expected one of {list(BACKENDS)}")
+        for name in (self.read_preference, self.listing_read_preference):
+            if name not in READ_PREFERENCES:
+                raise ValueError(f"unknown read preference '{name}', expected one of {list(READ_PREFERENCES)}")
+        if self.min_pool_size > self.max_pool_size > 0:
+            raise ValueError("min_pool_size cannot be greater than max_pool_size")
+
+    @classmethod
+    def from_env(cls) -> 'DatabaseSettings':
+        """
+        Read the settings from DATABASE_BACKEND and the MONGODB_* environment variables.
+        MONGODB_URI wins over MONGODB_USER, MONGODB_PWD and MONGODB_HOST.
+        :return: DatabaseSettings
+        """
+        uri: Optional[str] = os.environ.get("MONGODB_URI")
+        if not uri:
+            user: Optional[str] = os.environ.get("MONGODB_USER")
+            password: Optional[str] = os.environ.get("MONGODB_PWD")
+            host: str = os.environ.get("MONGODB_HOST", "mycluster.nm13zpf.mongodb.net")
+            uri = f'mongodb+srv://{user}:{password}@{host}/?retryWrites=true&w=majority'
+        compressors: str = os.environ.get("MONGODB_COMPRESSORS", "")
+        return cls(uri=uri,
+                   backend=os.environ.get("DATABASE_BACKEND", "mongodb"),
+                   max_pool_size=int(os.environ.get("MONGODB_MAX_POOL_SIZE", 100)),
+                   min_pool_size=int(os.environ.get("MONGODB_MIN_POOL_SIZE", 0)),
+                   max_idle_time_ms=_int_or_none("MONGODB_MAX_IDLE_TIME_MS"),
+                   server_selection_timeout_ms=int(os.environ.get("MONGODB_SERVER_SELECTION_TIMEOUT_MS", 30000)),
+                   connect_timeout_ms=int(os.environ.get("MONGODB_CONNECT_TIMEOUT_MS", 20000)),
+                   socket_timeout_ms=_int_or_none("MONGODB_SOCKET_TIMEOUT_MS"),
+                   wait_queue_timeout_ms=_int_or_none("MONGODB_WAIT_QUEUE_TIMEOUT_MS"),
+                   compressors=[name.strip() for name in compressors.split(',') if name.strip()],
+                   read_preference=os.environ.get("MONGODB_READ_PREFERENCE", "primary"),
+                   listing_read_preference=os.environ.get("MONGODB_LISTING_READ_PREFERENCE", "primary"),
+                   max_staleness_seconds=int(os.environ.get("MONGODB_MAX_STALENESS_SECONDS", -1)),
+                   app_name=os.environ.get("MONGODB_APP_NAME"))
+
+    def client_options(self) -> Dict[str, Any]:
+        """
+        Keyword arguments of AsyncIOMotorClient.
+        :return: Dict[str, Any]
+        """
+        options: Dict[str, Any] = {
+            'maxPoolSize': self.max_pool_size,
+            'minPoolSize': self.min_pool_size,
+            'serverSelectionTimeoutMS': self.server_selection_timeout_ms,
+            'connectTimeoutMS': self.connect_timeout_ms,
+            'read_preference': self.__read_preference(self.read_preference),
+        }
+        optional: Dict[str, Any] = {
+            'maxIdleTimeMS': self.max_idle_time_ms,
+            'socketTimeoutMS': self.socket_timeout_ms,
+            'waitQueueTimeoutMS': self.wait_queue_timeout_ms,
+            'compressors': ','.join(self.compressors) if self.compressors else None,
+            'appname': self.app_name,
+        }
+        options.update({key: value for key, value in optional.items() if value is not None})
+        return options
+
+    @property
+    def listing(self) -> _ServerMode:
+        """Getter method for accessing the read preference of listings.
+        Returns:
+            The read preference used by /all, /many and statistics reads.
+        """
+        return self.__read_preference(self.listing_read_preference)
+
+    def __read_preference(self, name: str) -> _ServerMode:
+        if name == 'primary':
+            return Primary()
+        return READ_PREFERENCES[name](max_staleness=self.max_staleness_seconds)
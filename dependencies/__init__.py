@@ -1,2 +1,3 @@
 from .users import VerifyTokenUser
 from .clients import VerifyTokenClient
+from .orders import OrderStatsParams
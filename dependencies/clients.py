@@ -4,6 +4,7 @@ import jwt
 import os
 from dotenv import load_dotenv, find_dotenv
 from controllers import TokensController
+from cache import clients_identity_cache
 
 controller = TokensController()
 
@@ -24,9 +25,12 @@ async def token_client_verify(request: Request) -> Dict:
             if 'is_client' not in token or not token['is_client']:
                 return {'failed': 'User does not have access rights to the content',
                         'status_code': status.HTTP_401_UNAUTHORIZED}
-            if not controller.verify_user_token(token['email'], token['password']):
-                return {'failed': 'User email not founded or password is wrong',
-                        'status_code': status.HTTP_401_UNAUTHORIZED}
+            signature: str = data.rsplit('.', 1)[-1]
+            if clients_identity_cache.get(signature) is None:
+                if not await controller.verify_client_token(token['email'], token['password']):
+                    return {'failed': 'User email not founded or password is wrong',
+                            'status_code': status.HTTP_401_UNAUTHORIZED}
+                clients_identity_cache.set(signature, token['_id'], jwt_payload['exp'])
             return {'success': 'authentication is ok', 'client_id': token['_id']}
         except jwt.ExpiredSignatureError:
             return {'failed': 'signature has expired',
@@ -0,0 +1,28 @@
+from typing import Dict, Annotated, Optional
+from fastapi import Depends, Query, status
+from pydantic import ValidationError
+from models import OrderStatsQuery
+
+DATA_PATTERN = r'^\d{2}/\d{2}/\d{4}$'
+
+
+async def order_stats_query(min_created_at: Annotated[Optional[str], Query(regex=DATA_PATTERN,
+                                                                           title='data pt-br',
+                                                                           description='dd/mm/aaaa, inclusive'
+                                                                           )] = None,
+                            max_created_at: Annotated[Optional[str], Query(regex=DATA_PATTERN,
+                                                                           title='data pt-br',
+                                                                           description='dd/mm/aaaa, exclusive'
+                                                                           )] = None) -> Dict:
+    try:
+        query: OrderStatsQuery = OrderStatsQuery(**{
+            'min_created_at': {'data': min_created_at} if min_created_at else None,
+            'max_created_at': {'data': max_created_at} if max_created_at else None
+        })
+        return {'success': 'query is ok', 'query': query}
+    except ValidationError:
+        return {'failed': 'data must be valid: pt-br format equals dd/mm/aaaa',
+                'status_code': status.HTTP_400_BAD_REQUEST}
+
+
+OrderStatsParams = Annotated[dict, Depends(order_stats_query)]
@@ -4,6 +4,7 @@ import jwt
 import os
 from dotenv import load_dotenv, find_dotenv
 from controllers import TokensController
+from cache import users_identity_cache
 
 controller = TokensController()
 
@@ -24,9 +25,12 @@ async def token_user_verify(request: Request) -> None | Dict:
             if 'is_user' not in token or not token['is_user']:
                 return {'failed': 'User does not have access rights to the content',
                         'status_code': status.HTTP_401_UNAUTHORIZED}
-            if not controller.verify_user_token(token['email'], token['password']):
-                return {'failed': 'User email not founded or password is wrong',
-                        'status_code': status.HTTP_401_UNAUTHORIZED}
+            signature: str = data.rsplit('.', 1)[-1]
+            if users_identity_cache.get(signature) is None:
+                if not await controller.verify_user_token(token['email'], token['password']):
+                    return {'failed': 'User email not founded or password is wrong',
+                            'status_code': status.HTTP_401_UNAUTHORIZED}
+                users_identity_cache.set(signature, token['_id'], jwt_payload['exp'])
             return {'success': 'authentication is ok', 'user_id': token['_id']}
         except jwt.ExpiredSignatureError:
             return {'failed': 'signature has expired',
@@ -1,14 +1,38 @@
 """
 Main module
 """
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
 from fastapi import FastAPI
-from fastapi import HTTPException
+from fastapi import HTTPException, Request, status
 from fastapi.middleware.cors import CORSMiddleware
-from routes import orders_router, products_router, clients_router, tokens_router, users_router, uploads_router
+from routes import orders_router, products_router, clients_router, tokens_router, users_router, uploads_router, \
+    metrics_router, admin_router
 from fastapi.staticfiles import StaticFiles
+from database import DB, mongoDBClient, COLLECTIONS_NAMES
+from cache import change_watcher
+from utils import hashing_pool, HashQueueFullError, photo_uploader, image_pipeline
+from serializers import MongoJSONResponse
+from middlewares import TimingMiddleware
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    await mongoDBClient.ping()
+    await DB.bootstrap()
+    # other workers write too: follow their changes to keep the caches coherent
+    change_watcher.start({name: getattr(DB, name) for name in COLLECTIONS_NAMES})
+    yield
+    # the photos being resized still record their variants
+    await image_pipeline.shutdown()
+    await change_watcher.stop()
+    mongoDBClient.close()
+    hashing_pool.shutdown()
+    photo_uploader.shutdown()
+
 
 # create app
-app = FastAPI()
+app = FastAPI(default_response_class=MongoJSONResponse, lifespan=lifespan)
 
 # Include routes to app
 app.include_router(clients_router)
@@ -17,6 +41,8 @@ app.include_router(orders_router)
 app.include_router(users_router)
 app.include_router(tokens_router)
 app.include_router(uploads_router)
+app.include_router(metrics_router)
+app.include_router(admin_router)
 
 app.add_middleware(
     CORSMiddleware,
@@ -26,9 +52,20 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# outermost: the measure covers every other middleware
+app.add_middleware(TimingMiddleware)
+
 app.mount("/static", StaticFiles(directory="static"), name="static")
 
 
 @app.exception_handler(HTTPException)
 async def http_exception_handler(request, exc):
     return {"error": str(exc.detail)}
+
+
+@app.exception_handler(HashQueueFullError)
+async def hash_queue_full_handler(request: Request, exc: HashQueueFullError) -> MongoJSONResponse:
+    return MongoJSONResponse(content={'failed': exc.message},
+                             status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                             headers={'Retry-After': '1'},
+                             media_type="application/json; charset=UTF-8")
@@ -0,0 +1,3 @@
+from .uploads import UploadCounter, upload_counter
+from .exposition import render_metrics, MetricsWriter, CONTENT_TYPE
+from .profiler import SamplingProfiler, ProfilerBusyError, sampling_profiler, MAX_PROFILE_SECONDS
@@ -0,0 +1,171 @@
+"""
+Render the application, pool and cache counters in the Prometheus text format
+"""
+from typing import Dict, List, Optional, Tuple
+from database import SETTINGS, command_counter, pool_monitor
+from cache import users_identity_cache, clients_identity_cache, products_cache
+from utils import hashing_pool, image_pipeline
+from middlewares import request_timings
+from .uploads import upload_counter
+
+# starlette appends the charset to text/* media types
+CONTENT_TYPE = 'text/plain; version=0.0.4'
+
+
+def escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def number(value: float) -> str:
+    if isinstance(value, float):
+        return repr(round(value, 6))
+    return str(value)
+
+
+class MetricsWriter:
+    """
+    Collect the lines of the text exposition, one HELP and TYPE header per family.
+    :return: None.
+    :rtype: none.
+    """
+
+    def __init__(self) -> None:
+        self.__lines: List[str] = []
+
+    @property
+    def text(self) -> str:
+        """Getter method for accessing the exposition.
+        Returns:
+            The lines written so far, newline terminated.
+        """
+        return '\n'.join(self.__lines) + '\n'
+
+    def family(self, name: str, kind: str, description: str) -> None:
+        self.__lines.append(f'# HELP {name} {description}')
+        self.__lines.append(f'# TYPE {name} {kind}')
+
+    def sample(self, name: str, value: float, labels: Optional[Dict[str, str]] = None) -> None:
+        rendered: str = ','.join(f'{key}="{escape(str(label))}"' for key, label in (labels or {}).items())
+        self.__lines.append(f'{name}{{{rendered}}} {number(value)}' if rendered else f'{name} {number(value)}')
+
+
+def route_labels(route: str) -> Dict[str, str]:
+    """
+    Labels of a 'METHOD /path/template' route: the router is the first path segment.
+    """
+    method, path = route.split(' ', 1)
+    router: str = path.strip('/').split('/')[0] if path.startswith('/') else path
+    return {'router': router, 'method': method, 'route': path}
+
+
+def write_requests(writer: MetricsWriter) -> None:
+    routes: List[Tuple[Dict[str, str], Dict]] = [(route_labels(route), entry)
+                                                 for route, entry in request_timings.snapshot.items()]
+    writer.family('http_requests_total', 'counter', 'Requests served, per route and status code.')
+    for labels, entry in routes:
+        for status_code, count in sorted(entry['statuses'].items()):
+            writer.sample('http_requests_total', count, {**labels, 'status': str(status_code)})
+    writer.family('http_request_duration_seconds', 'histogram', 'Time until the last byte of the response.')
+    for labels, entry in routes:
+        latency: Dict = entry['latency']
+        for bound, count in latency['buckets'].items():
+            le: str = bound if bound == '+Inf' else f'{float(bound) / 1000:g}'
+            writer.sample('http_request_duration_seconds_bucket', count, {**labels, 'le': le})
+        writer.sample('http_request_duration_seconds_sum', latency['sum_ms'] / 1000, labels)
+        writer.sample('http_request_duration_seconds_count', latency['count'], labels)
+    writer.family('http_request_db_commands_total', 'counter', 'Database commands sent while serving the route.')
+    for labels, entry in routes:
+        writer.sample('http_request_db_commands_total', entry['db_commands'], labels)
+    writer.family('http_request_db_seconds_total', 'counter', 'Time spent in the database commands of the route.')
+    for labels, entry in routes:
+        writer.sample('http_request_db_seconds_total', entry['db_ms'] / 1000, labels)
+
+
+def write_database(writer: MetricsWriter) -> None:
+    writer.family('mongodb_commands_total', 'counter', 'Database commands sent, per command name.')
+    for name, count in sorted(command_counter.totals.items()):
+        writer.sample('mongodb_commands_total', count, {'command': name})
+    writer.family('mongodb_pool_max_size', 'gauge', 'Configured maximum connections per server.')
+    writer.sample('mongodb_pool_max_size', SETTINGS.max_pool_size)
+    pools: Dict[str, Dict] = pool_monitor.stats
+    writer.family('mongodb_pool_connections', 'gauge', 'Connections of the pool, open or checked out.')
+    for address, pool in pools.items():
+        writer.sample('mongodb_pool_connections', pool['open'], {'address': address, 'state': 'open'})
+        writer.sample('mongodb_pool_connections', pool['checked_out'], {'address': address, 'state': 'checked_out'})
+    writer.family('mongodb_pool_checkouts_total', 'counter', 'Connections checked out of the pool.')
+    for address, pool in pools.items():
+        writer.sample('mongodb_pool_checkouts_total', pool['checkouts'], {'address': address})
+    writer.family('mongodb_pool_checkout_failures_total', 'counter', 'Check outs that failed, per reason.')
+    for address, pool in pools.items():
+        for reason, count in sorted(pool['checkout_failures'].items()):
+            writer.sample('mongodb_pool_checkout_failures_total', count, {'address': address, 'reason': reason})
+    writer.family('mongodb_pool_clears_total', 'counter', 'Times the pool was cleared after a network error.')
+    for address, pool in pools.items():
+        writer.sample('mongodb_pool_clears_total', pool['clears'], {'address': address})
+    writer.family('mongodb_pool_wait_seconds', 'summary', 'Time spent waiting to check out a connection.')
+    for address, pool in pools.items():
+        writer.sample('mongodb_pool_wait_seconds_sum', pool['wait_ms_sum'] / 1000, {'address': address})
+        writer.sample('mongodb_pool_wait_seconds_count', pool['wait_count'], {'address': address})
+    writer.family('mongodb_pool_wait_seconds_max', 'gauge', 'Longest wait for a connection since the start.')
+    for address, pool in pools.items():
+        writer.sample('mongodb_pool_wait_seconds_max', pool['wait_ms_max'] / 1000, {'address': address})
+
+
+def write_hashing(writer: MetricsWriter) -> None:
+    stats: Dict[str, int] = hashing_pool.stats
+    writer.family('bcrypt_pool_workers', 'gauge', 'Workers hashing passwords.')
+    writer.sample('bcrypt_pool_workers', stats['workers'])
+    writer.family('bcrypt_pool_pending', 'gauge', 'Hashes in progress or waiting for a worker.')
+    writer.sample('bcrypt_pool_pending', stats['pending'])
+    writer.family('bcrypt_pool_queue_depth', 'gauge', 'Hashes waiting for a free worker.')
+    writer.sample('bcrypt_pool_queue_depth', max(stats['pending'] - stats['workers'], 0))
+    writer.family('bcrypt_pool_rejected_total', 'counter', 'Hashes refused because the queue was full.')
+    writer.sample('bcrypt_pool_rejected_total', stats['rejected'])
+
+
+def write_images(writer: MetricsWriter) -> None:
+    stats: Dict[str, int] = image_pipeline.stats
+    writer.family('image_pool_workers', 'gauge', 'Processes making the photo variants.')
+    writer.sample('image_pool_workers', stats['workers'])
+    writer.family('image_pipeline_pending', 'gauge', 'Photos waiting for or being resized.')
+    writer.sample('image_pipeline_pending', stats['pending'])
+    writer.family('image_pipeline_processed_total', 'counter', 'Photos whose variants were recorded.')
+    writer.sample('image_pipeline_processed_total', stats['processed'])
+    writer.family('image_pipeline_failed_total', 'counter', 'Photos whose variants could not be made or recorded.')
+    writer.sample('image_pipeline_failed_total', stats['failed'])
+
+
+def write_caches(writer: MetricsWriter) -> None:
+    products: Dict[str, Dict[str, int]] = products_cache.stats
+    caches: Dict[str, Dict[str, int]] = {'users_identity': users_identity_cache.stats,
+                                         'clients_identity': clients_identity_cache.stats,
+                                         'products': products['products'],
+                                         'product_pages': products['pages']}
+    for name, key, kind, description in (('cache_hits_total', 'hits', 'counter', 'Lookups answered by the cache.'),
+                                         ('cache_misses_total', 'misses', 'counter', 'Lookups the cache missed.'),
+                                         ('cache_entries', 'size', 'gauge', 'Entries currently cached.')):
+        writer.family(name, kind, description)
+        for cache, stats in caches.items():
+            writer.sample(name, stats[key], {'cache': cache})
+
+
+def write_uploads(writer: MetricsWriter) -> None:
+    uploads: Dict[str, Dict[str, float]] = upload_counter.stats
+    for name, key, description in (('upload_files_total', 'files', 'Files uploaded.'),
+                                   ('upload_bytes_total', 'bytes', 'Bytes uploaded; rate() gives bytes per second.'),
+                                   ('upload_seconds_total', 'seconds', 'Time spent receiving and writing uploads.')):
+        writer.family(name, 'counter', description)
+        for kind, counters in uploads.items():
+            writer.sample(name, counters[key], {'kind': kind})
+
+
+def render_metrics() -> str:
+    """
+    Every metric of the process in the Prometheus text format, version 0.0.4.
+    The counters are kept per worker process: scrape each worker, or sum them.
+    :return: str
+    """
+    writer: MetricsWriter = MetricsWriter()
+    for write in (write_requests, write_database, write_hashing, write_images, write_caches, write_uploads):
+        write(writer)
+    return writer.text
@@ -0,0 +1,115 @@
+"""
+On-demand sampling profiler of the worker, in the collapsed stack format
+"""
+import os
+import sys
+import time
+import threading
+from types import FrameType
+from typing import Dict, List, Optional
+from dotenv import load_dotenv, find_dotenv
+
+load_dotenv(find_dotenv())
+
+MAX_PROFILE_SECONDS = float(os.environ.get("MAX_PROFILE_SECONDS", 60))
+
+
+class ProfilerBusyError(Exception):
+    """
+    Exception to be raised when a profile is requested while another one runs
+    :param: message - str
+    """
+
+    def __init__(self, message) -> None:
+        self.message = message
+        super().__init__(self.message)
+
+
+class SamplingProfiler:
+    """
+    Sample the Python stacks of every thread of the process at a fixed interval,
+    for a bounded time, and count the identical stacks. Nothing runs between two
+    profiles: the sampler is a plain loop started by sample() and gone when it
+    returns, so an idle worker pays nothing. One profile runs at a time.
+    The output is one 'thread;outer;...;inner count' line per stack, the input of
+    flamegraph.pl, speedscope and inferno.
+    :return: None.
+    :rtype: none.
+    """
+
+    def __init__(self) -> None:
+        self.__lock: threading.Lock = threading.Lock()
+        self.__labels: Dict[object, str] = {}
+        # file names are shown relative to the longest import path that contains them
+        self.__prefixes: List[str] = sorted({os.path.join(os.path.abspath(path), '') for path in sys.path},
+                                            key=len, reverse=True)
+
+    @property
+    def running(self) -> bool:
+        """Getter method for accessing the profiler state.
+        Returns:
+            True while a profile is being taken.
+        """
+        return self.__lock.locked()
+
+    def sample(self, seconds: float, interval: float) -> Dict[str, int]:
+        """
+        Take a profile; blocks the calling thread, which is never sampled, for seconds.
+        :param seconds: float - length of the profile, at most MAX_PROFILE_SECONDS.
+        :param interval: float - seconds between two samples.
+        :return: Dict[str, int] - count of every collapsed stack.
+        :raises: ProfilerBusyError if a profile is already running.
+        """
+        if not self.__lock.acquire(blocking=False):
+            raise ProfilerBusyError("A profile is already running, try again later.")
+        try:
+            me: int = threading.get_ident()
+            stacks: Dict[str, int] = {}
+            stop_at: float = time.perf_counter() + min(seconds, MAX_PROFILE_SECONDS)
+            while time.perf_counter() < stop_at:
+                names: Dict[int, str] = {thread.ident: thread.name for thread in threading.enumerate()}
+                frames: Dict[int, FrameType] = sys._current_frames()
+                for ident, frame in frames.items():
+                    if ident != me:
+                        stack: str = self.__collapse(names.get(ident, f'thread-{ident}'), frame)
+                        stacks[stack] = stacks.get(stack, 0) + 1
+                # the frames keep their locals alive until released
+                del frames
+                time.sleep(interval)
+            return stacks
+        finally:
+            self.__labels.clear()
+            self.__lock.release()
+
+    @staticmethod
+    def collapsed(stacks: Dict[str, int]) -> str:
+        """
+        Render the stacks, most sampled first.
+        :param stacks: Dict[str, int]
+        :return: str
+        """
+        return ''.join(f'{stack} {count}\n'
+                       for stack, count in sorted(stacks.items(), key=lambda item: item[1], reverse=True))
+
+    def __collapse(self, thread_name: str, frame: Optional[FrameType]) -> str:
+        labels: List[str] = []
+        while frame is not None:
+            labels.append(self.__label(frame))
+            frame = frame.f_back
+        labels.append(thread_name.replace(';', ':'))
+        return ';'.join(reversed(labels))
+
+    def __label(self, frame: FrameType) -> str:
+        # one label per code object, computed once per profile
+        code = frame.f_code
+        label: Optional[str] = self.__labels.get(code)
+        if label is None:
+            filename: str = code.co_filename
+            prefix: Optional[str] = next((prefix for prefix in self.__prefixes if filename.startswith(prefix)), None)
+            if prefix is not None:
+                filename = filename[len(prefix):]
+            label = self.__labels[code] = f'{code.co_qualname} ({filename}:{code.co_firstlineno})'.replace(';', ':')
+        return label
+
+
+sampling_profiler: SamplingProfiler = SamplingProfiler()
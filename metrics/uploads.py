@@ -0,0 +1,45 @@
+"""
+Counters of the uploaded files
+"""
+import time
+from threading import Lock
+from typing import Dict
+
+
+class UploadCounter:
+    """
+    Files, bytes and write time of the uploads per kind ('clients', 'products').
+    bytes / seconds gives the write throughput; rate() of bytes gives bytes per second.
+    :return: None.
+    :rtype: none.
+    """
+
+    def __init__(self) -> None:
+        self.__kinds: Dict[str, Dict[str, float]] = {}
+        self.__lock: Lock = Lock()
+
+    @property
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """Getter method for accessing the upload counters.
+        Returns:
+            Per kind: files, bytes and seconds spent receiving and writing them.
+        """
+        with self.__lock:
+            return {kind: dict(counters) for kind, counters in sorted(self.__kinds.items())}
+
+    def observe(self, kind: str, size: int, started: float) -> None:
+        """
+        Record a stored upload.
+        :param kind: str - 'clients' or 'products'.
+        :param size: int - bytes written.
+        :param started: float - time.perf_counter() when the first chunk was read.
+        :return: None
+        """
+        with self.__lock:
+            counters: Dict[str, float] = self.__kinds.setdefault(kind, {'files': 0, 'bytes': 0, 'seconds': 0.0})
+            counters['files'] += 1
+            counters['bytes'] += size
+            counters['seconds'] += time.perf_counter() - started
+
+
+upload_counter: UploadCounter = UploadCounter()
@@ -0,0 +1 @@
+from .timing import TimingMiddleware, RequestTimings, LatencyHistogram, request_timings
@@ -0,0 +1,160 @@
+"""
+Request timing, database command counting and slow request logging
+"""
+import os
+import time
+from threading import Lock
+from typing import Dict, List, Optional, Sequence
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from dotenv import load_dotenv, find_dotenv
+from database.monitoring import RequestCommands, current_commands
+
+load_dotenv(find_dotenv())
+
+# requests slower than this are printed with their database commands
+SLOW_REQUEST_MS = float(os.environ.get("SLOW_REQUEST_MS", 500))
+
+# upper bounds of the latency buckets, in milliseconds
+LATENCY_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+class LatencyHistogram:
+    """
+    Counts of observations per latency bucket, with their sum and maximum.
+    :param:  buckets: Sequence[float] - increasing upper bounds in milliseconds.
+    :return: None.
+    :rtype: none.
+    """
+
+    def __init__(self, buckets: Sequence[float]) -> None:
+        self.__buckets: Sequence[float] = buckets
+        self.__counts: List[int] = [0] * (len(buckets) + 1)
+        self.__sum: float = 0.0
+        self.__max: float = 0.0
+
+    @property
+    def snapshot(self) -> Dict:
+        """Getter method for accessing the histogram.
+        Returns:
+            count, sum_ms, max_ms and the cumulative count of every bucket, '+Inf' last.
+        """
+        cumulative: Dict[str, int] = {}
+        running: int = 0
+        for bound, count in zip([*map(str, self.__buckets), '+Inf'], self.__counts):
+            running += count
+            cumulative[bound] = running
+        return {'count': running, 'sum_ms': round(self.__sum, 3), 'max_ms': round(self.__max, 3),
+                'buckets': cumulative}
+
+    def observe(self, milliseconds: float) -> None:
+        index: int = next((index for index, bound in enumerate(self.__buckets) if milliseconds <= bound),
+                          len(self.__buckets))
+        self.__counts[index] += 1
+        self.__sum += milliseconds
+        self.__max = max(self.__max, milliseconds)
+
+
+class RequestTimings:
+    """
+    Latency histogram, status codes and database commands of every route.
+    Routes are named by method and path template, so /products/?product_id=...
+    requests share one entry whatever the id.
+    :param:  buckets: Sequence[float] - latency buckets in milliseconds.
+    :return: None.
+    :rtype: none.
+    """
+
+    def __init__(self, buckets: Sequence[float]) -> None:
+        self.__buckets: Sequence[float] = buckets
+        self.__routes: Dict[str, Dict] = {}
+        self.__lock: Lock = Lock()
+
+    @property
+    def snapshot(self) -> Dict[str, Dict]:
+        """Getter method for accessing the timings of every route.
+        Returns:
+            Per route: latency histogram, requests per status, database commands and their time.
+        """
+        with self.__lock:
+            return {route: {'latency': entry['latency'].snapshot,
+                            'statuses': dict(entry['statuses']),
+                            'db_commands': entry['db_commands'],
+                            'db_ms': round(entry['db_ms'], 3)}
+                    for route, entry in sorted(self.__routes.items())}
+
+    def observe(self, route: str, status_code: int, milliseconds: float, commands: RequestCommands) -> None:
+        """
+        Record a finished request.
+        :param route: str - 'METHOD /path/template'.
+        :param status_code: int
+        :param milliseconds: float - time until the last byte was sent.
+        :param commands: RequestCommands - database commands of the request.
+        :return: None
+        """
+        with self.__lock:
+            entry: Dict = self.__routes.get(route)
+            if entry is None:
+                entry = self.__routes[route] = {'latency': LatencyHistogram(self.__buckets), 'statuses': {},
+                                                'db_commands': 0, 'db_ms': 0.0}
+            entry['latency'].observe(milliseconds)
+            entry['statuses'][status_code] = entry['statuses'].get(status_code, 0) + 1
+            entry['db_commands'] += commands.count
+            entry['db_ms'] += commands.duration_ms
+
+
+request_timings: RequestTimings = RequestTimings(LATENCY_BUCKETS_MS)
+
+
+class TimingMiddleware:
+    """
+    ASGI middleware that times every http request, counts the database commands it
+    sends (see database/monitoring.py), adds a Server-Timing header and prints the
+    requests slower than slow_request_ms with their commands, so a request issuing
+    one command per item stands out.
+    :param:  app: ASGIApp
+    :param:  slow_request_ms: float - threshold of the slow request log.
+    :param:  timings: RequestTimings - where the measures are kept.
+    :return: None.
+    :rtype: none.
+    """
+
+    def __init__(self, app: ASGIApp, slow_request_ms: float = SLOW_REQUEST_MS,
+                 timings: RequestTimings = request_timings) -> None:
+        self.app: ASGIApp = app
+        self.slow_request_ms: float = slow_request_ms
+        self.timings: RequestTimings = timings
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+        commands: RequestCommands = RequestCommands()
+        token = current_commands.set(commands)
+        started: float = time.perf_counter()
+        status_code: int = 500
+
+        async def send_timed(message: Message) -> None:
+            nonlocal status_code
+            if message['type'] == 'http.response.start':
+                status_code = message['status']
+                elapsed: float = (time.perf_counter() - started) * 1000
+                MutableHeaders(scope=message).append(
+                    'Server-Timing',
+                    f'app;dur={elapsed:.1f}, db;dur={commands.duration_ms:.1f};desc="{commands.count} commands"')
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_timed)
+        finally:
+            current_commands.reset(token)
+            milliseconds: float = (time.perf_counter() - started) * 1000
+            route_path: Optional[str] = getattr(scope.get('route'), 'path', None)
+            route: str = f"{scope['method']} {route_path or 'unmatched'}"
+            self.timings.observe(route, status_code, milliseconds, commands)
+            if milliseconds >= self.slow_request_ms:
+                details: str = ', '.join(f"{name} x{entry['count']} {entry['ms']:.1f}ms"
+                                         for name, entry in commands.breakdown.items())
+                print(f"slow request: {route} {status_code} {milliseconds:.1f}ms, "
+                      f"{commands.count} db commands {commands.duration_ms:.1f}ms"
+                      f"{': ' + details if details else ''}")
@@ -1,7 +1,9 @@
 from .client import Client, ClientUpdate, ClientAuth, ClientResponse, FullClient, ClientQuery
-from .order import ClientId, ChangeStatus, AddItem, RemoveItem, ProductId, OrderId, FullOrder
+from .order import ClientId, ChangeStatus, AddItem, RemoveItem, ProductId, OrderId, OrderIds, FullOrder
+from .order import OrderStatus, OrderStatsQuery
 from .product import Product, ProductUpdate, ProductResponse, FullProduct, ProductQuery
 from .user import User, UserUpdate, UserAuth, UserResponse, FullUser, UserQuery
 from .failed import Failed
 from .success import Success
 from .data import Data
+from .pagination import StreamFormat, MAX_PAGE_SIZE
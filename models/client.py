@@ -6,7 +6,6 @@ from validate_email import validate_email
 import re
 from datetime import datetime
 from .data import Data
-from utils import hash_value
 
 PATTERN = r'^[a-f0-9]{24}$'
 
@@ -82,7 +81,7 @@ class FullClient(Client):
             'email': self.email,
             'cpf': self.cpf,
             'phone': self.phone,
-            'password': hash_value(self.password),
+            'password': self.password,
             'created_at': self.created_at,
             'last_modified': self.last_modified,
             'is_client': self.is_client,
@@ -170,7 +169,7 @@ class ClientUpdate(Client):
         if self.phone:
             params['phone'] = self.phone
         if self.password:
-            params['password'] = hash_value(self.password)
+            params['password'] = self.password
         if self.is_client:
             params['is_client'] = self.is_client
         params['last_modified'] = datetime.now()
@@ -220,5 +219,6 @@ class ClientResponse(BaseModel):
     created_at: str = Field(description="Client creation data")
     last_modified: str = Field(description="Client last update data")
     photos: List[str | None] = Field(description="Client orders _ids")
+    photo_variants: List[Dict] = Field(default=[], description="Resized copies of the photos")
     orders: List[str | None] = Field(description="Client orders _ids")
     is_client: bool = Field(description="Client status")
@@ -2,9 +2,10 @@ from datetime import datetime
 
 from bson import ObjectId
 from pydantic import BaseModel, Field, validator
-from typing import Dict, List
+from typing import Dict, List, Optional
 from enum import Enum
 import re
+from .data import Data
 
 PATTERN = r'^[a-f0-9]{24}$'
 
@@ -22,6 +23,19 @@ class OrderId(BaseModel):
         return ObjectId(self.order_id)
 
 
+class OrderIds(BaseModel):
+    order_ids: List[str] = Field(min_items=1, max_items=1000, description="Orders IDs")
+
+    @validator('order_ids', each_item=True)
+    def order_id_must_be_valid(cls, value: str) -> str:
+        if not re.match(PATTERN, value):
+            raise ValueError('order_id must be only numeric, lowercase and length 24')
+        return value
+
+    def to_objectids(self) -> List[ObjectId]:
+        return [ObjectId(order_id) for order_id in dict.fromkeys(self.order_ids)]
+
+
 class ClientId(BaseModel):
     client_id: str = Field(description="Client ID")
 
@@ -113,3 +127,18 @@ class FullOrder(BaseModel):
 
     def to_dict(self) -> Dict:
         return RemoveItem.dict(self, exclude_none=True, exclude_unset=True)
+
+
+class OrderStatsQuery(BaseModel):
+    min_created_at: Optional[Data] = Field(description="Order minimum data creation", default=None)
+    max_created_at: Optional[Data] = Field(description="Order maximum data creation", default=None)
+
+    def params(self) -> Dict[str, Dict[str, datetime]]:
+        params: Dict = {}
+        if self.min_created_at and self.max_created_at:
+            params['created_at'] = {"$gte": self.min_created_at.data, "$lt": self.max_created_at.data}
+        elif self.max_created_at:
+            params['created_at'] = {"$lt": self.max_created_at.data}
+        elif self.min_created_at:
+            params['created_at'] = {"$gte": self.min_created_at.data}
+        return params
@@ -0,0 +1,9 @@
+from enum import Enum
+
+
+class StreamFormat(str, Enum):
+    JSON = 'json'
+    NDJSON = 'ndjson'
+
+
+MAX_PAGE_SIZE: int = 1000
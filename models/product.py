@@ -45,6 +45,7 @@ class FullProduct(Product):
 
 
 class ProductQuery(BaseModel):
+    search: Optional[str] = Field(min_length=2, description="Words searched in name and description", default=None)
     name: Optional[str] = Field(min_length=3, description="Product name", default=None)
     brand: Optional[str] = Field(min_length=2, description="Product brand", default=None)
     min_price: Optional[float] = Field(gt=0, description="Product price", default=None)
@@ -53,15 +54,17 @@ class ProductQuery(BaseModel):
 
     def params(self) -> Dict[str, Union[str, float]]:
         params: Dict = {}
+        # served by the text index; its words are ORed, ranked by relevance
+        if self.search:
+            params['$text'] = {"$search": self.search}
+        # name, description and brand keep their substring match, ANDed with the other filters;
+        # the input is escaped, so it is matched literally
         if self.name:
-            pattern = re.compile(f".*{self.name}.*", re.IGNORECASE)
-            params['name'] = {"$regex": pattern}
+            params['name'] = {"$regex": re.compile(re.escape(self.name), re.IGNORECASE)}
         if self.description:
-            pattern = re.compile(f".*{self.description}.*", re.IGNORECASE)
-            params['description'] = {"$regex": pattern}
+            params['description'] = {"$regex": re.compile(re.escape(self.description), re.IGNORECASE)}
         if self.brand:
-            pattern = re.compile(self.brand)
-            params['brand'] = {"$regex": pattern}
+            params['brand'] = {"$regex": re.compile(re.escape(self.brand), re.IGNORECASE)}
         if self.min_price and self.max_price:
             params['price'] = {"$lt": self.max_price, "$gt": self.min_price}
         elif self.max_price:
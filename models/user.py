@@ -3,7 +3,7 @@ import re
 
 from bson import ObjectId
 
-from utils import CpfValidator, hash_value
+from utils import CpfValidator
 from validate_email import validate_email
 from pydantic import BaseModel, Field, validator
 from models import ClientAuth
@@ -82,7 +82,7 @@ class FullUser(User):
             'email': self.email,
             'cpf': self.cpf,
             'phone': self.phone,
-            'password': hash_value(self.password),
+            'password': self.password,
             'created_at': self.created_at,
             'last_modified': self.last_modified,
             'is_user': self.is_user
@@ -168,7 +168,7 @@ class UserUpdate(User):
         if self.phone:
             params['phone'] = self.phone
         if self.password:
-            params['password'] = hash_value(self.password)
+            params['password'] = self.password
         if self.is_user:
             params['is_client'] = self.is_user
         params['last_modified'] = datetime.now()
@@ -4,3 +4,5 @@ from .orders import router as orders_router
 from .tokens import router as tokens_router
 from .users import router as users_router
 from .upload_files import router as uploads_router
+from .metrics import router as metrics_router
+from .admin import router as admin_router
@@ -0,0 +1,40 @@
+from typing import Annotated, Dict
+import asyncio
+import time
+from fastapi import APIRouter, Query, status
+from fastapi.responses import Response
+from serializers import MongoJSONResponse
+from dependencies import VerifyTokenUser
+from metrics import sampling_profiler, ProfilerBusyError, MAX_PROFILE_SECONDS
+
+router: APIRouter = APIRouter(
+    prefix="/admin",
+    tags=["admin"],
+    responses={404: {"description": "Not found"}},
+)
+
+
+@router.get("/profile", response_model=None)
+async def profile(verify_token: VerifyTokenUser,
+                  seconds: Annotated[float, Query(gt=0, le=MAX_PROFILE_SECONDS,
+                                                  description='length of the profile')] = 5,
+                  interval_ms: Annotated[float, Query(ge=1, le=1000,
+                                                      description='milliseconds between two samples')] = 10,
+                  ) -> Response:
+    if 'failed' in verify_token:
+        return MongoJSONResponse(content=verify_token,
+                                 status_code=verify_token['status_code'],
+                                 media_type="application/json; charset=UTF-8")
+    # the sampler blocks its own thread: the event loop keeps serving, and is profiled
+    try:
+        stacks: Dict[str, int] = await asyncio.get_running_loop().run_in_executor(
+            None, sampling_profiler.sample, seconds, interval_ms / 1000)
+    except ProfilerBusyError as error:
+        return MongoJSONResponse(content={'failed': error.message},
+                                 status_code=status.HTTP_409_CONFLICT,
+                                 media_type="application/json; charset=UTF-8")
+    filename: str = f'profile-{time.strftime("%Y%m%dT%H%M%S")}.collapsed'
+    return Response(content=sampling_profiler.collapsed(stacks),
+                    media_type='text/plain',
+                    headers={'Content-Disposition': f'attachment; filename="{filename}"',
+                             'X-Profile-Samples': str(sum(stacks.values()))})
@@ -1,10 +1,11 @@
 from typing import List, Dict, Annotated, Optional, Union
-from fastapi.responses import JSONResponse
+from fastapi.responses import StreamingResponse
 from fastapi import status
 from controllers import ClientsController
-from models import Client, ClientUpdate, ClientResponse, Failed, Success, Data, ClientQuery, ClientId
-from fastapi import APIRouter, Query
-from serializers import ClientSerializer
+from models import Client, ClientUpdate, ClientResponse, Failed, Success, Data, ClientQuery, ClientId, StreamFormat, MAX_PAGE_SIZE
+from fastapi import APIRouter, Query, Header
+from serializers import MongoJSONResponse, stream_documents, next_page_headers, MEDIA_TYPES
+from serializers import validator_headers, is_not_modified, not_modified_response
 from dependencies import VerifyTokenUser
 
 router: APIRouter = APIRouter(
@@ -14,50 +15,57 @@ router: APIRouter = APIRouter(
 )
 
 controller: ClientsController = ClientsController()
-serializer: ClientSerializer = ClientSerializer()
 
 
 @router.get("/me", response_model=Union[ClientResponse | Failed])
-async def get_client_me(verify_token: VerifyTokenUser) -> JSONResponse | Dict:
+async def get_client_me(verify_token: VerifyTokenUser) -> MongoJSONResponse | Dict:
     if 'failed' in verify_token:
-        return JSONResponse(content=verify_token,
-                            status_code=verify_token['status_code'],
-                            media_type="application/json; charset=UTF-8")
+        return MongoJSONResponse(content=verify_token,
+                                 status_code=verify_token['status_code'],
+                                 media_type="application/json; charset=UTF-8")
     if verify_token['client_id']:
-        result: Dict = controller.get_one_by_id(verify_token['client_id'])
+        result: Dict = await controller.get_one_by_id(verify_token['client_id'])
         if 'failed' in result:
             if '_id' in result:
-                return JSONResponse(content=result,
-                                    status_code=status.HTTP_404_NOT_FOUND,
-                                    media_type="application/json; charset=UTF-8")
-            return JSONResponse(content=result,
-                                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                                media_type="application/json; charset=UTF-8")
-        result: Dict = serializer.serialize_one(result)
-        return JSONResponse(content=result,
-                            media_type="application/json; charset=UTF-8")
+                return MongoJSONResponse(content=result,
+                                         status_code=status.HTTP_404_NOT_FOUND,
+                                         media_type="application/json; charset=UTF-8")
+            return MongoJSONResponse(content=result,
+                                     status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                                     media_type="application/json; charset=UTF-8")
+        return MongoJSONResponse(content=result,
+                                 media_type="application/json; charset=UTF-8")
     result: Dict = {'failed': 'parameter client_id must be given'}
-    return JSONResponse(content=result,
-                        status_code=status.HTTP_400_BAD_REQUEST,
-                        media_type="application/json; charset=UTF-8")
+    return MongoJSONResponse(content=result,
+                             status_code=status.HTTP_400_BAD_REQUEST,
+                             media_type="application/json; charset=UTF-8")
 
 
 @router.get("/all", response_model=Union[list[ClientResponse], Failed])
-async def get_all_clients(verify_token: VerifyTokenUser) \
-        -> JSONResponse | Dict:
+async def get_all_clients(verify_token: VerifyTokenUser,
+                          limit: Annotated[Optional[int], Query(gt=0, le=MAX_PAGE_SIZE)] = None,
+                          after: Annotated[Optional[str], Query(regex=r'^[a-f0-9]{24}$',
+                                                                title='mongodb _id',
+                                                                description='last _id of the previous page'
+                                                                )] = None,
+                          stream: Optional[StreamFormat] = None) -> MongoJSONResponse | Dict:
     if 'failed' in verify_token:
-        return JSONResponse(content=verify_token,
-                            status_code=verify_token['status_code'],
-                            media_type="application/json; charset=UTF-8")
-    result: List[Dict] | Dict = controller.get_all()
+        return MongoJSONResponse(content=verify_token,
+                                 status_code=verify_token['status_code'],
+                                 media_type="application/json; charset=UTF-8")
+    if stream:
+        return StreamingResponse(stream_documents(controller.find_all(limit, after),
+                                                  stream),
+                                 media_type=MEDIA_TYPES[stream])
+    result: List[Dict] | Dict = await controller.get_all(limit, after)
     if 'failed' in result:
-        return JSONResponse(content=result,
-                            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                            media_type="application/json; charset=UTF-8")
+        return MongoJSONResponse(content=result,
+                                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                                 media_type="application/json; charset=UTF-8")
 
-    result: List[Dict] = serializer.serialize_all(result)
-    return JSONResponse(content=result,
-                        media_type="application/json; charset=UTF-8")
+    return MongoJSONResponse(content=result,
+                             headers=next_page_headers(result, limit),
+                             media_type="application/json; charset=UTF-8")
 
 
 @router.get("/many")
@@ -72,9 +80,9 @@ async def get_many_clients(verify_token: VerifyTokenUser,
                            max_last_modified: Optional[Data] = None,
                            is_client: Optional[bool] = None):
     if 'failed' in verify_token:
-        return JSONResponse(content=verify_token,
-                            status_code=verify_token['status_code'],
-                            media_type="application/json; charset=UTF-8")
+        return MongoJSONResponse(content=verify_token,
+                                 status_code=verify_token['status_code'],
+                                 media_type="application/json; charset=UTF-8")
     query: ClientQuery = ClientQuery(**{'name': name,
                                         'email': email,
                                         'cpf': cpf,
@@ -84,84 +92,91 @@ async def get_many_clients(verify_token: VerifyTokenUser,
                                         'min_last_modified': min_last_modified,
                                         'max_last_modified': max_last_modified,
                                         'is_client': is_client})
-    result: Dict[str, Union[Data, str, bool]] = controller.get_many(query)
+    result: Dict[str, Union[Data, str, bool]] = await controller.get_many(query)
     if 'failed' in result:
-        return JSONResponse(content=result,
-                            status_code=status.HTTP_404_NOT_FOUND,
-                            media_type="application/json; charset=UTF-8")
-    result: List[Dict] = serializer.serialize_all(result)
-    return JSONResponse(content=result,
-                        media_type="application/json; charset=UTF-8")
+        return MongoJSONResponse(content=result,
+                                 status_code=status.HTTP_404_NOT_FOUND,
+                                 media_type="application/json; charset=UTF-8")
+    return MongoJSONResponse(content=result,
+                             media_type="application/json; charset=UTF-8")
 
 
 @router.get("/", response_model=Union[ClientResponse | Failed])
 async def get_one_client_by_id(
         verify_token: VerifyTokenUser,
-        client_id: ClientId) -> JSONResponse | Dict:
+        client_id: ClientId,
+        if_none_match: Annotated[Optional[str], Header()] = None,
+        if_modified_since: Annotated[Optional[str], Header()] = None) -> MongoJSONResponse | Dict:
     if 'failed' in verify_token:
-        return JSONResponse(content=verify_token,
-                            status_code=verify_token['status_code'],
-                            media_type="application/json; charset=UTF-8")
+        return MongoJSONResponse(content=verify_token,
+                                 status_code=verify_token['status_code'],
+                                 media_type="application/json; charset=UTF-8")
     if client_id:
-        result: Dict = controller.get_one_by_id(client_id)
+        if if_none_match or if_modified_since:
+            version: Dict = await controller.get_last_modified(client_id)
+            if 'failed' not in version:
+                headers: Dict[str, str] = validator_headers(version)
+                if is_not_modified(headers, if_none_match, if_modified_since):
+                    return not_modified_response(headers)
+        result: Dict = await controller.get_one_by_id(client_id)
         if 'failed' in result:
             if '_id' in result:
-                return JSONResponse(content=result,
-                                    status_code=status.HTTP_404_NOT_FOUND,
-                                    media_type="application/json; charset=UTF-8")
-            return JSONResponse(content=result,
-                                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                                media_type="application/json; charset=UTF-8")
-        result: Dict = serializer.serialize_one(result)
-        return JSONResponse(content=result,
-                            media_type="application/json; charset=UTF-8")
+                return MongoJSONResponse(content=result,
+                                         status_code=status.HTTP_404_NOT_FOUND,
+                                         media_type="application/json; charset=UTF-8")
+            return MongoJSONResponse(content=result,
+                                     status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                                     media_type="application/json; charset=UTF-8")
+        return MongoJSONResponse(content=result,
+                                 headers=validator_headers(result),
+                                 media_type="application/json; charset=UTF-8")
     result: Dict = {'failed': 'parameter client_id must be given'}
-    return JSONResponse(content=result,
-                        status_code=status.HTTP_400_BAD_REQUEST,
-                        media_type="application/json; charset=UTF-8")
+    return MongoJSONResponse(content=result,
+                             status_code=status.HTTP_400_BAD_REQUEST,
+                             media_type="application/json; charset=UTF-8")
 
 
 @router.post("/", response_model=Union[Success, Failed])
 async def create_one_client(verify_token: VerifyTokenUser,
                             client: Client) \
-        -> Union[JSONResponse, Dict]:
+        -> Union[MongoJSONResponse, Dict]:
     if 'failed' in verify_token:
-        return JSONResponse(content=verify_token,
-                            status_code=verify_token['status_code'],
-                            media_type="application/json; charset=UTF-8")
-    result: Dict | Failed = controller.create_one(client)
+        return MongoJSONResponse(content=verify_token,
+                                 status_code=verify_token['status_code'],
+                                 media_type="application/json; charset=UTF-8")
+    result: Dict | Failed = await controller.create_one(client)
     if 'failed' in result:
         if 'message' in result:
-            return JSONResponse(content=result,
-                                status_code=status.HTTP_400_BAD_REQUEST,
-                                media_type="application/json; charset=UTF-8")
-        return JSONResponse(content=result,
-                            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                            media_type="application/json; charset=UTF-8")
-    return JSONResponse(content=result,
-                        status_code=status.HTTP_201_CREATED,
-                        media_type="application/json; charset=UTF-8")
+            return MongoJSONResponse(content=result,
+                                     status_code=status.HTTP_400_BAD_REQUEST,
+                                     media_type="application/json; charset=UTF-8")
+        return MongoJSONResponse(content=result,
+                                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                                 media_type="application/json; charset=UTF-8")
+    return MongoJSONResponse(content=result,
+                             status_code=status.HTTP_201_CREATED,
+                             media_type="application/json; charset=UTF-8")
 
 
 @router.put("/", response_model=Union[Success, Failed])
 async def update_one_client_by_id(verify_token: VerifyTokenUser,
                                   updates: ClientUpdate) \
-        -> Union[JSONResponse, Dict]:
+        -> Union[MongoJSONResponse, Dict]:
     if 'failed' in verify_token:
-        return JSONResponse(content=verify_token,
-                            status_code=verify_token['status_code'],
-                            media_type="application/json; charset=UTF-8")
-    result: Dict = controller.update_one_by_id(updates)
+        return MongoJSONResponse(content=verify_token,
+                                 status_code=verify_token['status_code'],
+                                 media_type="application/json; charset=UTF-8")
+    result: Dict = await controller.update_one_by_id(updates)
     if 'failed' in result:
         if 'message' in result:
-            return JSONResponse(content=result,
-                                status_code=status.HTTP_400_BAD_REQUEST,
-                                media_type="application/json; charset=UTF-8")
-        return JSONResponse(content=result,
-                            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                            media_type="application/json; charset=UTF-8")
-    return JSONResponse(content=result,
-                        media_type="application/json; charset=UTF-8")
+            return MongoJSONResponse(content=result,
+                                     status_code=status.HTTP_400_BAD_REQUEST,
+                                     media_type="application/json; charset=UTF-8")
+        return MongoJSONResponse(content=result,
+                                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                                 media_type="application/json; charset=UTF-8")
+    return MongoJSONResponse(content=result,
+                             media_type="application/json; charset=UTF-8")
 
 
 @router.delete("/", response_model=Union[Success, Failed])
@@ -171,24 +186,24 @@ async def delete_one_client_by_id(verify_token: VerifyTokenUser,
                                         title='mongodb _id',
                                         description='mongodb _id must be valid'
                                         )]
-                                  ) -> Union[JSONResponse, Dict]:
+                                  ) -> Union[MongoJSONResponse, Dict]:
     if 'failed' in verify_token:
-        return JSONResponse(content=verify_token,
-                            status_code=verify_token['status_code'],
-                            media_type="application/json; charset=UTF-8")
+        return MongoJSONResponse(content=verify_token,
+                                 status_code=verify_token['status_code'],
+                                 media_type="application/json; charset=UTF-8")
     if client_id:
-        result: Dict = controller.delete_one_by_id(client_id)
+        result: Dict = await controller.delete_one_by_id(client_id)
         if 'failed' in result:
             if '_id' in result:
-                return JSONResponse(content=result,
-                                    status_code=status.HTTP_404_NOT_FOUND,
-                                    media_type="application/json; charset=UTF-8")
-            return JSONResponse(content=result,
-                                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                                media_type="application/json; charset=UTF-8")
-        return JSONResponse(content=result,
-                            media_type="application/json; charset=UTF-8")
+                return MongoJSONResponse(content=result,
+                                         status_code=status.HTTP_404_NOT_FOUND,
+                                         media_type="application/json; charset=UTF-8")
+            return MongoJSONResponse(content=result,
+                                     status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                                     media_type="application/json; charset=UTF-8")
+        return MongoJSONResponse(content=result,
+                                 media_type="application/json; charset=UTF-8")
     result: Dict = {'failed': 'parameter client_id must be given'}
-    return JSONResponse(content=result,
-                        status_code=status.HTTP_400_BAD_REQUEST,
-                        media_type="application/json; charset=UTF-8")
+    return MongoJSONResponse(content=result,
+                             status_code=status.HTTP_400_BAD_REQUEST,
+                             media_type="application/json; charset=UTF-8")
@@ -1,10 +1,11 @@
-from typing import List, Dict, Annotated, Union
-from fastapi.responses import JSONResponse
+from typing import List, Dict, Annotated, Union, Optional
+from fastapi.responses import StreamingResponse
 from controllers import OrdersController
-from fastapi import APIRouter, Query, status
-from models import ClientId, Failed, Success, ChangeStatus, AddItem, RemoveItem, OrderId
-from serializers import OrderSerializer
-from dependencies import VerifyTokenUser
+from fastapi import APIRouter, Query, Header, status
+from models import ClientId, Failed, Success, ChangeStatus, AddItem, RemoveItem, OrderId, OrderIds, StreamFormat, MAX_PAGE_SIZE
+from serializers import MongoJSONResponse, stream_documents, next_page_headers, MEDIA_TYPES
+from serializers import validator_headers, is_not_modified, not_modified_response
+from dependencies import VerifyTokenUser, OrderStatsParams
 
 router: APIRouter = APIRouter(
     prefix="/orders",
@@ -13,123 +14,205 @@ router: APIRouter = APIRouter(
 )
 
 controller: OrdersController = OrdersController()
-serializer: OrderSerializer = OrderSerializer()
 
 
 @router.get("/all")
-async def get_all_orders(verify_token: VerifyTokenUser) -> JSONResponse:
+async def get_all_orders(verify_token: VerifyTokenUser,
+                         limit: Annotated[Optional[int], Query(gt=0, le=MAX_PAGE_SIZE)] = None,
+                         after: Annotated[Optional[str], Query(regex=r'^[a-f0-9]{24}$',
+                                                               title='mongodb _id',
+                                                               description='last _id of the previous page'
+                                                               )] = None,
+                         stream: Optional[StreamFormat] = None) -> MongoJSONResponse:
     if 'failed' in verify_token:
-        return JSONResponse(content=verify_token,
-                            status_code=verify_token['status_code'],
-                            media_type="application/json; charset=UTF-8")
-    result: List[Dict] = controller.get_all()
+        return MongoJSONResponse(content=verify_token,
+                                 status_code=verify_token['status_code'],
+                                 media_type="application/json; charset=UTF-8")
+    if stream:
+        return StreamingResponse(stream_documents(controller.find_all(limit, after), stream),
+                                 media_type=MEDIA_TYPES[stream])
+    result: List[Dict] | Dict = await controller.get_all(limit, after)
     if 'failed' in result:
-        return JSONResponse(content=result,
-                            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                            media_type="application/json; charset=UTF-8")
-    result: List[Dict] = serializer.serialize_all(result)
-    return JSONResponse(content=result,
-                        media_type="application/json; charset=UTF-8")
+        return MongoJSONResponse(content=result,
+                                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                                 media_type="application/json; charset=UTF-8")
+    return MongoJSONResponse(content=result,
+                             headers=next_page_headers(result, limit),
+                             media_type="application/json; charset=UTF-8")
+
+
+@router.get("/stats/revenue")
+async def get_revenue_per_day(verify_token: VerifyTokenUser,
+                              stats_query: OrderStatsParams) -> MongoJSONResponse:
+    if 'failed' in verify_token:
+        return MongoJSONResponse(content=verify_token,
+                                 status_code=verify_token['status_code'],
+                                 media_type="application/json; charset=UTF-8")
+    if 'failed' in stats_query:
+        return MongoJSONResponse(content=stats_query,
+                                 status_code=stats_query['status_code'],
+                                 media_type="application/json; charset=UTF-8")
+    result: List[Dict] | Dict = await controller.revenue_per_day(stats_query['query'])
+    if 'failed' in result:
+        return MongoJSONResponse(content=result,
+                                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                                 media_type="application/json; charset=UTF-8")
+    return MongoJSONResponse(content=result,
+                             media_type="application/json; charset=UTF-8")
+
+
+@router.get("/stats/units")
+async def get_units_per_product(verify_token: VerifyTokenUser,
+                                stats_query: OrderStatsParams,
+                                limit: Annotated[Optional[int], Query(gt=0, le=MAX_PAGE_SIZE)] = None) \
+        -> MongoJSONResponse:
+    if 'failed' in verify_token:
+        return MongoJSONResponse(content=verify_token,
+                                 status_code=verify_token['status_code'],
+                                 media_type="application/json; charset=UTF-8")
+    if 'failed' in stats_query:
+        return MongoJSONResponse(content=stats_query,
+                                 status_code=stats_query['status_code'],
+                                 media_type="application/json; charset=UTF-8")
+    result: List[Dict] | Dict = await controller.units_per_product(stats_query['query'], limit)
+    if 'failed' in result:
+        return MongoJSONResponse(content=result,
+                                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                                 media_type="application/json; charset=UTF-8")
+    return MongoJSONResponse(content=result,
+                             media_type="application/json; charset=UTF-8")
+
+
+@router.get("/stats/status")
+async def get_count_per_status(verify_token: VerifyTokenUser,
+                               stats_query: OrderStatsParams) -> MongoJSONResponse:
+    if 'failed' in verify_token:
+        return MongoJSONResponse(content=verify_token,
+                                 status_code=verify_token['status_code'],
+                                 media_type="application/json; charset=UTF-8")
+    if 'failed' in stats_query:
+        return MongoJSONResponse(content=stats_query,
+                                 status_code=stats_query['status_code'],
+                                 media_type="application/json; charset=UTF-8")
+    result: List[Dict] | Dict = await controller.count_per_status(stats_query['query'])
+    if 'failed' in result:
+        return MongoJSONResponse(content=result,
+                                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                                 media_type="application/json; charset=UTF-8")
+    return MongoJSONResponse(content=result,
+                             media_type="application/json; charset=UTF-8")
 
 
 @router.get("/", response_model=None)
 async def get_one_order_by_id(order_id: OrderId,
-                              verify_token: VerifyTokenUser) \
-        -> Union[JSONResponse, Dict]:
+                              verify_token: VerifyTokenUser,
+                              if_none_match: Annotated[Optional[str], Header()] = None,
+                              if_modified_since: Annotated[Optional[str], Header()] = None) \
+        -> Union[MongoJSONResponse, Dict]:
     if 'failed' in verify_token:
-        return JSONResponse(content=verify_token,
-                            status_code=verify_token['status_code'],
-                            media_type="application/json; charset=UTF-8")
+        return MongoJSONResponse(content=verify_token,
+                                 status_code=verify_token['status_code'],
+                                 media_type="application/json; charset=UTF-8")
     if order_id:
-        result: Dict = controller.get_one_by_id(order_id)
+        if if_none_match or if_modified_since:
+            version: Dict = await controller.get_last_modified(order_id)
+            if 'failed' not in version:
+                headers: Dict[str, str] = validator_headers(version)
+                if is_not_modified(headers, if_none_match, if_modified_since):
+                    return not_modified_response(headers)
+        result: Dict = await controller.get_one_by_id(order_id)
         if 'failed' in result:
             if '_id' in result:
-                return JSONResponse(content=result,
-                                    status_code=status.HTTP_404_NOT_FOUND,
-                                    media_type="application/json; charset=UTF-8")
-            return JSONResponse(content=result,
-                                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                                media_type="application/json; charset=UTF-8")
-        result: Dict = serializer.serialize_one(result)
-        return JSONResponse(content=result,
-                            media_type="application/json; charset=UTF-8")
+                return MongoJSONResponse(content=result,
+                                         status_code=status.HTTP_404_NOT_FOUND,
+                                         media_type="application/json; charset=UTF-8")
+            return MongoJSONResponse(content=result,
+                                     status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                                     media_type="application/json; charset=UTF-8")
+        return MongoJSONResponse(content=result,
+                                 headers=validator_headers(result),
+                                 media_type="application/json; charset=UTF-8")
     result: Dict = {'failed': 'parameter order_id must be given'}
-    return JSONResponse(content=result,
-                        status_code=status.HTTP_400_BAD_REQUEST,
-                        media_type="application/json; charset=UTF-8")
+    return MongoJSONResponse(content=result,
+                             status_code=status.HTTP_400_BAD_REQUEST,
+                             media_type="application/json; charset=UTF-8")
 
 
 @router.post("/", response_model=Union[Success, Failed])
 async def create_one_order(client_id: ClientId,
-                           verify_token: VerifyTokenUser) -> Union[JSONResponse, Dict]:
+                           verify_token: VerifyTokenUser) -> Union[MongoJSONResponse, Dict]:
     if 'failed' in verify_token:
-        return JSONResponse(content=verify_token,
-                            status_code=verify_token['status_code'],
-                            media_type="application/json; charset=UTF-8")
-    result: Dict = controller.create_one(client_id)
+        return MongoJSONResponse(content=verify_token,
+                                 status_code=verify_token['status_code'],
+                                 media_type="application/json; charset=UTF-8")
+    result: Dict = await controller.create_one(client_id)
     if 'failed' in result:
         if 'message' in result:
-            return JSONResponse(content=result,
-                                status_code=status.HTTP_400_BAD_REQUEST,
-                                media_type="application/json; charset=UTF-8")
-        return JSONResponse(content=result,
-                            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                            media_type="application/json; charset=UTF-8")
-    return JSONResponse(content=result,
-                        status_code=status.HTTP_201_CREATED,
-                        media_type="application/json; charset=UTF-8")
+            return MongoJSONResponse(content=result,
+                                     status_code=status.HTTP_400_BAD_REQUEST,
+                                     media_type="application/json; charset=UTF-8")
+        return MongoJSONResponse(content=result,
+                                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                                 media_type="application/json; charset=UTF-8")
+    return MongoJSONResponse(content=result,
+                             status_code=status.HTTP_201_CREATED,
+                             media_type="application/json; charset=UTF-8")
 
 
 @router.put("/add", response_model=Union[Success, Failed])
 async def add_item(item: AddItem,
-                   verify_token: VerifyTokenUser) -> Union[JSONResponse, Dict]:
+                   verify_token: VerifyTokenUser) -> Union[MongoJSONResponse, Dict]:
     if 'failed' in verify_token:
-        return JSONResponse(content=verify_token,
-                            status_code=verify_token['status_code'],
-                            media_type="application/json; charset=UTF-8")
-    result: Dict = controller.add_item(item)
+        return MongoJSONResponse(content=verify_token,
+                                 status_code=verify_token['status_code'],
+                                 media_type="application/json; charset=UTF-8")
+    result: Dict = await controller.add_item(item)
     if 'failed' in result:
         if '_id' in result:
-            return JSONResponse(content=result,
-                                status_code=status.HTTP_400_BAD_REQUEST,
-                                media_type="application/json; charset=UTF-8")
-        return JSONResponse(content=result,
-                            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                            media_type="application/json; charset=UTF-8")
-    return JSONResponse(content=result,
-                        media_type="application/json; charset=UTF-8")
+            return MongoJSONResponse(content=result,
+                                     status_code=status.HTTP_400_BAD_REQUEST,
+                                     media_type="application/json; charset=UTF-8")
+        return MongoJSONResponse(content=result,
+                                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                                 media_type="application/json; charset=UTF-8")
+    return MongoJSONResponse(content=result,
+                             media_type="application/json; charset=UTF-8")
 
 
 @router.put("/remove", response_model=Union[Success, Failed])
 async def remove_item(item: RemoveItem,
-                      verify_token: VerifyTokenUser) -> Union[JSONResponse, Dict]:
+                      verify_token: VerifyTokenUser) -> Union[MongoJSONResponse, Dict]:
     if 'failed' in verify_token:
-        return JSONResponse(content=verify_token,
-                            status_code=verify_token['status_code'],
-                            media_type="application/json; charset=UTF-8")
-    result: Dict = controller.remove_item(item)
+        return MongoJSONResponse(content=verify_token,
+                                 status_code=verify_token['status_code'],
+                                 media_type="application/json; charset=UTF-8")
+    result: Dict = await controller.remove_item(item)
     if 'failed' in result:
-        return JSONResponse(content=result,
-                            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                            media_type="application/json; charset=UTF-8")
-    return JSONResponse(content=result,
-                        media_type="application/json; charset=UTF-8")
+        if '_id' in result:
+            return MongoJSONResponse(content=result,
+                                     status_code=status.HTTP_404_NOT_FOUND,
+                                     media_type="application/json; charset=UTF-8")
+        return MongoJSONResponse(content=result,
+                                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                                 media_type="application/json; charset=UTF-8")
+    return MongoJSONResponse(content=result,
+                             media_type="application/json; charset=UTF-8")
 
 
 @router.put("/status", response_model=Union[Success, Failed])
 async def change_status(cart_status: ChangeStatus,
-                        verify_token: VerifyTokenUser) -> Union[JSONResponse, Dict]:
+                        verify_token: VerifyTokenUser) -> Union[MongoJSONResponse, Dict]:
     if 'failed' in verify_token:
-        return JSONResponse(content=verify_token,
-                            status_code=verify_token['status_code'],
-                            media_type="application/json; charset=UTF-8")
-    result: Dict = controller.change_status(cart_status)
+        return MongoJSONResponse(content=verify_token,
+                                 status_code=verify_token['status_code'],
+                                 media_type="application/json; charset=UTF-8")
+    result: Dict = await controller.change_status(cart_status)
     if 'failed' in result:
-        return JSONResponse(content=result,
-                            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                            media_type="application/json; charset=UTF-8")
-    return JSONResponse(content=result,
-                        media_type="application/json; charset=UTF-8")
+        return MongoJSONResponse(content=result,
+                                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                                 media_type="application/json; charset=UTF-8")
+    return MongoJSONResponse(content=result,
+                             media_type="application/json; charset=UTF-8")
 
 
 @router.delete("/", response_model=Union[Success, Failed])
@@ -138,24 +221,40 @@ async def delete_one_order_by_id(order_id: Annotated[str | None, Query(regex=r'^
                                                                        description='mongodb _id must be valid'
                                                                        )],
                                  verify_token: VerifyTokenUser) \
-        -> Union[JSONResponse, Dict]:
+        -> Union[MongoJSONResponse, Dict]:
     if 'failed' in verify_token:
-        return JSONResponse(content=verify_token,
-                            status_code=verify_token['status_code'],
-                            media_type="application/json; charset=UTF-8")
+        return MongoJSONResponse(content=verify_token,
+                                 status_code=verify_token['status_code'],
+                                 media_type="application/json; charset=UTF-8")
     if order_id:
-        result: Dict = controller.delete_one_by_id(order_id)
+        result: Dict = await controller.delete_one_by_id(order_id)
         if 'failed' in result:
             if '_id' in result:
-                return JSONResponse(content=result,
-                                    status_code=status.HTTP_404_NOT_FOUND,
-                                    media_type="application/json; charset=UTF-8")
-            return JSONResponse(content=result,
-                                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                                media_type="application/json; charset=UTF-8")
-        return JSONResponse(content=result,
-                            media_type="application/json; charset=UTF-8")
+                return MongoJSONResponse(content=result,
+                                         status_code=status.HTTP_404_NOT_FOUND,
+                                         media_type="application/json; charset=UTF-8")
+            return MongoJSONResponse(content=result,
+                                     status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                                     media_type="application/json; charset=UTF-8")
+        return MongoJSONResponse(content=result,
+                                 media_type="application/json; charset=UTF-8")
     result: Dict = {'failed': 'parameter client_id must be given'}
-    return JSONResponse(content=result,
-                        status_code=status.HTTP_400_BAD_REQUEST,
-                        media_type="application/json; charset=UTF-8")
+    return MongoJSONResponse(content=result,
+                             status_code=status.HTTP_400_BAD_REQUEST,
+                             media_type="application/json; charset=UTF-8")
+
+
+@router.delete("/many", response_model=Union[Success, Failed])
+async def delete_many_orders_by_ids(order_ids: OrderIds,
+                                    verify_token: VerifyTokenUser) -> Union[MongoJSONResponse, Dict]:
+    if 'failed' in verify_token:
+        return MongoJSONResponse(content=verify_token,
+                                 status_code=verify_token['status_code'],
+                                 media_type="application/json; charset=UTF-8")
+    result: Dict = await controller.delete_many_by_ids(order_ids)
+    if 'failed' in result:
+        return MongoJSONResponse(content=result,
+                                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                                 media_type="application/json; charset=UTF-8")
+    return MongoJSONResponse(content=result,
+                             media_type="application/json; charset=UTF-8")
@@ -1,10 +1,12 @@
 from typing import Dict, Annotated, List, Union, Optional
-from fastapi.responses import JSONResponse
-from fastapi import APIRouter, Query, Response, status
+from fastapi.responses import StreamingResponse
+from fastapi import APIRouter, Query, Header, Response, status
 from controllers import ProductsController
-from models import Product, ProductUpdate, ProductResponse, Failed, Success, ProductQuery
-from serializers import ProductSerializer
+from models import Product, ProductUpdate, ProductResponse, Failed, Success, ProductQuery, StreamFormat, MAX_PAGE_SIZE
+from serializers import MongoJSONResponse, stream_documents, next_page_headers, MEDIA_TYPES
+from serializers import validator_headers, is_not_modified, not_modified_response
 from dependencies import VerifyTokenUser
+from cache import AUTOCOMPLETE_MAX_RESULTS
 import numpy as np
 
 router: APIRouter = APIRouter(
@@ -14,49 +16,86 @@ router: APIRouter = APIRouter(
 )
 
 controller: ProductsController = ProductsController()
-serializer: ProductSerializer = ProductSerializer()
 
 
 @router.get("/all", response_model=list[ProductResponse] | Failed)
-async def get_all_products(verify_token: VerifyTokenUser) -> Union[JSONResponse, Dict]:
+async def get_all_products(verify_token: VerifyTokenUser,
+                           limit: Annotated[Optional[int], Query(gt=0, le=MAX_PAGE_SIZE)] = None,
+                           after: Annotated[Optional[str], Query(regex=r'^[a-f0-9]{24}$',
+                                                                 title='mongodb _id',
+                                                                 description='last _id of the previous page'
+                                                                 )] = None,
+                           stream: Optional[StreamFormat] = None) -> Union[MongoJSONResponse, Dict]:
     if 'failed' in verify_token:
-        return JSONResponse(content=verify_token,
-                            status_code=verify_token['status_code'],
-                            media_type="application/json; charset=UTF-8")
-    result: List[Dict] | Dict = controller.get_all()
+        return MongoJSONResponse(content=verify_token,
+                                 status_code=verify_token['status_code'],
+                                 media_type="application/json; charset=UTF-8")
+    if stream:
+        return StreamingResponse(stream_documents(controller.find_all(limit, after), stream),
+                                 media_type=MEDIA_TYPES[stream])
+    result: List[Dict] | Dict = await controller.get_all(limit, after)
     if 'failed' in result:
-        return JSONResponse(content=result,
-                            status_code=status.HTTP_404_NOT_FOUND,
-                            media_type="application/json; charset=UTF-8")
-    result: List[Dict] = serializer.serialize_all(result)
-    return JSONResponse(content=result,
-                        media_type="application/json; charset=UTF-8")
+        return MongoJSONResponse(content=result,
+                                 status_code=status.HTTP_404_NOT_FOUND,
+                                 media_type="application/json; charset=UTF-8")
+    return MongoJSONResponse(content=result,
+                             headers=next_page_headers(result, limit),
+                             media_type="application/json; charset=UTF-8")
 
 
 @router.get("/many")
 async def get_many_products(verify_token: VerifyTokenUser,
+                            search: Optional[str] = None,
                             name: Optional[str] = None,
                             description: Optional[str] = None,
                             brand: Optional[str] = None,
                             min_price: Annotated[Optional[float], Query(gt=0)] = None,
                             max_price: Annotated[Optional[float], Query(gt=0)] = None):
     if 'failed' in verify_token:
-        return JSONResponse(content=verify_token,
-                            status_code=verify_token['status_code'],
-                            media_type="application/json; charset=UTF-8")
-    query: ProductQuery = ProductQuery(**{'name': name,
+        return MongoJSONResponse(content=verify_token,
+                                 status_code=verify_token['status_code'],
+                                 media_type="application/json; charset=UTF-8")
+    query: ProductQuery = ProductQuery(**{'search': search,
+                                          'name': name,
                                           'description': description,
                                           'brand': brand,
                                           'max_price': max_price,
                                           'min_price': min_price})
-    result: Dict = controller.get_many(query)
+    result: Dict = await controller.get_many(query)
     if 'failed' in result:
-        return JSONResponse(content=result,
-                            status_code=status.HTTP_404_NOT_FOUND,
-                            media_type="application/json; charset=UTF-8")
-    result: List[Dict] = serializer.serialize_all(result)
-    return JSONResponse(content=result,
-                        media_type="application/json; charset=UTF-8")
+        return MongoJSONResponse(content=result,
+                                 status_code=status.HTTP_404_NOT_FOUND,
+                                 media_type="application/json; charset=UTF-8")
+    return MongoJSONResponse(content=result,
+                             media_type="application/json; charset=UTF-8")
+
+
+@router.get("/autocomplete")
+async def autocomplete_products(verify_token: VerifyTokenUser,
+                                prefix: Annotated[str, Query(min_length=1, max_length=100)],
+                                limit: Annotated[int, Query(gt=0, le=100)] = AUTOCOMPLETE_MAX_RESULTS):
+    if 'failed' in verify_token:
+        return MongoJSONResponse(content=verify_token,
+                                 status_code=verify_token['status_code'],
+                                 media_type="application/json; charset=UTF-8")
+    result: List[Dict] | Dict = await controller.autocomplete(prefix, limit)
+    if 'failed' in result:
+        return MongoJSONResponse(content=result,
+                                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                                 media_type="application/json; charset=UTF-8")
+    return MongoJSONResponse(content=result,
+                             media_type="application/json; charset=UTF-8")
+
+
+@router.get("/cache/stats")
+async def get_products_cache_stats(verify_token: VerifyTokenUser):
+    if 'failed' in verify_token:
+        return MongoJSONResponse(content=verify_token,
+                                 status_code=verify_token['status_code'],
+                                 media_type="application/json; charset=UTF-8")
+    result: Dict = await controller.cache_stats()
+    return MongoJSONResponse(content=result,
+                             media_type="application/json; charset=UTF-8")
 
 
 @router.get("/", response_model=ProductResponse | Failed)
@@ -64,67 +103,75 @@ async def get_one_product_by_id(product_id: Annotated[str | None, Query(regex=r'
                                                                         title='mongodb _id',
                                                                         description='mongodb _id must be valid'
                                                                         )],
-                                verify_token: VerifyTokenUser) \
-        -> Union[JSONResponse, Dict]:
+                                verify_token: VerifyTokenUser,
+                                if_none_match: Annotated[Optional[str], Header()] = None,
+                                if_modified_since: Annotated[Optional[str], Header()] = None) \
+        -> Union[MongoJSONResponse, Dict]:
     if 'failed' in verify_token:
-        return JSONResponse(content=verify_token,
-                            status_code=verify_token['status_code'],
-                            media_type="application/json; charset=UTF-8")
+        return MongoJSONResponse(content=verify_token,
+                                 status_code=verify_token['status_code'],
+                                 media_type="application/json; charset=UTF-8")
     if product_id:
-        result: Dict = controller.get_one_by_id(product_id)
+        if if_none_match or if_modified_since:
+            version: Dict = await controller.get_last_modified(product_id)
+            if 'failed' not in version:
+                headers: Dict[str, str] = validator_headers(version)
+                if is_not_modified(headers, if_none_match, if_modified_since):
+                    return not_modified_response(headers)
+        result: Dict = await controller.get_one_by_id(product_id)
         if 'failed' in result:
-            return JSONResponse(content=result,
-                                status_code=status.HTTP_404_NOT_FOUND,
-                                media_type="application/json; charset=UTF-8")
-        result: Dict = serializer.serialize_one(result)
-        return JSONResponse(content=result,
-                            media_type="application/json; charset=UTF-8")
+            return MongoJSONResponse(content=result,
+                                     status_code=status.HTTP_404_NOT_FOUND,
+                                     media_type="application/json; charset=UTF-8")
+        return MongoJSONResponse(content=result,
+                                 headers=validator_headers(result),
+                                 media_type="application/json; charset=UTF-8")
     result: Dict = {'failed': 'parameter product_id must be given'}
-    return JSONResponse(content=result,
-                        status_code=status.HTTP_400_BAD_REQUEST,
-                        media_type="application/json; charset=UTF-8")
+    return MongoJSONResponse(content=result,
+                             status_code=status.HTTP_400_BAD_REQUEST,
+                             media_type="application/json; charset=UTF-8")
 
 
 @router.post("/", response_model=Union[Success, Failed])
 async def create_one_product(product: Product,
                              response: Response,
-                             verify_token: VerifyTokenUser) -> Union[JSONResponse, Dict]:
+                             verify_token: VerifyTokenUser) -> Union[MongoJSONResponse, Dict]:
     if 'failed' in verify_token:
-        return JSONResponse(content=verify_token,
-                            status_code=verify_token['status_code'],
-                            media_type="application/json; charset=UTF-8")
-    result: Dict = controller.create_one(product)
+        return MongoJSONResponse(content=verify_token,
+                                 status_code=verify_token['status_code'],
+                                 media_type="application/json; charset=UTF-8")
+    result: Dict = await controller.create_one(product)
     if 'failed' in result:
         if 'message' in result:
-            return JSONResponse(content=result,
-                                status_code=status.HTTP_400_BAD_REQUEST,
-                                media_type="application/json; charset=UTF-8")
-        return JSONResponse(content=result,
-                            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                            media_type="application/json; charset=UTF-8")
+            return MongoJSONResponse(content=result,
+                                     status_code=status.HTTP_400_BAD_REQUEST,
+                                     media_type="application/json; charset=UTF-8")
+        return MongoJSONResponse(content=result,
+                                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                                 media_type="application/json; charset=UTF-8")
     response.status_code = status.HTTP_201_CREATED
-    return JSONResponse(content=result,
-                        media_type="application/json; charset=UTF-8")
+    return MongoJSONResponse(content=result,
+                             media_type="application/json; charset=UTF-8")
 
 
 @router.put("/", response_model=Union[Success, Failed])
 async def update_one_product_by_id(updates: ProductUpdate,
-                                   verify_token: VerifyTokenUser) -> Union[JSONResponse, Dict]:
+                                   verify_token: VerifyTokenUser) -> Union[MongoJSONResponse, Dict]:
     if 'failed' in verify_token:
-        return JSONResponse(content=verify_token,
-                            status_code=verify_token['status_code'],
-                            media_type="application/json; charset=UTF-8")
-    result: Dict = controller.update_one_by_id(updates)
+        return MongoJSONResponse(content=verify_token,
+                                 status_code=verify_token['status_code'],
+                                 media_type="application/json; charset=UTF-8")
+    result: Dict = await controller.update_one_by_id(updates)
     if 'failed' in result:
         if 'message' in result:
-            return JSONResponse(content=result,
-                                status_code=status.HTTP_400_BAD_REQUEST,
-                                media_type="application/json; charset=UTF-8")
-        return JSONResponse(content=result,
-                            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                            media_type="application/json; charset=UTF-8")
-    return JSONResponse(content=result,
-                        media_type="application/json; charset=UTF-8")
+            return MongoJSONResponse(content=result,
+                                     status_code=status.HTTP_400_BAD_REQUEST,
+                                     media_type="application/json; charset=UTF-8")
+        return MongoJSONResponse(content=result,
+                                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                                 media_type="application/json; charset=UTF-8")
+    return MongoJSONResponse(content=result,
+                             media_type="application/json; charset=UTF-8")
 
 
 @router.delete("/", response_model=Union[Success, Failed])
@@ -133,24 +180,24 @@ async def delete_one_product_by_id(product_id: Annotated[str | None, Query(regex
                                                                            description='mongodb _id must be valid'
                                                                            )],
                                    verify_token: VerifyTokenUser) \
-        -> Union[JSONResponse, Dict]:
+        -> Union[MongoJSONResponse, Dict]:
     if 'failed' in verify_token:
-        return JSONResponse(content=verify_token,
-                            status_code=verify_token['status_code'],
-                            media_type="application/json; charset=UTF-8")
+        return MongoJSONResponse(content=verify_token,
+                                 status_code=verify_token['status_code'],
+                                 media_type="application/json; charset=UTF-8")
     if product_id:
-        result: Dict = controller.delete_one_by_id(product_id)
+        result: Dict = await controller.delete_one_by_id(product_id)
         if 'failed' in result:
             if 'message' in result:
-                return JSONResponse(content=result,
-                                    status_code=status.HTTP_400_BAD_REQUEST,
-                                    media_type="application/json; charset=UTF-8")
-            return JSONResponse(content=result,
-                                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                                media_type="application/json; charset=UTF-8")
-        return JSONResponse(content=result,
-                            media_type="application/json; charset=UTF-8")
+                return MongoJSONResponse(content=result,
+                                         status_code=status.HTTP_400_BAD_REQUEST,
+                                         media_type="application/json; charset=UTF-8")
+            return MongoJSONResponse(content=result,
+                                     status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                                     media_type="application/json; charset=UTF-8")
+        return MongoJSONResponse(content=result,
+                                 media_type="application/json; charset=UTF-8")
     result: Dict = {'failed': 'parameter product_id must be given'}
-    return JSONResponse(content=result,
-                        status_code=status.HTTP_400_BAD_REQUEST,
-                        media_type="application/json; charset=UTF-8")
+    return MongoJSONResponse(content=result,
+                             status_code=status.HTTP_400_BAD_REQUEST,
+                             media_type="application/json; charset=UTF-8")
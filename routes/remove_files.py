@@ -1,8 +1,9 @@
 from typing import Annotated, Optional
 import os
 from fastapi import APIRouter, Query, status
-from fastapi.responses import JSONResponse
+from serializers import MongoJSONResponse
 from controllers import UploadsController
+from utils import image_pipeline
 from dotenv import load_dotenv, find_dotenv
 
 load_dotenv(find_dotenv())
@@ -21,6 +22,10 @@ URL_STATIC_PHOTOS_CLIENTS = os.environ.get("URL_STATIC_PHOTOS_CLIENTS")
 
 FILENAME_LENGTH = os.environ.get("FILENAME_LENGTH")
 
+PHOTOS_DIRECTORY_CLIENTS = os.path.join(os.getcwd(), 'static', 'clients', 'photos')
+
+PHOTOS_DIRECTORY_PRODUCTS = os.path.join(os.getcwd(), 'static', 'products', 'photos')
+
 regex_url_photo_client: str = \
     fr'^[{URL_STATIC_PHOTOS_CLIENTS}]{1}/[0-9A-Za-z]{FILENAME_LENGTH}.[png|jpeg|jpg|bmp|tiff]$'
 
@@ -37,13 +42,16 @@ async def remove_photo_client(url_file: Annotated[Optional[str], Query(regex=reg
                                                                         title='mongodb _id',
                                                                         description='mongodb _id must be valid'
                                                                         )]):
-    result = controller.remove_photo_client(url_file, client_id)
+    result = await controller.remove_photo_client(client_id, url_file)
     if 'failed' in result:
-        return JSONResponse(content=result,
-                            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                            media_type="application/json; charset=UTF-8")
-    JSONResponse(content=result,
-                 media_type="application/json; charset=UTF-8")
+        return MongoJSONResponse(content=result,
+                                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                                 media_type="application/json; charset=UTF-8")
+    if result['quantity']:
+        # the photo was on the document: its file and the variants made from it go too
+        await image_pipeline.remove(os.path.join(PHOTOS_DIRECTORY_CLIENTS, os.path.basename(url_file)))
+    return MongoJSONResponse(content=result,
+                             media_type="application/json; charset=UTF-8")
 
 
 @router.post("/products")
@@ -55,10 +63,12 @@ async def remove_photo_product(url_file: Annotated[Optional[str], Query(regex=re
                                                                           title='mongodb _id',
                                                                           description='mongodb _id must be valid'
                                                                           )]):
-    result = controller.remove_photo_product(url_file, product_id)
+    result = await controller.remove_photo_product(product_id, url_file)
     if 'failed' in result:
-        return JSONResponse(content=result,
-                            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                            media_type="application/json; charset=UTF-8")
-    JSONResponse(content=result,
-                 media_type="application/json; charset=UTF-8")
+        return MongoJSONResponse(content=result,
+                                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                                 media_type="application/json; charset=UTF-8")
+    if result['quantity']:
+        await image_pipeline.remove(os.path.join(PHOTOS_DIRECTORY_PRODUCTS, os.path.basename(url_file)))
+    return MongoJSONResponse(content=result,
+                             media_type="application/json; charset=UTF-8")
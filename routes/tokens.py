@@ -1,6 +1,6 @@
 from typing import Dict
 from fastapi import APIRouter, status
-from starlette.responses import JSONResponse
+from serializers import MongoJSONResponse
 from models import ClientAuth, UserAuth
 from controllers import TokensController
 import os
@@ -22,25 +22,25 @@ controller: TokensController = TokensController()
 
 
 @router.post("/clients", response_model=None)
-async def create_token_client(client: ClientAuth) -> JSONResponse:
-    result: Dict = controller.create_token_client(client)
+async def create_token_client(client: ClientAuth) -> MongoJSONResponse:
+    result: Dict = await controller.create_token_client(client)
     if 'failed' in result:
-        return JSONResponse(content=result,
-                            status_code=status.HTTP_400_BAD_REQUEST,
-                            media_type="application/json; charset=UTF-8")
-    return JSONResponse(content=result,
-                        status_code=status.HTTP_201_CREATED,
-                        media_type="application/json; charset=UTF-8")
+        return MongoJSONResponse(content=result,
+                                 status_code=status.HTTP_400_BAD_REQUEST,
+                                 media_type="application/json; charset=UTF-8")
+    return MongoJSONResponse(content=result,
+                             status_code=status.HTTP_201_CREATED,
+                             media_type="application/json; charset=UTF-8")
 
 
 @router.post("/users", response_model=None)
-async def create_token_client(user: UserAuth) -> JSONResponse:
+async def create_token_client(user: UserAuth) -> MongoJSONResponse:
     user: Dict = user.to_dict()
-    result: Dict = controller.create_token_user(user)
+    result: Dict = await controller.create_token_user(user)
     if 'failed' in result:
-        return JSONResponse(content=result,
-                            status_code=status.HTTP_400_BAD_REQUEST,
-                            media_type="application/json; charset=UTF-8")
-    return JSONResponse(content=result,
-                        status_code=status.HTTP_201_CREATED,
-                        media_type="application/json; charset=UTF-8")
+        return MongoJSONResponse(content=result,
+                                 status_code=status.HTTP_400_BAD_REQUEST,
+                                 media_type="application/json; charset=UTF-8")
+    return MongoJSONResponse(content=result,
+                             status_code=status.HTTP_201_CREATED,
+                             media_type="application/json; charset=UTF-8")
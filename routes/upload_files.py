@@ -1,12 +1,14 @@
 from typing import Annotated, Optional, Dict
 import os
-from pathlib import Path
-from fastapi import APIRouter, UploadFile, Query, status
-from fastapi.responses import JSONResponse
-from utils import generate_random_string
+import time
+from functools import partial
+from fastapi import APIRouter, Query, Request, status
+from serializers import MongoJSONResponse
+from utils import photo_uploader, image_pipeline
 from controllers import UploadsController
 from dotenv import load_dotenv, find_dotenv
 from dependencies import VerifyTokenUser
+from metrics import upload_counter
 
 load_dotenv(find_dotenv())
 
@@ -20,13 +22,20 @@ URL_STATIC_PHOTOS_PRODUCTS = os.environ.get("URL_STATIC_PHOTOS_PRODUCTS")
 
 URL_STATIC_PHOTOS_CLIENTS = os.environ.get("URL_STATIC_PHOTOS_CLIENTS")
 
-FILENAME_LENGTH = os.environ.get("FILENAME_LENGTH")
+FILENAME_LENGTH = int(os.environ.get("FILENAME_LENGTH", 24))
+
+# the body is parsed from the request stream, so it is described here for the docs
+PHOTO_BODY: Dict = {'requestBody': {'required': True,
+                                    'content': {'multipart/form-data': {'schema': {
+                                        'type': 'object',
+                                        'required': ['file'],
+                                        'properties': {'file': {'type': 'string', 'format': 'binary'}}}}}}}
 
 controller: UploadsController = UploadsController()
 
 
-@router.post("/clients")
-async def upload_photo_client(file: UploadFile,
+@router.post("/clients", openapi_extra=PHOTO_BODY)
+async def upload_photo_client(request: Request,
                               client_id: Annotated[Optional[str], Query(regex=r'^[a-f0-9]{24}$',
                                                                         title='mongodb _id',
                                                                         description='mongodb _id must be valid'
@@ -34,72 +43,63 @@ async def upload_photo_client(file: UploadFile,
                               verify_token: VerifyTokenUser,
                               ):
     if 'failed' in verify_token:
-        return JSONResponse(content=verify_token,
-                            status_code=verify_token['status_code'],
-                            media_type="application/json; charset=UTF-8")
-    if 'image' in file.content_type:
-        current_dir: str = os.getcwd()
-        static_dir_clients: str = os.path.join(current_dir,
-                                               'static',
-                                               'clients',
-                                               'photos')
-        os.makedirs(static_dir_clients, exist_ok=True)
-        target_dir: Path = Path(static_dir_clients)
-        ext: str = file.filename.split('.')[-1]
-        random_name: str = generate_random_string(FILENAME_LENGTH)
-        filename: str = f'{random_name}.{ext}'
-        target_path: Path = target_dir / filename
-        result: Dict = controller.upload_photo_client(client_id,
-                                                      f'{URL_STATIC_PHOTOS_CLIENTS}/{filename}')
-        if 'failed' in result:
-            return JSONResponse(content=result,
-                                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                                media_type="application/json; charset=UTF-8")
-        with target_path.open("wb") as destination:
-            while chunk := await file.read(1024):
-                destination.write(chunk)
-        return JSONResponse(content=result,
-                            status_code=status.HTTP_201_CREATED,
-                            media_type="application/json; charset=UTF-8")
-    result = {'failed': 'only image files are supported'}
-    return JSONResponse(content=result,
-                        status_code=status.HTTP_400_BAD_REQUEST,
-                        media_type="application/json; charset=UTF-8")
+        return MongoJSONResponse(content=verify_token,
+                                 status_code=verify_token['status_code'],
+                                 media_type="application/json; charset=UTF-8")
+    started: float = time.perf_counter()
+    stored: Dict = await photo_uploader.save(request,
+                                             os.path.join(os.getcwd(), 'static', 'clients', 'photos'),
+                                             FILENAME_LENGTH)
+    if 'failed' in stored:
+        return MongoJSONResponse(content=stored,
+                                 status_code=stored['status_code'],
+                                 media_type="application/json; charset=UTF-8")
+    upload_counter.observe('clients', stored['size'], started)
+    photo_url: str = f"{URL_STATIC_PHOTOS_CLIENTS}/{stored['filename']}"
+    result: Dict = await controller.upload_photo_client(client_id, photo_url)
+    if 'failed' in result:
+        await photo_uploader.remove(stored['path'])
+        return MongoJSONResponse(content=result,
+                                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                                 media_type="application/json; charset=UTF-8")
+    # thumbnail, medium and full copies are made in the background and added to the document
+    image_pipeline.submit(stored['path'], URL_STATIC_PHOTOS_CLIENTS,
+                          partial(controller.upload_photo_variants_client, client_id, photo_url))
+    return MongoJSONResponse(content=result,
+                             status_code=status.HTTP_201_CREATED,
+                             media_type="application/json; charset=UTF-8")
 
 
-@router.post("/products")
-async def upload_photo_product(file: UploadFile,
+@router.post("/products", openapi_extra=PHOTO_BODY)
+async def upload_photo_product(request: Request,
                                product_id: Annotated[Optional[str], Query(regex=r'^[a-f0-9]{24}$',
                                                                           title='mongodb _id',
                                                                           description='mongodb _id must be valid'
                                                                           )],
                                verify_token: VerifyTokenUser):
     if 'failed' in verify_token:
-        return JSONResponse(content=verify_token,
-                            status_code=verify_token['status_code'],
-                            media_type="application/json; charset=UTF-8")
-    if 'image' in file.content_type:
-        current_dir: str = os.getcwd()
-        static_dir_products: str = os.path.join(current_dir, 'static', 'products', 'photos')
-        os.makedirs(static_dir_products, exist_ok=True)
-        target_dir: Path = Path(static_dir_products)
-        ext: str = file.filename.split('.')[-1]
-        random_name: str = generate_random_string(24)
-        filename: str = f'{random_name}.{ext}'
-        target_path: Path = target_dir / filename
-        result: Dict = controller.upload_photo_product(product_id,
-                                                       f'{URL_STATIC_PHOTOS_PRODUCTS}/{filename}')
-        if 'failed' in result:
-            return JSONResponse(content=result,
-                                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                                media_type="application/json; charset=UTF-8")
-        with target_path.open("wb") as destination:
-            while chunk := await file.read(1024):
-                destination.write(chunk)
-        return JSONResponse(content=result,
-                            status_code=status.HTTP_201_CREATED,
-                            media_type="application/json; charset=UTF-8")
-    result = {'failed': 'only image files are supported'}
-    return JSONResponse(content=result,
-                        status_code=status.HTTP_400_BAD_REQUEST,
-                        media_type="application/json; charset=UTF-8")
+        return MongoJSONResponse(content=verify_token,
+                                 status_code=verify_token['status_code'],
+                                 media_type="application/json; charset=UTF-8")
+    started: float = time.perf_counter()
+    stored: Dict = await photo_uploader.save(request,
+                                             os.path.join(os.getcwd(), 'static', 'products', 'photos'),
+                                             FILENAME_LENGTH)
+    if 'failed' in stored:
+        return MongoJSONResponse(content=stored,
+                                 status_code=stored['status_code'],
+                                 media_type="application/json; charset=UTF-8")
+    upload_counter.observe('products', stored['size'], started)
+    photo_url: str = f"{URL_STATIC_PHOTOS_PRODUCTS}/{stored['filename']}"
+    result: Dict = await controller.upload_photo_product(product_id, photo_url)
+    if 'failed' in result:
+        await photo_uploader.remove(stored['path'])
+        return MongoJSONResponse(content=result,
+                                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                                 media_type="application/json; charset=UTF-8")
+    # thumbnail, medium and full copies are made in the background and added to the document
+    image_pipeline.submit(stored['path'], URL_STATIC_PHOTOS_PRODUCTS,
+                          partial(controller.upload_photo_variants_product, product_id, photo_url))
+    return MongoJSONResponse(content=result,
+                             status_code=status.HTTP_201_CREATED,
+                             media_type="application/json; charset=UTF-8")
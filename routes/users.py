@@ -1,9 +1,9 @@
 from typing import List, Dict, Annotated, Union, Optional
-from fastapi.responses import JSONResponse
+from fastapi.responses import StreamingResponse
 from controllers import UsersController
-from models import User, UserUpdate, UserResponse, Failed, Success, Data, UserQuery
+from models import User, UserUpdate, UserResponse, Failed, Success, Data, UserQuery, StreamFormat, MAX_PAGE_SIZE
 from fastapi import APIRouter, Query, status
-from serializers import UserSerializer
+from serializers import MongoJSONResponse, stream_documents, next_page_headers, MEDIA_TYPES
 from dependencies import VerifyTokenUser
 
 router: APIRouter = APIRouter(
@@ -13,33 +13,31 @@ router: APIRouter = APIRouter(
 )
 
 controller: UsersController = UsersController()
-serializer: UserSerializer = UserSerializer()
 
 
 @router.get("/me", response_model=UserResponse | Failed)
 async def get_user_me(verify_token: VerifyTokenUser) \
-        -> Union[JSONResponse, Dict]:
+        -> Union[MongoJSONResponse, Dict]:
     if 'failed' in verify_token:
-        return JSONResponse(content=verify_token,
-                            status_code=verify_token['status_code'],
-                            media_type="application/json; charset=UTF-8")
+        return MongoJSONResponse(content=verify_token,
+                                 status_code=verify_token['status_code'],
+                                 media_type="application/json; charset=UTF-8")
     if verify_token['user_id']:
-        result: Dict = controller.get_one_by_id(verify_token['user_id'])
+        result: Dict = await controller.get_one_by_id(verify_token['user_id'])
         if 'failed' in result:
             if '_id' in result:
-                return JSONResponse(content=result,
-                                    status_code=status.HTTP_404_NOT_FOUND,
-                                    media_type="application/json; charset=UTF-8")
-            return JSONResponse(content=result,
-                                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                                media_type="application/json; charset=UTF-8")
-        result: Dict = serializer.serialize_one(result)
-        return JSONResponse(content=result,
-                            media_type="application/json; charset=UTF-8")
+                return MongoJSONResponse(content=result,
+                                         status_code=status.HTTP_404_NOT_FOUND,
+                                         media_type="application/json; charset=UTF-8")
+            return MongoJSONResponse(content=result,
+                                     status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                                     media_type="application/json; charset=UTF-8")
+        return MongoJSONResponse(content=result,
+                                 media_type="application/json; charset=UTF-8")
     result: Dict = {'failed': 'parameter user_id must be given'}
-    return JSONResponse(content=result,
-                        status_code=status.HTTP_400_BAD_REQUEST,
-                        media_type="application/json; charset=UTF-8")
+    return MongoJSONResponse(content=result,
+                             status_code=status.HTTP_400_BAD_REQUEST,
+                             media_type="application/json; charset=UTF-8")
 
 
 @router.get("/", response_model=UserResponse | Failed)
@@ -50,44 +48,53 @@ async def get_one_user_by_id(user_id: Annotated[str | None, Query(regex=r'^[a-f0
                              verify_token: VerifyTokenUser
 
                              ) \
-        -> Union[JSONResponse, Dict]:
+        -> Union[MongoJSONResponse, Dict]:
     if 'failed' in verify_token:
-        return JSONResponse(content=verify_token,
-                            status_code=verify_token['status_code'],
-                            media_type="application/json; charset=UTF-8")
+        return MongoJSONResponse(content=verify_token,
+                                 status_code=verify_token['status_code'],
+                                 media_type="application/json; charset=UTF-8")
     if user_id:
-        result: Dict = controller.get_one_by_id(user_id)
+        result: Dict = await controller.get_one_by_id(user_id)
         if 'failed' in result:
             if '_id' in result:
-                return JSONResponse(content=result,
-                                    status_code=status.HTTP_404_NOT_FOUND,
-                                    media_type="application/json; charset=UTF-8")
-            return JSONResponse(content=result,
-                                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                                media_type="application/json; charset=UTF-8")
-        result: Dict = serializer.serialize_one(result)
-        return JSONResponse(content=result,
-                            media_type="application/json; charset=UTF-8")
+                return MongoJSONResponse(content=result,
+                                         status_code=status.HTTP_404_NOT_FOUND,
+                                         media_type="application/json; charset=UTF-8")
+            return MongoJSONResponse(content=result,
+                                     status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                                     media_type="application/json; charset=UTF-8")
+        return MongoJSONResponse(content=result,
+                                 media_type="application/json; charset=UTF-8")
     result: Dict = {'failed': 'parameter user_id must be given'}
-    return JSONResponse(content=result,
-                        status_code=status.HTTP_400_BAD_REQUEST,
-                        media_type="application/json; charset=UTF-8")
+    return MongoJSONResponse(content=result,
+                             status_code=status.HTTP_400_BAD_REQUEST,
+                             media_type="application/json; charset=UTF-8")
 
 
 @router.get("/all", response_model=list[UserResponse] | Failed)
-async def get_all_users(verify_token: VerifyTokenUser) -> Union[JSONResponse, Dict]:
+async def get_all_users(verify_token: VerifyTokenUser,
+                        limit: Annotated[Optional[int], Query(gt=0, le=MAX_PAGE_SIZE)] = None,
+                        after: Annotated[Optional[str], Query(regex=r'^[a-f0-9]{24}$',
+                                                              title='mongodb _id',
+                                                              description='last _id of the previous page'
+                                                              )] = None,
+                        stream: Optional[StreamFormat] = None) -> Union[MongoJSONResponse, Dict]:
     if 'failed' in verify_token:
-        return JSONResponse(content=verify_token,
-                            status_code=verify_token['status_code'],
-                            media_type="application/json; charset=UTF-8")
-    result: List[Dict] | Dict = controller.get_all()
+        return MongoJSONResponse(content=verify_token,
+                                 status_code=verify_token['status_code'],
+                                 media_type="application/json; charset=UTF-8")
+    if stream:
+        return StreamingResponse(stream_documents(controller.find_all(limit, after),
+                                                  stream),
+                                 media_type=MEDIA_TYPES[stream])
+    result: List[Dict] | Dict = await controller.get_all(limit, after)
     if 'failed' in result:
-        return JSONResponse(content=result,
-                            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                            media_type="application/json; charset=UTF-8")
-    result: List[Dict] = serializer.serialize_all(result)
-    return JSONResponse(content=result,
-                        media_type="application/json; charset=UTF-8")
+        return MongoJSONResponse(content=result,
+                                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                                 media_type="application/json; charset=UTF-8")
+    return MongoJSONResponse(content=result,
+                             headers=next_page_headers(result, limit),
+                             media_type="application/json; charset=UTF-8")
 
 
 @router.get("/many")
@@ -102,9 +109,9 @@ async def get_many_users(verify_token: VerifyTokenUser,
                          max_last_modified: Optional[Data] = None,
                          is_user: Optional[bool] = None):
     if 'failed' in verify_token:
-        return JSONResponse(content=verify_token,
-                            status_code=verify_token['status_code'],
-                            media_type="application/json; charset=UTF-8")
+        return MongoJSONResponse(content=verify_token,
+                                 status_code=verify_token['status_code'],
+                                 media_type="application/json; charset=UTF-8")
     query: UserQuery = UserQuery(**{'name': name,
                                     'email': email,
                                     'cpf': cpf,
@@ -114,50 +121,49 @@ async def get_many_users(verify_token: VerifyTokenUser,
                                     'min_last_modified': min_last_modified,
                                     'max_last_modified': max_last_modified,
                                     'is_user': is_user})
-    result: Dict = controller.get_many(query)
+    result: Dict = await controller.get_many(query)
     if 'failed' in result:
-        return JSONResponse(content=result,
-                            status_code=status.HTTP_404_NOT_FOUND,
-                            media_type="application/json; charset=UTF-8")
-    result: List[Dict] = serializer.serialize_all(result)
-    return JSONResponse(content=result,
-                        media_type="application/json; charset=UTF-8")
+        return MongoJSONResponse(content=result,
+                                 status_code=status.HTTP_404_NOT_FOUND,
+                                 media_type="application/json; charset=UTF-8")
+    return MongoJSONResponse(content=result,
+                             media_type="application/json; charset=UTF-8")
 
 
 @router.post("/", response_model=Union[Success, Failed])
-async def create_one_user(user: User) -> Union[JSONResponse, Dict]:
-    result: Dict = controller.create_one(user)
+async def create_one_user(user: User) -> Union[MongoJSONResponse, Dict]:
+    result: Dict = await controller.create_one(user)
     if 'failed' in result:
         if 'message' in result:
-            return JSONResponse(content=result,
-                                status_code=status.HTTP_400_BAD_REQUEST,
-                                media_type="application/json; charset=UTF-8")
-        return JSONResponse(content=result,
-                            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                            media_type="application/json; charset=UTF-8")
-    return JSONResponse(content=result,
-                        status_code=status.HTTP_201_CREATED,
-                        media_type="application/json; charset=UTF-8")
+            return MongoJSONResponse(content=result,
+                                     status_code=status.HTTP_400_BAD_REQUEST,
+                                     media_type="application/json; charset=UTF-8")
+        return MongoJSONResponse(content=result,
+                                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                                 media_type="application/json; charset=UTF-8")
+    return MongoJSONResponse(content=result,
+                             status_code=status.HTTP_201_CREATED,
+                             media_type="application/json; charset=UTF-8")
 
 
 @router.put("/", response_model=Union[Success, Failed])
 async def update_one_user_by_id(updates: UserUpdate,
-                                verify_token: VerifyTokenUser) -> Union[JSONResponse, Dict]:
+                                verify_token: VerifyTokenUser) -> Union[MongoJSONResponse, Dict]:
     if 'failed' in verify_token:
-        return JSONResponse(content=verify_token,
-                            status_code=verify_token['status_code'],
-                            media_type="application/json; charset=UTF-8")
-    result: Dict = controller.update_one_by_id(updates)
+        return MongoJSONResponse(content=verify_token,
+                                 status_code=verify_token['status_code'],
+                                 media_type="application/json; charset=UTF-8")
+    result: Dict = await controller.update_one_by_id(updates)
     if 'failed' in result:
         if 'message' in result:
-            return JSONResponse(content=result,
-                                status_code=status.HTTP_400_BAD_REQUEST,
-                                media_type="application/json; charset=UTF-8")
-        return JSONResponse(content=result,
-                            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                            media_type="application/json; charset=UTF-8")
-    return JSONResponse(content=result,
-                        media_type="application/json; charset=UTF-8")
+            return MongoJSONResponse(content=result,
+                                     status_code=status.HTTP_400_BAD_REQUEST,
+                                     media_type="application/json; charset=UTF-8")
+        return MongoJSONResponse(content=result,
+                                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                                 media_type="application/json; charset=UTF-8")
+    return MongoJSONResponse(content=result,
+                             media_type="application/json; charset=UTF-8")
 
 
 @router.delete("/", response_model=Union[Success, Failed])
@@ -166,24 +172,24 @@ async def delete_one_user_by_id(user_id: Annotated[str | None, Query(regex=r'^[a
                                                                      description='mongodb _id must be valid'
                                                                      )],
                                 verify_token: VerifyTokenUser) \
-        -> Union[JSONResponse, Dict]:
+        -> Union[MongoJSONResponse, Dict]:
     if 'failed' in verify_token:
-        return JSONResponse(content=verify_token,
-                            status_code=verify_token['status_code'],
-                            media_type="application/json; charset=UTF-8")
+        return MongoJSONResponse(content=verify_token,
+                                 status_code=verify_token['status_code'],
+                                 media_type="application/json; charset=UTF-8")
     if user_id:
-        result: Dict = controller.delete_one_by_id(user_id)
+        result: Dict = await controller.delete_one_by_id(user_id)
         if 'failed' in result:
             if '_id' in result:
-                return JSONResponse(content=result,
-                                    status_code=status.HTTP_404_NOT_FOUND,
-                                    media_type="application/json; charset=UTF-8")
-            return JSONResponse(content=result,
-                                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                                media_type="application/json; charset=UTF-8")
-        return JSONResponse(content=result,
-                            media_type="application/json; charset=UTF-8")
+                return MongoJSONResponse(content=result,
+                                         status_code=status.HTTP_404_NOT_FOUND,
+                                         media_type="application/json; charset=UTF-8")
+            return MongoJSONResponse(content=result,
+                                     status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                                     media_type="application/json; charset=UTF-8")
+        return MongoJSONResponse(content=result,
+                                 media_type="application/json; charset=UTF-8")
     result: Dict = {'failed': 'parameter user_id must be given'}
-    return JSONResponse(content=result,
-                        status_code=status.HTTP_400_BAD_REQUEST,
-                        media_type="application/json; charset=UTF-8")
+    return MongoJSONResponse(content=result,
+                             status_code=status.HTTP_400_BAD_REQUEST,
+                             media_type="application/json; charset=UTF-8")
@@ -1,4 +1,6 @@
-from .clients import create_clients_collection
+from .clients import create_clients_collection, update_clients_validator
 from .orders import create_orders_collection
-from .products import create_products_collection
+from .products import create_products_collection, create_products_search_index, \
+    update_products_validator
 from .users import create_users_collection
+from .indexes import INDEXES
@@ -1,6 +1,7 @@
 from typing import Dict
-from pymongo.collection import Collection
-from pymongo.database import Database
+from motor.motor_asyncio import AsyncIOMotorCollection, AsyncIOMotorDatabase
+from .photos import photo_variants_property
+from .indexes import CLIENTS_INDEXES
 
 clients_validator: Dict = {
     '$jsonSchema': {
@@ -56,6 +57,7 @@ clients_validator: Dict = {
                     'description': "Photos url",
                 }
             },
+            'photo_variants': photo_variants_property,
             'is_client': {
                 'bsonType': "bool",
                 'description': "is_client is required",
@@ -73,11 +75,17 @@ clients_validator: Dict = {
 }
 
 
-def create_clients_collection(database: Database) -> Collection:
-    clients: Collection = database.create_collection('clients',
-                                                     check_exists=False,
-                                                     validator=clients_validator
-                                                     )
-    clients.create_index("email", unique=True)
-    clients.create_index("cpf", unique=True)
+async def create_clients_collection(database: AsyncIOMotorDatabase) -> AsyncIOMotorCollection:
+    clients: AsyncIOMotorCollection = await database.create_collection('clients',
+                                                                       check_exists=False,
+                                                                       validator=clients_validator
+                                                                       )
+    await clients.create_indexes(CLIENTS_INDEXES)
     return clients
+
+
+async def update_clients_validator(database: AsyncIOMotorDatabase) -> None:
+    """
+    Apply the current validator to a clients collection created by an earlier version.
+    """
+    await database.command('collMod', 'clients', validator=clients_validator)
@@ -0,0 +1,54 @@
+"""
+Indexes of every collection. This registry is the single source of truth: new
+collections are created with it and `python -m database.manage_indexes` brings
+existing deployments in line with it.
+"""
+from typing import Dict, List
+from pymongo import IndexModel, ASCENDING, DESCENDING, TEXT
+
+PRODUCTS_TEXT_INDEX: IndexModel = IndexModel([("name", TEXT), ("description", TEXT)],
+                                             name="products_text",
+                                             weights={"name": 10, "description": 2},
+                                             default_language="portuguese")
+
+CLIENTS_INDEXES: List[IndexModel] = [
+    IndexModel([("email", ASCENDING)], unique=True),
+    IndexModel([("cpf", ASCENDING)], unique=True),
+    # /clients/many date filters
+    IndexModel([("created_at", ASCENDING)]),
+    IndexModel([("last_modified", ASCENDING)]),
+]
+
+PRODUCTS_INDEXES: List[IndexModel] = [
+    IndexModel([("name", ASCENDING)], unique=True),
+    PRODUCTS_TEXT_INDEX,
+    # /products/many price range, alone or with a brand substring matched on the index keys
+    IndexModel([("price", ASCENDING)]),
+    IndexModel([("brand", ASCENDING), ("price", ASCENDING)]),
+    # polling fallback of the cache watcher: products written since the last poll
+    IndexModel([("last_modified", ASCENDING)]),
+]
+
+ORDERS_INDEXES: List[IndexModel] = [
+    # orders of a client, by status, newest first
+    IndexModel([("client._id", ASCENDING), ("status", ASCENDING), ("created_at", DESCENDING)]),
+    # statistics: status filter with a created_at window
+    IndexModel([("status", ASCENDING), ("created_at", ASCENDING)]),
+    # orders holding a product
+    IndexModel([("items._id", ASCENDING)]),
+]
+
+USERS_INDEXES: List[IndexModel] = [
+    IndexModel([("email", ASCENDING)], unique=True),
+    IndexModel([("cpf", ASCENDING)], unique=True),
+    # /users/many date filters
+    IndexModel([("created_at", ASCENDING)]),
+    IndexModel([("last_modified", ASCENDING)]),
+]
+
+INDEXES: Dict[str, List[IndexModel]] = {
+    'clients': CLIENTS_INDEXES,
+    'products': PRODUCTS_INDEXES,
+    'orders': ORDERS_INDEXES,
+    'users': USERS_INDEXES,
+}
@@ -1,6 +1,6 @@
 from typing import Dict
-from pymongo.collection import Collection
-from pymongo.database import Database
+from motor.motor_asyncio import AsyncIOMotorCollection, AsyncIOMotorDatabase
+from .indexes import ORDERS_INDEXES
 
 orders_validator: Dict = {
     '$jsonSchema': {
@@ -105,9 +105,10 @@ orders_validator: Dict = {
 }
 
 
-def create_orders_collection(database: Database) -> Collection:
-    orders: Collection = database.create_collection('orders',
-                                                    check_exists=False,
-                                                    validator=orders_validator
-                                                    )
+async def create_orders_collection(database: AsyncIOMotorDatabase) -> AsyncIOMotorCollection:
+    orders: AsyncIOMotorCollection = await database.create_collection('orders',
+                                                                      check_exists=False,
+                                                                      validator=orders_validator
+                                                                      )
+    await orders.create_indexes(ORDERS_INDEXES)
     return orders
@@ -0,0 +1,21 @@
+from typing import Dict
+
+# resized copies of every photo, written by the image pipeline after the upload
+photo_variants_property: Dict = {
+    'bsonType': "array",
+    'description': "Resized copies of the photos",
+    'items': {
+        'bsonType': "object",
+        'required': ["photo"],
+        'properties': {
+            'photo': {
+                'bsonType': "string",
+                'description': "Url of the original photo",
+            },
+        },
+        'additionalProperties': {
+            'bsonType': "object",
+            'description': "Width, height and webp and jpeg urls of a variant",
+        },
+    }
+}
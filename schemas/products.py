@@ -1,6 +1,7 @@
 from typing import Dict
-from pymongo.collection import Collection
-from pymongo.database import Database
+from motor.motor_asyncio import AsyncIOMotorCollection, AsyncIOMotorDatabase
+from .photos import photo_variants_property
+from .indexes import PRODUCTS_INDEXES, PRODUCTS_TEXT_INDEX
 
 products_validator: Dict = {
     '$jsonSchema': {
@@ -48,6 +49,7 @@ products_validator: Dict = {
                     'description': "Photos url",
                 }
             },
+            'photo_variants': photo_variants_property,
             "created_at": {
                 'bsonType': "date",
                 'description': "Time that created document",
@@ -61,10 +63,25 @@ products_validator: Dict = {
 }
 
 
-def create_products_collection(database: Database) -> Collection:
-    products: Collection = database.create_collection('products',
-                                                      check_exists=False,
-                                                      validator=products_validator
-                                                      )
-    products.create_index("name", unique=True)
+async def create_products_collection(database: AsyncIOMotorDatabase) -> AsyncIOMotorCollection:
+    products: AsyncIOMotorCollection = await database.create_collection('products',
+                                                                        check_exists=False,
+                                                                        validator=products_validator
+                                                                        )
+    await products.create_indexes(PRODUCTS_INDEXES)
     return products
+
+
+async def create_products_search_index(products: AsyncIOMotorCollection) -> None:
+    """
+    Text index used by /products/many: name matches weigh more than description ones.
+    create_indexes is a no-op when the index already exists.
+    """
+    await products.create_indexes([PRODUCTS_TEXT_INDEX])
+
+
+async def update_products_validator(database: AsyncIOMotorDatabase) -> None:
+    """
+    Apply the current validator to a products collection created by an earlier version.
+    """
+    await database.command('collMod', 'products', validator=products_validator)
@@ -1,6 +1,6 @@
 from typing import Dict
-from pymongo.collection import Collection
-from pymongo.database import Database
+from motor.motor_asyncio import AsyncIOMotorCollection, AsyncIOMotorDatabase
+from .indexes import USERS_INDEXES
 
 users_validator: Dict = {
     '$jsonSchema': {
@@ -55,11 +55,10 @@ users_validator: Dict = {
 }
 
 
-def create_users_collection(database: Database) -> Collection:
-    users: Collection = database.create_collection('users',
-                                                   check_exists=False,
-                                                   validator=users_validator
-                                                   )
-    users.create_index("email", unique=True)
-    users.create_index("cpf", unique=True)
+async def create_users_collection(database: AsyncIOMotorDatabase) -> AsyncIOMotorCollection:
+    users: AsyncIOMotorCollection = await database.create_collection('users',
+                                                                     check_exists=False,
+                                                                     validator=users_validator
+                                                                     )
+    await users.create_indexes(USERS_INDEXES)
     return users
@@ -1,4 +1,4 @@
-from .orders import OrderSerializer
-from .products import ProductSerializer
-from .clients import ClientSerializer
-from .users import UserSerializer
+from .response import MongoJSONResponse, dumps
+from .stream import stream_documents, MEDIA_TYPES
+from .pagination import next_page_headers
+from .conditional import validator_headers, is_not_modified, not_modified_response
@@ -0,0 +1,58 @@
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Dict, Optional
+from fastapi import Response, status
+
+
+def validator_headers(document: Dict) -> Dict[str, str]:
+    """
+    ETag and Last-Modified of a document, derived from its _id and last_modified.
+    Documents without last_modified get no header
+    :param document - Dict with _id and last_modified
+    :return Dict[str, str]
+    """
+    last_modified: Optional[datetime] = document.get('last_modified')
+    if not isinstance(last_modified, datetime):
+        return {}
+    # last_modified is stored as naive local time
+    modified_utc: datetime = last_modified.astimezone(timezone.utc)
+    version: int = int(modified_utc.timestamp() * 1_000_000)
+    return {'ETag': f'W/"{document["_id"]}-{version:x}"',
+            'Last-Modified': format_datetime(modified_utc, usegmt=True)}
+
+
+def is_not_modified(headers: Dict[str, str],
+                    if_none_match: Optional[str],
+                    if_modified_since: Optional[str]) -> bool:
+    """
+    Evaluates the conditional request headers against the current validators.
+    If-Modified-Since is only considered when If-None-Match is absent (RFC 9110)
+    :param headers - validators returned by validator_headers
+    :param if_none_match - If-None-Match request header
+    :param if_modified_since - If-Modified-Since request header
+    :return bool
+    """
+    if not headers:
+        return False
+    if if_none_match is not None:
+        etag: str = headers['ETag'].removeprefix('W/')
+        tags = [tag.strip().removeprefix('W/') for tag in if_none_match.split(',')]
+        return '*' in tags or etag in tags
+    if if_modified_since is not None:
+        try:
+            since: datetime = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+        return parsedate_to_datetime(headers['Last-Modified']) <= since
+    return False
+
+
+def not_modified_response(headers: Dict[str, str]) -> Response:
+    """
+    Empty 304 answer carrying the validators
+    :param headers - Dict[str, str]
+    :return Response
+    """
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
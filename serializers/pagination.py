@@ -0,0 +1,14 @@
+from typing import Dict, List, Optional
+
+
+def next_page_headers(body: List[Dict], limit: Optional[int]) -> Dict[str, str]:
+    """
+    Returns the header that carries the keyset cursor of the next page.
+    A page shorter than the limit is the last one, so no header is sent
+    :param body - serialized page
+    :param limit - page size requested
+    :return Dict[str, str]
+    """
+    if limit and len(body) == limit:
+        return {'X-Next-After': str(body[-1]['_id'])}
+    return {}
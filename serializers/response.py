@@ -0,0 +1,42 @@
+from decimal import Decimal
+from typing import Any
+import orjson
+from bson.objectid import ObjectId
+from bson.decimal128 import Decimal128
+from fastapi.responses import JSONResponse
+
+
+def encode_bson(value: Any) -> Any:
+    """
+    Encodes the types orjson does not know. datetime, dict and list are handled
+    natively, at any depth, so documents are never copied before encoding
+    :param value - Any
+    :return Any
+    """
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, Decimal128):
+        return str(value.to_decimal())
+    if isinstance(value, Decimal):
+        return str(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    """
+    Encodes mongodb documents straight to JSON bytes
+    :param content - Any
+    :return bytes
+    """
+    return orjson.dumps(content, default=encode_bson, option=orjson.OPT_NON_STR_KEYS)
+
+
+class MongoJSONResponse(JSONResponse):
+    """
+    JSONResponse that accepts documents as they come from the driver: ObjectId,
+    datetime and Decimal are encoded by orjson in a single pass
+    """
+    media_type = "application/json; charset=UTF-8"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
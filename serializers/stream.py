@@ -0,0 +1,30 @@
+from typing import AsyncIterator, Dict
+from motor.motor_asyncio import AsyncIOMotorCursor
+from models import StreamFormat
+from .response import dumps
+
+MEDIA_TYPES: Dict[StreamFormat, str] = {
+    StreamFormat.JSON: "application/json; charset=UTF-8",
+    StreamFormat.NDJSON: "application/x-ndjson; charset=UTF-8",
+}
+
+
+async def stream_documents(cursor: AsyncIOMotorCursor,
+                           stream_format: StreamFormat) -> AsyncIterator[bytes]:
+    """
+    Serializes documents one by one as the cursor yields them, so the response
+    never holds more than a cursor batch in memory
+    :param cursor - AsyncIOMotorCursor
+    :param stream_format - StreamFormat: JSON array or newline delimited JSON
+    :return AsyncIterator[bytes]
+    """
+    if stream_format == StreamFormat.NDJSON:
+        async for document in cursor:
+            yield dumps(document) + b'\n'
+        return
+    separator: bytes = b''
+    yield b'['
+    async for document in cursor:
+        yield separator + dumps(document)
+        separator = b','
+    yield b']'
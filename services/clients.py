@@ -1,222 +1,246 @@
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
+from datetime import datetime
 from bson.objectid import ObjectId
-from pymongo import errors
-from database import DB
+from pymongo import errors, ASCENDING
+from motor.motor_asyncio import AsyncIOMotorCursor, AsyncIOMotorCollection
+from database import DB, SETTINGS
+from utils import keyset_filter, hashing_pool
+from cache import clients_identity_cache
 from .interface import IServices, IPhoto
 from models import Client, ClientUpdate, FullClient, ClientQuery, ClientId
 
 
 class ClientsService(IServices, IPhoto):
-    def __init__(self):
-        self.database = DB.clients
-        self.__all_clients = []
-        self.__clients = []
-        self.__client = {}
-        self.__create_result = {}
-        self.__update_result = {}
-        self.__delete_result = {}
-        self.__insert_new_order_result = {}
-        self.__insert_new_photo_result = {}
-        self.__delete_photo_result = {}
-
-    @property
-    def all(self) -> List[Dict]:
-        return self.__all_clients
-
-    @property
-    def many(self) -> List[Dict]:
-        return self.__clients
-
-    @property
-    def one(self) -> Dict:
-        return self.__client
-
-    @property
-    def create_result(self) -> Dict:
-        return self.__create_result
-
     @property
-    def update_result(self) -> Dict:
-        return self.__update_result
+    def database(self) -> AsyncIOMotorCollection:
+        return DB.clients
 
     @property
-    def delete_result(self) -> Dict:
-        return self.__delete_result
-
-    @property
-    def insert_new_order_result(self) -> Dict:
-        return self.__insert_new_order_result
-
-    @property
-    def insert_new_photo_result(self) -> Dict:
-        return self.__insert_new_photo_result
-
-    @property
-    def delete_photo_result(self) -> Dict:
-        return self.__delete_photo_result
-
-    def get_all(self) -> None:
+    def listing(self) -> AsyncIOMotorCollection:
+        # pages of the listing can be read from secondaries, see MONGODB_LISTING_READ_PREFERENCE
+        return self.database.with_options(read_preference=SETTINGS.listing)
+
+    def find_all(self, limit: Optional[int] = None, after: Optional[str] = None) -> AsyncIOMotorCursor:
+        cursor: AsyncIOMotorCursor = self.listing.find(keyset_filter(after),
+                                                       {'password': 0}).sort('_id', ASCENDING)
+        if limit:
+            cursor = cursor.limit(limit)
+        return cursor
+
+    async def get_all(self, limit: Optional[int] = None, after: Optional[str] = None) -> List[Dict] | Dict:
         try:
-            response: List[Dict] = self.database.find({},
-                                                      {'password': 0})
-            response: List[Dict] = list(response)
-            if len(response) > 0:
-                self.__all_clients: List[Dict] = response
-            else:
-                self.__all_clients: List = []
+            response: List[Dict] = await self.find_all(limit, after).to_list(length=None)
+            return response
         except errors.OperationFailure:
-            self.__all_clients: Dict = {'failed': 'An error has occurred: database operation fails'}
+            return {'failed': 'An error has occurred: database operation fails'}
         except Exception:
-            self.__all_clients = {'failed': 'An error has occurred'}
+            return {'failed': 'An error has occurred'}
 
-    def get_one_by_id(self, _id: ClientId, projection: bool = False) -> None:
+    async def get_one_by_id(self, _id: ClientId, projection: bool = False) -> Dict:
         try:
             if projection:
-                response: Dict = self.database.find_one({"_id": _id.to_objectid()},
-                                                        {'password': 0,
-                                                         'orders': 0,
-                                                         'created_at': 0,
-                                                         'last_modified': 0,
-                                                         'photos': 0,
-                                                         'is_client': 0})
+                response: Dict = await self.database.find_one({"_id": _id.to_objectid()},
+                                                              {'password': 0,
+                                                               'orders': 0,
+                                                               'created_at': 0,
+                                                               'last_modified': 0,
+                                                               'photos': 0,
+                                                               'photo_variants': 0,
+                                                               'is_client': 0})
             else:
-                response: Dict = self.database.find_one({"_id": _id.to_objectid()},
-                                                        {'password': 0})
+                response: Dict = await self.database.find_one({"_id": _id.to_objectid()},
+                                                              {'password': 0})
             if response:
-                self.__client: Dict = response
-            else:
-                self.__client: Dict = {'failed': 'Client not founded',
-                                       '_id': _id.client_id}
+                return response
+            return {'failed': 'Client not founded',
+                    '_id': _id.client_id}
         except errors.OperationFailure:
-            self.__client: Dict = {'failed': 'An error has occurred: database operation fails'}
+            return {'failed': 'An error has occurred: database operation fails'}
         except Exception:
-            self.__client: Dict = {'failed': 'An error has occurred'}
+            return {'failed': 'An error has occurred'}
 
-    def get_many(self, query: ClientQuery):
+    async def get_last_modified(self, _id: ClientId) -> Dict:
+        try:
+            response: Dict | None = await self.database.find_one({"_id": _id.to_objectid()},
+                                                                 {'last_modified': 1})
+            if response:
+                return response
+            return {'failed': 'Client not founded',
+                    '_id': _id.client_id}
+        except errors.OperationFailure:
+            return {'failed': 'An error has occurred: database operation fails'}
+        except Exception:
+            return {'failed': 'An error has occurred'}
+
+    async def get_many(self, query: ClientQuery) -> List[Dict] | Dict:
         params: Dict = query.params()
         try:
-            response: List[Dict] = self.database.find(params)
-            response: List[Dict] = list(response)
-            if len(response) > 0:
-                self.__clients: List[Dict] = response
-            else:
-                self.__clients: List = []
+            response: AsyncIOMotorCursor = self.database.find(params)
+            response: List[Dict] = await response.to_list(length=None)
+            return response
         except errors.OperationFailure:
-            self.__clients: Dict = {'failed': 'An error has occurred: database operation fails'}
+            return {'failed': 'An error has occurred: database operation fails'}
         except Exception:
-            self.__clients: Dict = {'failed': 'An error has occurred'}
+            return {'failed': 'An error has occurred'}
 
-    def create_one(self, client: Client) -> None:
+    async def create_one(self, client: Client) -> Dict:
         client: FullClient = FullClient(**client.to_dict())
         client: Dict = client.to_dict()
+        client['password'] = await hashing_pool.hash(client['password'])
         try:
-            response: Any = self.database.insert_one(client).inserted_id
+            response: Any = (await self.database.insert_one(client)).inserted_id
             if response:
-                self.__create_result: Dict = {'success': 'created client',
-                                              '_id': str(response)}
-            else:
-                self.__create_result: Dict = {'failed': 'client not created'}
+                return {'success': 'created client',
+                        '_id': str(response)}
+            return {'failed': 'client not created'}
         except errors.DuplicateKeyError as error:
-            self.__create_result: Dict = {'failed': "duplicate key error",
-                                          'message': error.details.get('keyValue')}
+            return {'failed': "duplicate key error",
+                    'message': error.details.get('keyValue')}
         except errors.WriteError as error:
             print(error)
-            self.__create_result: Dict = {'failed': "Validate error",
-                                          'message': error.details.get('keyValue')}
+            return {'failed': "Validate error",
+                    'message': error.details.get('keyValue')}
         except errors.OperationFailure:
-            self.__create_result: Dict = {'failed': 'an error has occurred: database operation fails'}
+            return {'failed': 'an error has occurred: database operation fails'}
         except Exception as error:
             print(error)
-            self.__create_result: Dict = {'failed': 'an error has occurred'}
+            return {'failed': 'an error has occurred'}
 
-    def update_one_by_id(self, updates: ClientUpdate) -> None:
+    async def update_one_by_id(self, updates: ClientUpdate) -> Dict:
         updates = updates.params()
+        if 'password' in updates:
+            updates['password'] = await hashing_pool.hash(updates['password'])
         all_updates: Dict = {
             "$set": updates
         }
         try:
-            result: int = self.database.update_one({"_id": updates['_id']},
-                                                   all_updates).modified_count
-            self.__update_result: Dict = {'success': f'{result} client(s) modified'} if result > 0 \
+            result: int = (await self.database.update_one({"_id": updates['_id']},
+                                                          all_updates)).modified_count
+            if 'password' in updates or 'email' in updates:
+                clients_identity_cache.invalidate_subject(str(updates['_id']))
+            return {'success': f'{result} client(s) modified'} if result > 0 \
                 else {'failed': 'Client not updated',
-                      '_id': updates["client_id"]}
+                      '_id': str(updates['_id'])}
         except errors.DuplicateKeyError as error:
-            self.__update_result: Dict = {'failed': "duplicate key error",
-                                          'message': error.details.get('keyValue')}
+            return {'failed': "duplicate key error",
+                    'message': error.details.get('keyValue')}
         except errors.WriteError as error:
-            self.__update_result: Dict = {'failed': "validate error",
-                                          'message': error.details.get('keyValue')}
+            return {'failed': "validate error",
+                    'message': error.details.get('keyValue')}
         except errors.OperationFailure:
-            self.__update_result: Dict = {'failed': 'an error has occurred: database operation fails'}
+            return {'failed': 'an error has occurred: database operation fails'}
         except Exception:
-            self.__update_result: Dict = {'failed': 'an error has occurred'}
+            return {'failed': 'an error has occurred'}
 
-    def delete_one_by_id(self, client_id: str) -> None:
+    async def delete_one_by_id(self, client_id: str) -> Dict:
         client_id: ObjectId = ObjectId(client_id)
         try:
-            result: int = self.database.delete_one({"_id": client_id}).deleted_count
-            self.__delete_result: Dict = {'success': f'{result} client(s) deleted'} if result > 0 \
+            result: int = (await self.database.delete_one({"_id": client_id})).deleted_count
+            clients_identity_cache.invalidate_subject(str(client_id))
+            return {'success': f'{result} client(s) deleted'} if result > 0 \
                 else {'failed': 'client not deleted',
                       '_id': str(client_id)}
         except errors.OperationFailure:
-            self.__delete_result: Dict = {'failed': 'an error has occurred: database operation fails'}
+            return {'failed': 'an error has occurred: database operation fails'}
         except Exception:
-            self.__delete_result: Dict = {'failed': 'an error has occurred'}
+            return {'failed': 'an error has occurred'}
 
-    def insert_new_order_on_client(self, order_id: str) -> None:
-        client_id: ObjectId = ObjectId(self.one['_id'])
-        order_id: ObjectId = ObjectId(order_id)
+    async def insert_new_order_on_client(self, client_id: str, order_id: str) -> Dict:
         query: Dict = {
-            "_id": client_id
+            "_id": ObjectId(client_id)
         }
         update: Dict = {
             "$push": {
-                "orders": order_id,
+                "orders": ObjectId(order_id),
+            },
+            "$set": {
+                "last_modified": datetime.now(),
             }
         }
         try:
-            result: int = self.database.update_one(query, update).modified_count
-            self.__insert_new_order_result: Dict = {'success': 'Order inserted',
-                                                    'quantity': result}
+            result: int = (await self.database.update_one(query, update)).modified_count
+            return {'success': 'Order inserted',
+                    'quantity': result}
         except errors.OperationFailure:
-            self.__insert_new_order_result: Dict = {'failed': 'an error has occurred: database operation fails'}
+            return {'failed': 'an error has occurred: database operation fails'}
         except Exception:
-            self.__insert_new_order_result: Dict = {'failed': 'an error has occurred'}
+            return {'failed': 'an error has occurred'}
 
-    def insert_photo(self, photo_url: str) -> None:
-        client_id: ObjectId = ObjectId(self.one['_id'])
+    async def insert_photo(self, client_id: str, photo_url: str) -> Dict:
         query: Dict = {
-            "_id": client_id
+            "_id": ObjectId(client_id)
         }
         update: Dict = {
             "$push": {
                 "photos": photo_url,
+            },
+            "$set": {
+                "last_modified": datetime.now(),
             }
         }
         try:
-            result: int = self.database.update_one(query, update).modified_count
-            self.__insert_new_photo_result: Dict = {'success': 'photo inserted',
-                                                    'quantity': result}
+            result: int = (await self.database.update_one(query, update)).modified_count
+            if result > 0:
+                return {'success': 'photo inserted',
+                        'quantity': result}
+            return {'failed': 'Client not founded',
+                    '_id': client_id}
         except errors.OperationFailure:
-            self.__insert_new_photo_result: Dict = {'failed': 'an error has occurred: database operation fails'}
+            return {'failed': 'an error has occurred: database operation fails'}
         except Exception:
-            self.__insert_new_photo_result: Dict = {'failed': 'an error has occurred'}
+            return {'failed': 'an error has occurred'}
+
+    async def insert_photo_variants(self, client_id: str, photo_url: str, variants: Dict[str, Dict]) -> Dict:
+        """
+        Record the resized copies of a photo, unless the photo was removed meanwhile.
+        The first one creates photo_variants on the client.
+        :parameter: client_id: str = client ID.
+        :parameter: photo_url: str = url of the original photo.
+        :parameter: variants: Dict[str, Dict] = width, height, webp and jpeg urls per variant.
+        :return: Dict
+        """
+        query: Dict = {
+            "_id": ObjectId(client_id),
+            "photos": photo_url
+        }
+        update: Dict = {
+            "$push": {
+                "photo_variants": {"photo": photo_url, **variants},
+            },
+            "$set": {
+                "last_modified": datetime.now(),
+            }
+        }
+        try:
+            result: int = (await self.database.update_one(query, update)).modified_count
+            if result > 0:
+                return {'success': 'photo variants inserted',
+                        'quantity': result}
+            return {'failed': 'Client not founded or photo removed',
+                    '_id': client_id}
+        except errors.OperationFailure:
+            return {'failed': 'an error has occurred: database operation fails'}
+        except Exception:
+            return {'failed': 'an error has occurred'}
 
-    def remove_photo(self, photo_url: str) -> None:
-        client_id: ObjectId = ObjectId(self.one['_id'])
+    async def remove_photo(self, client_id: str, photo_url: str) -> Dict:
         query: Dict = {
-            "_id": client_id
+            "_id": ObjectId(client_id)
         }
         pull: Dict = {
             "$pull": {
-                "photos": photo_url
+                "photos": photo_url,
+                "photo_variants": {"photo": photo_url}
+            },
+            "$set": {
+                "last_modified": datetime.now(),
             }
         }
         try:
-            result: int = self.database.update_one(query, pull).modified_count
-            self.__delete_photo_result: Dict = {'success': 'photo removed',
-                                                'quantity': result}
+            result: int = (await self.database.update_one(query, pull)).modified_count
+            return {'success': 'photo removed',
+                    'quantity': result}
         except errors.OperationFailure:
-            self.__delete_photo_result: Dict = {'failed': 'an error has occurred: database operation fails'}
+            return {'failed': 'an error has occurred: database operation fails'}
         except Exception:
-            self.__delete_photo_result: Dict = {'failed': 'an error has occurred'}
+            return {'failed': 'an error has occurred'}
@@ -3,66 +3,42 @@ from typing import List, Dict
 
 
 class IServices(ABC):
+    """
+    Services keep no per-call state: every method returns its own result,
+    so a single instance can be shared by concurrent requests.
+    """
 
     @abstractmethod
-    def all(self) -> List[Dict]:
+    async def get_all(self) -> List[Dict] | Dict:
         pass
 
     @abstractmethod
-    def many(self) -> List[Dict]:
+    async def get_one_by_id(self, _id: str) -> Dict:
         pass
 
     @abstractmethod
-    def one(self) -> Dict:
+    async def create_one(self, user: Dict) -> Dict:
         pass
 
     @abstractmethod
-    def create_result(self) -> Dict:
+    async def update_one_by_id(self, updates: Dict) -> Dict:
         pass
 
     @abstractmethod
-    def update_result(self) -> Dict:
-        pass
-
-    @abstractmethod
-    def delete_result(self) -> Dict:
-        pass
-
-    @abstractmethod
-    def get_all(self) -> None:
-        pass
-
-    @abstractmethod
-    def get_one_by_id(self, _id: str) -> None:
-        pass
-
-    @abstractmethod
-    def create_one(self, user: Dict) -> None:
-        pass
-
-    @abstractmethod
-    def update_one_by_id(self, updates: Dict) -> None:
-        pass
-
-    @abstractmethod
-    def delete_one_by_id(self, _id: str) -> None:
+    async def delete_one_by_id(self, _id: str) -> Dict:
         pass
 
 
 class IPhoto(ABC):
 
     @abstractmethod
-    def insert_new_photo_result(self) -> Dict:
-        pass
-
-    @abstractmethod
-    def delete_photo_result(self) -> Dict:
+    async def insert_photo(self, _id: str, photo_url: str) -> Dict:
         pass
 
     @abstractmethod
-    def insert_photo(self, photo_url: str) -> None:
+    async def insert_photo_variants(self, _id: str, photo_url: str, variants: Dict[str, Dict]) -> Dict:
         pass
 
     @abstractmethod
-    def remove_photo(self, photo_url: str) -> None:
+    async def remove_photo(self, _id: str, photo_url: str) -> Dict:
         pass
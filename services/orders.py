@@ -1,229 +1,355 @@
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Set
+from datetime import datetime
 from bson.objectid import ObjectId
-from pymongo import errors
-from pymongo.cursor import Cursor
+from pymongo import errors, ASCENDING, ReturnDocument
+from motor.motor_asyncio import AsyncIOMotorCursor, AsyncIOMotorCollection
 from services import ClientsService, ProductsService
-from database import DB
+from database import DB, SETTINGS
+from utils import keyset_filter
 from .interface import IServices
-from models import AddItem, RemoveItem, ProductUpdate, ChangeStatus, ClientId, OrderId, FullOrder
+from models import AddItem, RemoveItem, ChangeStatus, ClientId, OrderId, OrderIds, FullOrder
+from models import OrderStatus, OrderStatsQuery
+
+SOLD_STATUSES = [OrderStatus.PAID.value, OrderStatus.SHIPPED.value, OrderStatus.DELIVERED.value]
 
 
 class OrdersService(IServices):
     def __init__(self):
-        self.database_orders = DB.orders
         self.client_service: ClientsService = ClientsService()
         self.product_service: ProductsService = ProductsService()
-        self.__all_orders = []
-        self.__orders = []
-        self.__order: Dict = {}
-        self.__create_result = {}
-        self.__update_result = {}
-        self.__delete_result = {}
-
-    @property
-    def all(self) -> List[Dict]:
-        return self.__all_orders
-
-    @property
-    def many(self) -> List[Dict]:
-        return self.__orders
 
     @property
-    def one(self) -> Dict:
-        return self.__order
+    def database_orders(self) -> AsyncIOMotorCollection:
+        return DB.orders
 
     @property
-    def create_result(self) -> Dict:
-        return self.__create_result
+    def listing_orders(self) -> AsyncIOMotorCollection:
+        # listings and statistics can be read from secondaries, see MONGODB_LISTING_READ_PREFERENCE
+        return self.database_orders.with_options(read_preference=SETTINGS.listing)
 
-    @property
-    def update_result(self) -> Dict:
-        return self.__update_result
+    def find_all(self, limit: Optional[int] = None, after: Optional[str] = None) -> AsyncIOMotorCursor:
+        cursor: AsyncIOMotorCursor = self.listing_orders.find(keyset_filter(after)).sort('_id', ASCENDING)
+        if limit:
+            cursor = cursor.limit(limit)
+        return cursor
 
-    @property
-    def delete_result(self) -> Dict:
-        return self.__delete_result
+    async def get_all(self, limit: Optional[int] = None, after: Optional[str] = None) -> List[Dict] | Dict:
+        try:
+            response: List[Dict] = await self.find_all(limit, after).to_list(length=None)
+            return response
+        except errors.OperationFailure:
+            return {'failed': 'an error has occurred: database operation fails'}
+        except Exception:
+            return {'failed': 'an error has occurred'}
 
-    def get_all(self) -> None:
+    async def get_one_by_id(self, _id: OrderId) -> Dict:
         try:
-            response: Cursor[Any] = self.database_orders.find()
-            response: List[Dict] = list(response)
-            if len(response) > 0:
-                self.__all_orders: List[Dict] = response
-            else:
-                self.__all_orders: List = []
+            response: Dict = await self.database_orders.find_one({"_id": _id.to_objectid()})
+            if response:
+                return response
+            return {'failed': 'order not founded',
+                    '_id': str(_id.order_id)}
         except errors.OperationFailure:
-            self.__all_orders: Dict = {'failed': 'an error has occurred: database operation fails'}
+            return {'failed': 'an error has occurred: database operation fails'}
         except Exception:
-            self.__all_orders: Dict = {'failed': 'an error has occurred'}
+            return {'failed': 'an error has occurred'}
 
-    def get_one_by_id(self, _id: OrderId) -> None:
+    async def get_last_modified(self, _id: OrderId) -> Dict:
         try:
-            response: Dict = self.database_orders.find_one({"_id": _id.to_objectid()})
+            response: Dict | None = await self.database_orders.find_one({"_id": _id.to_objectid()},
+                                                                        {'last_modified': 1})
             if response:
-                self.__order: Dict = response
-            else:
-                self.__order: Dict = {'failed': 'order not founded',
-                                      '_id': str(_id.order_id)}
+                return response
+            return {'failed': 'order not founded',
+                    '_id': str(_id.order_id)}
         except errors.OperationFailure:
-            self.__order: Dict = {'failed': 'an error has occurred: database operation fails'}
+            return {'failed': 'an error has occurred: database operation fails'}
         except Exception:
-            self.__order: Dict = {'failed': 'an error has occurred'}
+            return {'failed': 'an error has occurred'}
 
-    def create_one(self, _id: ClientId) -> None | Dict:
+    async def create_one(self, _id: ClientId) -> Dict:
         """
         Create a single order.
         :parameter: client_id: str = client ID.
         :return: Dict
         """
-        self.client_service.get_one_by_id(_id, True)
-        if 'failed' in self.client_service.one:
+        client: Dict = await self.client_service.get_one_by_id(_id, True)
+        if 'failed' in client:
             return {'failed': 'client not founded',
                     '_id': _id.client_id}
-        else:
-            self.client_service.one['_id']: str = str(self.client_service.one['_id'])
-        order: Dict = FullOrder(**{"client": self.client_service.one}).to_dict()
+        client['_id']: str = str(client['_id'])
+        order: Dict = FullOrder(**{"client": client}).to_dict()
         try:
-            response: Any = self.database_orders.insert_one(order).inserted_id
+            response: Any = (await self.database_orders.insert_one(order)).inserted_id
             if response:
-                self.__create_result: Dict = {'success': 'order created',
-                                              '_id': str(response)}
-            else:
-                self.__create_result: Dict = {'failed': 'an error has occurred'}
+                return {'success': 'order created',
+                        '_id': str(response)}
+            return {'failed': 'an error has occurred'}
         except errors.OperationFailure:
-            self.__create_result: Dict = {'failed': 'an error has occurred: database operation fails'}
+            return {'failed': 'an error has occurred: database operation fails'}
             # generic error
         except Exception:
-            self.__create_result: Dict = {'failed': 'an error has occurred'}
+            return {'failed': 'an error has occurred'}
 
-    def add_product(self, item: AddItem):
-        order_id: str = item.order_id
-        product_id: str = item.product_id
-        self.get_one_by_id(item.get_orderid())
-        if 'failed' in self.one:
-            self.__update_result: Dict = {'failed': 'order_id not founded',
-                                          '_id': order_id}
-        else:
-            self.product_service.get_one_by_id(product_id, True)
-            if 'failed' in self.product_service.one:
-                self.__update_result: Dict = {'failed': 'product not founded',
-                                              '_id': item.product_id}
-            else:
-                if self.product_service.one['quantity'] >= item.quantity:
-                    new_quantity: int = self.product_service.one['quantity'] - item.quantity
-                    product_updates: ProductUpdate = ProductUpdate(product_id=item.product_id,
-                                                                   quantity=new_quantity)
-                    self.product_service.update_one_by_id(product_updates)
-                    self.product_service.one['quantity'] = item.quantity
-                    self.product_service.one['_id'] = str(self.product_service.one['_id'])
-                    order_id: ObjectId = ObjectId(order_id)
-                    query: Dict = {
-                        "_id": order_id
-                    }
-                    update: Dict = {
-                        "$push": {
-                            "items": self.product_service.one,
-                        }
-                    }
-                    try:
-                        response: int = self.database_orders.update_one(query, update).modified_count
-                        self.__update_result: Dict = {'success': 'item inserted',
-                                                      'quantity': response}
-                    except errors.OperationFailure:
-                        self.__update_result: Dict = {'failed': 'an error has occurred: database operation fails'}
-                    # generic error
-                    except Exception:
-                        self.__update_result: Dict = {'failed': 'an error has occurred'}
-                else:
-                    self.__update_result: Dict = {'failed': 'product is not enough in stock',
-                                                  '_id': item.product_id,
-                                                  'quantity_in_stock': self.product_service.one['quantity'],
-                                                  'quantity_requested': item.quantity}
-
-    def remove_product(self, item: RemoveItem):
+    async def add_product(self, item: AddItem) -> Dict:
+        """
+        Reserve stock and push the item into the order: two round-trips. The stock is
+        decremented first with a conditional update, and given back if the order
+        cannot receive the item.
+        :parameter: item: AddItem = order, product and quantity.
+        :return: Dict
+        """
         order_id: str = item.order_id
         product_id: str = item.product_id
-        self.get_one_by_id(item.get_orderid())
-        if 'failed' in self.one:
-            self.__update_result: Dict = {'failed': 'order_id not founded',
-                                          '_id': order_id}
-        else:
-            item_founded: Dict = [item for item in self.one['items'] if str(item['_id']) == product_id][0]
-            if len(item_founded) < 1:
-                self.__update_result: Dict = {'failed': 'product_id not founded',
-                                              '_id': product_id}
-            else:
-                items_remaining: List[Dict] = [item for item in self.one['items'] if str(item['_id']) != product_id]
-                update: Dict = {
-                    "$set": {
-                        "items": items_remaining,
-                    }
-                }
-                try:
-                    order_id: ObjectId = ObjectId(order_id)
-                    response: int = self.database_orders.update_one({'_id': order_id}, update).modified_count
-                    if response > 0:
-                        self.product_service.get_one_by_id(product_id, True)
-                        new_quantity: int = self.product_service.one['quantity'] + item_founded['quantity']
-                        product_updates: ProductUpdate = ProductUpdate(product_id=product_id,
-                                                                       quantity=new_quantity)
-                        self.product_service.update_one_by_id(product_updates)
-                        self.__update_result: Dict = {'success': 'item deleted', 'quantity': response}
-                    else:
-                        self.__update_result: Dict = {'failed': 'an error has occurred'}
-                except errors.OperationFailure:
-                    self.__update_result: Dict = {'failed': 'An error has occurred: database operation fails'}
-                # generic error
-                except Exception as error:
-                    print(error)
-                    self.__update_result: Dict = {'failed': 'an error has occurred'}
-
-    def change_status(self, status: ChangeStatus):
-        order_id: str = status.order_id
-        status_str: str = status.status
-        self.get_one_by_id(status.get_orderid())
-        if 'failed' in self.one:
-            self.__update_result: Dict = {'failed': 'order_id not founded',
-                                          '_id': order_id}
-        else:
+        product: Dict = await self.product_service.reserve_stock(product_id, item.quantity)
+        if 'failed' in product:
+            return product
+        try:
+            product['quantity'] = item.quantity
+            product['_id'] = str(product['_id'])
+            query: Dict = {
+                "_id": ObjectId(order_id)
+            }
             update: Dict = {
+                "$push": {
+                    "items": product,
+                },
                 "$set": {
-                    "status": status_str,
+                    "last_modified": datetime.now(),
                 }
             }
-            try:
-                order_id: ObjectId = ObjectId(order_id)
-                response: int = self.database_orders.update_one({'_id': order_id}, update).modified_count
-                self.__update_result: Dict = {'success': 'status modified', 'quantity': response}
-            except errors.OperationFailure:
-                self.__update_result: Dict = {'failed': 'An error has occurred: database operation fails'}
-            # generic error
-            except Exception:
-                self.__update_result: Dict = {'failed': 'an error has occurred'}
+            response: int = (await self.database_orders.update_one(query, update)).matched_count
+            if response > 0:
+                return {'success': 'item inserted',
+                        'quantity': response}
+            result: Dict = {'failed': 'order_id not founded',
+                            '_id': order_id}
+        except errors.OperationFailure:
+            result: Dict = {'failed': 'an error has occurred: database operation fails'}
+        # generic error
+        except Exception as error:
+            print(error)
+            result: Dict = {'failed': 'an error has occurred'}
+        # the item did not reach the order, so the reservation is given back
+        released: Dict = await self.product_service.release_stock(product_id, item.quantity)
+        if 'failed' in released:
+            print(f"{item.quantity} unit(s) of product {product_id} reserved but not released: {released['failed']}")
+            result['stock_not_released'] = {'_id': product_id, 'quantity': item.quantity}
+        return result
+
+    async def remove_product(self, item: RemoveItem) -> Dict:
+        """
+        Pull the item from the order and give its units back to stock: two round-trips.
+        :parameter: item: RemoveItem = order and product.
+        :return: Dict
+        """
+        order_id: ObjectId = item.get_orderid().to_objectid()
+        product_id: str = item.product_id
+        try:
+            order: Dict | None = await self.database_orders.find_one_and_update(
+                {"_id": order_id, "items._id": product_id},
+                {"$pull": {"items": {"_id": product_id}},
+                 "$set": {"last_modified": datetime.now()}},
+                projection={'items._id': 1,
+                            'items.quantity': 1},
+                return_document=ReturnDocument.BEFORE)
+            if not order:
+                if await self.database_orders.count_documents({"_id": order_id}, limit=1) < 1:
+                    return {'failed': 'order_id not founded',
+                            '_id': item.order_id}
+                return {'failed': 'product_id not founded',
+                        '_id': product_id}
+            quantity: int = sum(item_founded['quantity'] for item_founded in order['items']
+                                if item_founded['_id'] == product_id)
+            await self.product_service.release_stock(product_id, quantity)
+            return {'success': 'item deleted', 'quantity': quantity}
+        except errors.OperationFailure:
+            return {'failed': 'An error has occurred: database operation fails'}
+        # generic error
+        except Exception as error:
+            print(error)
+            return {'failed': 'an error has occurred'}
+
+    async def change_status(self, status: ChangeStatus) -> Dict:
+        order_id: str = status.order_id
+        status_str: str = status.status
+        order: Dict = await self.get_one_by_id(status.get_orderid())
+        if 'failed' in order:
+            return {'failed': 'order_id not founded',
+                    '_id': order_id}
+        update: Dict = {
+            "$set": {
+                "status": status_str,
+                "last_modified": datetime.now(),
+            }
+        }
+        try:
+            response: int = (await self.database_orders.update_one({'_id': ObjectId(order_id)},
+                                                                   update)).modified_count
+            return {'success': 'status modified', 'quantity': response}
+        except errors.OperationFailure:
+            return {'failed': 'An error has occurred: database operation fails'}
+        # generic error
+        except Exception:
+            return {'failed': 'an error has occurred'}
+
+    async def revenue_per_day(self, query: OrderStatsQuery) -> List[Dict] | Dict:
+        """
+        Revenue, units and orders per day of creation, for orders already paid.
+        :parameter: query: OrderStatsQuery = optional created_at window.
+        :return: List[Dict]
+        """
+        pipeline: List[Dict] = [
+            {"$match": {**query.params(), "status": {"$in": SOLD_STATUSES}}},
+            {"$project": {"_id": 0,
+                          "day": {"$dateToString": {"format": "%Y-%m-%d", "date": "$created_at"}},
+                          "revenue": {"$sum": {"$map": {"input": "$items",
+                                                        "as": "item",
+                                                        "in": {"$multiply": ["$$item.price",
+                                                                             "$$item.quantity"]}}}},
+                          "units": {"$sum": "$items.quantity"}}},
+            {"$group": {"_id": "$day",
+                        "revenue": {"$sum": "$revenue"},
+                        "units": {"$sum": "$units"},
+                        "orders": {"$sum": 1}}},
+            {"$project": {"_id": 0,
+                          "day": "$_id",
+                          "revenue": {"$round": ["$revenue", 2]},
+                          "units": 1,
+                          "orders": 1}},
+            {"$sort": {"day": 1}},
+        ]
+        return await self.__aggregate(pipeline)
+
+    async def units_per_product(self, query: OrderStatsQuery, limit: Optional[int] = None) -> List[Dict] | Dict:
+        """
+        Units sold and revenue per product, best sellers first.
+        :parameter: query: OrderStatsQuery = optional created_at window.
+        :parameter: limit: int = keep only the first products.
+        :return: List[Dict]
+        """
+        pipeline: List[Dict] = [
+            {"$match": {**query.params(), "status": {"$in": SOLD_STATUSES}}},
+            {"$unwind": "$items"},
+            {"$group": {"_id": "$items._id",
+                        "name": {"$first": "$items.name"},
+                        "units": {"$sum": "$items.quantity"},
+                        "revenue": {"$sum": {"$multiply": ["$items.price", "$items.quantity"]}}}},
+            {"$project": {"_id": 0,
+                          "product_id": "$_id",
+                          "name": 1,
+                          "units": 1,
+                          "revenue": {"$round": ["$revenue", 2]}}},
+            {"$sort": {"units": -1, "product_id": 1}},
+        ]
+        if limit:
+            pipeline.append({"$limit": limit})
+        return await self.__aggregate(pipeline)
 
-    def update_one_by_id(self, updates: Dict) -> None:
+    async def count_per_status(self, query: OrderStatsQuery) -> List[Dict] | Dict:
+        """
+        Number of orders in each status.
+        :parameter: query: OrderStatsQuery = optional created_at window.
+        :return: List[Dict]
+        """
+        pipeline: List[Dict] = [
+            {"$match": query.params()},
+            {"$group": {"_id": "$status",
+                        "orders": {"$sum": 1}}},
+            {"$project": {"_id": 0,
+                          "status": "$_id",
+                          "orders": 1}},
+            {"$sort": {"orders": -1, "status": 1}},
+        ]
+        return await self.__aggregate(pipeline)
+
+    async def __aggregate(self, pipeline: List[Dict]) -> List[Dict] | Dict:
+        try:
+            response: List[Dict] = await self.listing_orders.aggregate(pipeline).to_list(length=None)
+            return response
+        except errors.OperationFailure:
+            return {'failed': 'an error has occurred: database operation fails'}
+        except Exception:
+            return {'failed': 'an error has occurred'}
+
+    async def update_one_by_id(self, updates: Dict) -> Dict:
         raise NotImplementedError('Method not implemented')
 
-    def delete_one_by_id(self, order_id: str) -> None:
+    async def delete_one_by_id(self, order_id: str) -> Dict:
         try:
-            # convert str to objectid
-            order_id: ObjectId = ObjectId(order_id)
-            # get order saved
-            result: Dict = self.database_orders.find_one({"_id": order_id})
-            # after exclude order, increase quantities in stock
-            for item in result['items']:
-                self.product_service.get_one_by_id(item['_id'], True)
-                new_quantity: int = self.product_service.one['quantity'] + item['quantity']
-                product_updates: ProductUpdate = ProductUpdate(product_id=item['product_id'],
-                                                               quantity=new_quantity)
-                self.product_service.update_one_by_id(product_updates)
-            # exclude
-            result: int = self.database_orders.delete_one({"_id": order_id}).deleted_count
-            self.__delete_result: Dict = {'success': 'order deleted',
-                                          'quantity': result} if \
-                result > 0 else {'failed': 'order not deleted',
-                                 '_id': str(order_id)}
+            order: Dict | None = await self.__pop_order(ObjectId(order_id))
+            if not order:
+                return {'failed': 'order not deleted',
+                        '_id': order_id}
         except errors.OperationFailure:
-            self.__delete_result: Dict = {'failed': 'An error has occurred: database operation fails'}
+            return {'failed': 'An error has occurred: database operation fails'}
         except Exception:
-            self.__delete_result: Dict = {'failed': 'An error has occurred'}
+            return {'failed': 'An error has occurred'}
+        # after exclude order, increase quantities in stock
+        result: Dict = {'success': 'order deleted',
+                        'quantity': 1}
+        return await self.__restock(result, [order])
+
+    async def delete_many_by_ids(self, order_ids: OrderIds) -> Dict:
+        """
+        Delete many orders and restock all their items: three round-trips whatever the
+        number of orders. The orders are read first, then deleted with one delete_many
+        that only matches the ones still unchanged since the read, so an item pushed
+        meanwhile is never lost from stock: such an order is kept and reported.
+        :parameter: order_ids: OrderIds = orders IDs.
+        :return: Dict
+        """
+        try:
+            found: List[Dict] = await self.database_orders.find({"_id": {"$in": order_ids.to_objectids()}},
+                                                                {'items._id': 1,
+                                                                 'items.quantity': 1,
+                                                                 'last_modified': 1}).to_list(length=None)
+            if not found:
+                return {'success': '0 order(s) deleted',
+                        'quantity': 0,
+                        'not_founded': order_ids.order_ids}
+            deleted_count: int = (await self.database_orders.delete_many(
+                {"$or": [{"_id": order['_id'], "last_modified": order.get('last_modified')} for order in found]}
+            )).deleted_count
+            deleted: List[Dict] = found
+            if deleted_count < len(found):
+                # some orders changed between the read and the delete: they are still there
+                kept: Set[ObjectId] = {order['_id'] for order in await self.database_orders.find(
+                    {"_id": {"$in": [order['_id'] for order in found]}}, {'_id': 1}).to_list(length=None)}
+                deleted = [order for order in found if order['_id'] not in kept]
+        except errors.OperationFailure:
+            return {'failed': 'An error has occurred: database operation fails'}
+        except Exception:
+            return {'failed': 'An error has occurred'}
+        deleted_ids: Set[str] = {str(order['_id']) for order in deleted}
+        found_ids: Set[str] = {str(order['_id']) for order in found}
+        result: Dict = {'success': f'{len(deleted)} order(s) deleted',
+                        'quantity': len(deleted),
+                        'not_founded': [_id for _id in order_ids.order_ids if _id not in found_ids],
+                        'not_deleted': [_id for _id in order_ids.order_ids
+                                        if _id in found_ids and _id not in deleted_ids]}
+        return await self.__restock(result, deleted)
+
+    async def __restock(self, result: Dict, deleted: List[Dict]) -> Dict:
+        """
+        Give the items of deleted orders back to stock, and report the units that
+        could not be restocked in the result.
+        """
+        restocked: Dict = await self.product_service.restock_many(self.__count_items(deleted))
+        if 'failed' in restocked:
+            print(f"orders {[str(order['_id']) for order in deleted]} deleted but not restocked: {restocked}")
+            result['restock_failed'] = restocked
+        return result
+
+    async def __pop_order(self, order_id: ObjectId) -> Dict | None:
+        return await self.database_orders.find_one_and_delete({"_id": order_id},
+                                                               projection={'items._id': 1,
+                                                                           'items.quantity': 1})
+
+    @staticmethod
+    def __count_items(orders: List[Dict]) -> Dict[str, int]:
+        quantities: Dict[str, int] = {}
+        for order in orders:
+            for item in order.get('items', []):
+                quantities[item['_id']] = quantities.get(item['_id'], 0) + item['quantity']
+        return quantities
@@ -1,191 +1,357 @@
-from typing import Dict, List, Any
+import asyncio
+from typing import Dict, List, Any, Optional
+from datetime import datetime
 from bson.objectid import ObjectId
-from pymongo import errors
-from database import DB
+from pymongo import errors, ASCENDING, ReturnDocument, UpdateOne
+from motor.motor_asyncio import AsyncIOMotorCursor, AsyncIOMotorCollection
+from database import DB, SETTINGS
+from utils import keyset_filter
+from cache import products_prefix_index, products_cache, change_watcher, AUTOCOMPLETE_MAX_RESULTS
 from .interface import IServices, IPhoto
 from models import Product, ProductUpdate, FullProduct, ProductQuery
 
 
 class ProductsService(IServices, IPhoto):
-    def __init__(self):
-        self.database = DB.products
-        self.__all_products = []
-        self.__products = []
-        self.__product = {}
-        self.__create_result = {}
-        self.__update_result = {}
-        self.__delete_result = {}
-        self.__insert_new_photo_result = {}
-        self.__delete_photo_result = {}
+    prefix_index_lock: asyncio.Lock = asyncio.Lock()
 
     @property
-    def all(self) -> List[Dict] | Dict:
-        return self.__all_products
+    def database(self) -> AsyncIOMotorCollection:
+        return DB.products
 
     @property
-    def many(self) -> List[Dict]:
-        return self.__products
+    def listing(self) -> AsyncIOMotorCollection:
+        # pages of the catalog can be read from secondaries, see MONGODB_LISTING_READ_PREFERENCE
+        return self.database.with_options(read_preference=SETTINGS.listing)
 
-    @property
-    def one(self) -> Dict:
-        return self.__product
-
-    @property
-    def create_result(self) -> Dict:
-        return self.__create_result
-
-    @property
-    def update_result(self) -> Dict:
-        return self.__update_result
-
-    @property
-    def delete_result(self) -> Dict:
-        return self.__delete_result
-
-    @property
-    def insert_new_photo_result(self) -> Dict:
-        return self.__insert_new_photo_result
+    def find_all(self, limit: Optional[int] = None, after: Optional[str] = None) -> AsyncIOMotorCursor:
+        cursor: AsyncIOMotorCursor = self.listing.find(keyset_filter(after)).sort('_id', ASCENDING)
+        if limit:
+            cursor = cursor.limit(limit)
+        return cursor
 
-    @property
-    def delete_photo_result(self) -> Dict:
-        return self.__delete_photo_result
-
-    def get_all(self) -> None:
+    async def get_all(self, limit: Optional[int] = None, after: Optional[str] = None) -> List[Dict] | Dict:
+        # without a limit the page is the whole catalog; a secondary may still hold a page
+        # older than the last invalidation, and caching it would outlive the write
+        cacheable: bool = limit is not None and SETTINGS.listing_read_preference == 'primary'
         try:
-            response: List[Dict] = self.database.find()
-            response: List[Dict] = list(response)
-            if len(response) > 0:
-                self.__all_products: List[Dict] = response
-            else:
-                self.__all_products: List = []
+            if cacheable:
+                cached: List[Dict] | None = await products_cache.get_page(limit, after)
+                if cached is not None:
+                    return cached
+            generation: int = products_cache.generation
+            response: List[Dict] = await self.find_all(limit, after).to_list(length=None)
+            if cacheable:
+                await products_cache.set_page(limit, after, response, generation)
+            return response
         except errors.OperationFailure:
-            self.__all_products: Dict = {'failed': 'An error has occurred: database operation fails'}
+            return {'failed': 'An error has occurred: database operation fails'}
         except Exception:
-            self.__all_products: Dict = {'failed': 'An error has occurred'}
+            return {'failed': 'An error has occurred'}
 
-    def get_many(self, query: ProductQuery):
+    async def get_many(self, query: ProductQuery) -> List[Dict] | Dict:
         params: Dict = query.params()
         try:
-            response: List[Dict] = self.database.find(params)
-            response: List[Dict] = list(response)
-            if len(response) > 0:
-                self.__products: List[Dict] = response
+            if '$text' in params:
+                # served by the products_text index, best matches first
+                score: Dict = {'score': {'$meta': 'textScore'}}
+                response: AsyncIOMotorCursor = self.database.find(params, score).sort(list(score.items()))
             else:
-                self.__products: List = []
+                response: AsyncIOMotorCursor = self.database.find(params)
+            response: List[Dict] = await response.to_list(length=None)
+            return response
         except errors.OperationFailure:
-            self.__products: Dict = {'failed': 'An error has occurred: database operation fails'}
+            return {'failed': 'An error has occurred: database operation fails'}
         except Exception:
-            self.__products: Dict = {'failed': 'An error has occurred'}
+            return {'failed': 'An error has occurred'}
 
-    def get_one_by_id(self, _id: str, projection: bool = False) -> None:
+    async def autocomplete(self, prefix: str, limit: int = AUTOCOMPLETE_MAX_RESULTS) -> List[Dict] | Dict:
+        """
+        Products whose name words start with the prefix, from the in-process index.
+        The index is loaded from the database on the first call.
+        :parameter: prefix: str = beginning of the name words.
+        :parameter: limit: int = maximum number of products.
+        :return: List[Dict] = _id and name of each product.
+        """
+        try:
+            if not products_prefix_index.loaded:
+                async with self.prefix_index_lock:
+                    if not products_prefix_index.loaded:
+                        names: List[Dict] = await self.database.find({}, {'name': 1}).to_list(length=None)
+                        products_prefix_index.load(names)
+            return products_prefix_index.search(prefix, limit)
+        except errors.OperationFailure:
+            return {'failed': 'An error has occurred: database operation fails'}
+        except Exception:
+            return {'failed': 'An error has occurred'}
+
+    async def get_one_by_id(self, _id: str, projection: bool = False) -> Dict:
         _id: ObjectId = ObjectId(_id)
         try:
-            if projection:
-                response: Dict = self.database.find_one({"_id": _id},
-                                                        {'created_at': 0,
-                                                         'photos': 0,
-                                                         'last_modified': 0})
-            else:
-                response: Dict = DB.products.find_one({"_id": _id})
+            response: Dict | None = await products_cache.get_product(str(_id))
+            if response is None:
+                generation: int = products_cache.generation
+                response = await self.database.find_one({"_id": _id})
+                if response:
+                    await products_cache.set_product(str(_id), response, generation)
             if response:
-                self.__product: Dict = response
-            else:
-                self.__product: Dict = {'failed': 'Product not founded',
-                                        '_id': str(_id)}
+                if projection:
+                    for field in ('created_at', 'photos', 'photo_variants', 'last_modified'):
+                        response.pop(field, None)
+                return response
+            return {'failed': 'Product not founded',
+                    '_id': str(_id)}
         except errors.OperationFailure:
-            self.__product: Dict = {'failed': 'An error has occurred: database operation fails'}
+            return {'failed': 'An error has occurred: database operation fails'}
         except Exception:
-            self.__product: Dict = {'failed': 'An error has occurred'}
+            return {'failed': 'An error has occurred'}
 
-    def create_one(self, product: Product) -> None:
+    async def get_last_modified(self, _id: str) -> Dict:
+        """
+        _id and last_modified only, from the cache or through a projected lookup.
+        :parameter: _id: str = product ID.
+        :return: Dict
+        """
+        try:
+            product: Dict | None = await products_cache.get_product(_id)
+            if product is None:
+                product = await self.database.find_one({"_id": ObjectId(_id)}, {'last_modified': 1})
+            if product:
+                return {'_id': product['_id'], 'last_modified': product.get('last_modified')}
+            return {'failed': 'Product not founded',
+                    '_id': _id}
+        except errors.OperationFailure:
+            return {'failed': 'An error has occurred: database operation fails'}
+        except Exception:
+            return {'failed': 'An error has occurred'}
+
+    async def cache_stats(self) -> Dict:
+        return {**products_cache.stats,
+                'watcher': change_watcher.status}
+
+    async def create_one(self, product: Product) -> Dict:
         product: FullProduct = FullProduct(**product.to_dict())
         product: Dict = product.to_dict()
         try:
-            response: Any = self.database.insert_one(product).inserted_id
+            response: Any = (await self.database.insert_one(product)).inserted_id
             if response:
-                self.__create_result: Dict = {'success': 'Created product',
-                                              '_id': str(response)}
-            else:
-                self.__create_result: Dict = {'failed': 'Product not created'}
+                products_prefix_index.add(str(response), product['name'])
+                await products_cache.invalidate(str(response))
+                return {'success': 'Created product',
+                        '_id': str(response)}
+            return {'failed': 'Product not created'}
         except errors.DuplicateKeyError as error:
-            self.__create_result: Dict = {'failed': "Duplicate key error",
-                                          'message': error.details.get('keyValue')}
+            return {'failed': "Duplicate key error",
+                    'message': error.details.get('keyValue')}
         except errors.WriteError as error:
-            self.__create_result: Dict = {'failed': "Validate error",
-                                          'message': error.details.get('keyValue')}
+            return {'failed': "Validate error",
+                    'message': error.details.get('keyValue')}
         except errors.OperationFailure:
-            self.__create_result: Dict = {'failed': 'An error has occurred: database operation fails'}
+            return {'failed': 'An error has occurred: database operation fails'}
         except Exception:
-            self.__create_result: Dict = {'failed': 'An error has occurred'}
+            return {'failed': 'An error has occurred'}
 
-    def update_one_by_id(self, updates: ProductUpdate) -> None:
+    async def update_one_by_id(self, updates: ProductUpdate) -> Dict:
         updates: Dict = updates.params()
         all_updates: Dict = {
             "$set": updates
         }
         try:
-            result: int = self.database.update_one({"_id": updates['_id']},
-                                                   all_updates).modified_count
-            self.__update_result: Dict = {'success': f'{result} product(s) updated'} if result > 0 \
+            result: int = (await self.database.update_one({"_id": updates['_id']},
+                                                          all_updates)).modified_count
+            await products_cache.invalidate(str(updates['_id']))
+            if result > 0 and 'name' in updates:
+                products_prefix_index.add(str(updates['_id']), updates['name'])
+            return {'success': f'{result} product(s) updated'} if result > 0 \
                 else {'failed': 'Product not updated',
                       '_id': str(updates['_id'])}
         except errors.DuplicateKeyError as error:
-            self.__update_result: Dict = {'failed': "Duplicate key error",
-                                          'message': error.details.get('keyValue')}
+            return {'failed': "Duplicate key error",
+                    'message': error.details.get('keyValue')}
         except errors.WriteError as error:
-            self.__update_result: Dict = {'failed': "Validate error",
-                                          'message': error.details.get('keyValue')}
+            return {'failed': "Validate error",
+                    'message': error.details.get('keyValue')}
         except errors.OperationFailure:
-            self.__update_result: Dict = {'failed': 'An error has occurred: database operation fails'}
+            return {'failed': 'An error has occurred: database operation fails'}
         except Exception:
-            self.__update_result: Dict = {'failed': 'An error has occurred'}
+            return {'failed': 'An error has occurred'}
 
-    def delete_one_by_id(self, _id: str) -> None:
+    async def delete_one_by_id(self, _id: str) -> Dict:
         _id: ObjectId = ObjectId(_id)
         try:
-            result: int = self.database.delete_one({"_id": _id}).deleted_count
-            self.__delete_result: Dict = {'success': f'{result} product(s) deleted'} if result > 0 \
+            result: int = (await self.database.delete_one({"_id": _id})).deleted_count
+            products_prefix_index.remove(str(_id))
+            await products_cache.invalidate(str(_id))
+            return {'success': f'{result} product(s) deleted'} if result > 0 \
                 else {'failed': 'Product not deleted',
                       '_id': str(_id)}
         except errors.OperationFailure:
-            self.__delete_result: Dict = {'failed': 'An error has occurred: database operation fails'}
+            return {'failed': 'An error has occurred: database operation fails'}
         except Exception:
-            self.__delete_result: Dict = {'failed': 'An error has occurred'}
+            return {'failed': 'An error has occurred'}
 
-    def insert_photo(self, photo_url: str) -> None:
-        product_id: ObjectId = ObjectId(self.one['_id'])
+    async def reserve_stock(self, product_id: str, quantity: int) -> Dict:
+        """
+        Take quantity units out of stock in a single conditional update, so concurrent
+        reservations can never drive the stock below zero.
+        :parameter: product_id: str = product ID.
+        :parameter: quantity: int = units to reserve.
+        :return: Dict = the product as it was before the reservation, or a failure.
+        """
+        _id: ObjectId = ObjectId(product_id)
+        try:
+            response: Dict | None = await self.database.find_one_and_update(
+                {"_id": _id, "quantity": {"$gte": quantity}},
+                {"$inc": {"quantity": -quantity},
+                 "$set": {"last_modified": datetime.now()}},
+                projection={'created_at': 0,
+                            'photos': 0,
+                            'photo_variants': 0,
+                            'last_modified': 0},
+                return_document=ReturnDocument.BEFORE)
+            if response:
+                await products_cache.invalidate(product_id)
+                return response
+            # the reservation did not match: find out why, only on this slow path
+            product: Dict | None = await self.database.find_one({"_id": _id},
+                                                                {'quantity': 1})
+            if not product:
+                return {'failed': 'product not founded',
+                        '_id': product_id}
+            return {'failed': 'product is not enough in stock',
+                    '_id': product_id,
+                    'quantity_in_stock': product['quantity'],
+                    'quantity_requested': quantity}
+        except errors.OperationFailure:
+            return {'failed': 'An error has occurred: database operation fails'}
+        except Exception:
+            return {'failed': 'An error has occurred'}
+
+    async def release_stock(self, product_id: str, quantity: int) -> Dict:
+        """
+        Give quantity units back to stock.
+        :parameter: product_id: str = product ID.
+        :parameter: quantity: int = units to release.
+        :return: Dict
+        """
+        try:
+            result: int = (await self.database.update_one({"_id": ObjectId(product_id)},
+                                                          {"$inc": {"quantity": quantity},
+                                                           "$set": {"last_modified": datetime.now()}}
+                                                          )).modified_count
+            await products_cache.invalidate(product_id)
+            return {'success': f'{result} product(s) restocked'} if result > 0 \
+                else {'failed': 'Product not restocked',
+                      '_id': product_id}
+        except errors.OperationFailure:
+            return {'failed': 'An error has occurred: database operation fails'}
+        except Exception:
+            return {'failed': 'An error has occurred'}
+
+    async def restock_many(self, quantities: Dict[str, int]) -> Dict:
+        """
+        Give units back to many products with a single bulk_write.
+        :parameter: quantities: Dict[str, int] = units to release per product ID.
+        :return: Dict
+        """
+        if not quantities:
+            return {'success': '0 product(s) restocked'}
+        now: datetime = datetime.now()
+        requests: List[UpdateOne] = [UpdateOne({"_id": ObjectId(product_id)},
+                                               {"$inc": {"quantity": quantity},
+                                                "$set": {"last_modified": now}})
+                                     for product_id, quantity in quantities.items()]
+        try:
+            result: int = (await self.database.bulk_write(requests, ordered=False)).modified_count
+            await products_cache.invalidate(*quantities)
+            return {'success': f'{result} product(s) restocked'}
+        except errors.BulkWriteError as error:
+            await products_cache.invalidate(*quantities)
+            return {'failed': 'Some products were not restocked',
+                    'message': error.details.get('writeErrors')}
+        except errors.OperationFailure:
+            return {'failed': 'An error has occurred: database operation fails'}
+        except Exception:
+            return {'failed': 'An error has occurred'}
+
+    async def insert_photo(self, product_id: str, photo_url: str) -> Dict:
         query: Dict = {
-            "_id": product_id
+            "_id": ObjectId(product_id)
         }
         update: Dict = {
             "$push": {
                 "photos": photo_url,
+            },
+            "$set": {
+                "last_modified": datetime.now(),
+            }
+        }
+        try:
+            result: int = (await self.database.update_one(query, update)).modified_count
+            if result > 0:
+                await products_cache.invalidate(product_id)
+                return {'success': 'Photo inserted',
+                        'quantity': result}
+            return {'failed': 'Product not founded',
+                    '_id': product_id}
+        except errors.OperationFailure:
+            return {'failed': 'An error has occurred: database operation fails'}
+        except Exception:
+            return {'failed': 'An error has occurred'}
+
+    async def insert_photo_variants(self, product_id: str, photo_url: str, variants: Dict[str, Dict]) -> Dict:
+        """
+        Record the resized copies of a photo, unless the photo was removed meanwhile.
+        New products are inserted without photo_variants and the first $push creates it,
+        so creating a product never depends on the validator update of the bootstrap.
+        :parameter: product_id: str = product ID.
+        :parameter: photo_url: str = url of the original photo.
+        :parameter: variants: Dict[str, Dict] = width, height, webp and jpeg urls per variant.
+        :return: Dict
+        """
+        query: Dict = {
+            "_id": ObjectId(product_id),
+            "photos": photo_url
+        }
+        update: Dict = {
+            "$push": {
+                "photo_variants": {"photo": photo_url, **variants},
+            },
+            "$set": {
+                "last_modified": datetime.now(),
             }
         }
         try:
-            result: int = self.database.update_one(query, update).modified_count
-            self.__insert_new_photo_result: Dict = {'success': 'Photo inserted',
-                                                    'quantity': result}
+            result: int = (await self.database.update_one(query, update)).modified_count
+            if result > 0:
+                await products_cache.invalidate(product_id)
+                return {'success': 'photo variants inserted',
+                        'quantity': result}
+            return {'failed': 'Product not founded or photo removed',
+                    '_id': product_id}
         except errors.OperationFailure:
-            self.__insert_new_photo_result: Dict = {'failed': 'An error has occurred: database operation fails'}
+            return {'failed': 'An error has occurred: database operation fails'}
         except Exception:
-            self.__insert_new_photo_result: Dict = {'failed': 'An error has occurred'}
+            return {'failed': 'An error has occurred'}
 
-    def remove_photo(self, photo_url: str) -> None:
-        product_id: ObjectId = ObjectId(self.one['_id'])
+    async def remove_photo(self, product_id: str, photo_url: str) -> Dict:
         query: Dict = {
-            "_id": product_id
+            "_id": ObjectId(product_id)
         }
         pull: Dict = {
             "$pull": {
-                "photos": photo_url
+                "photos": photo_url,
+                "photo_variants": {"photo": photo_url}
+            },
+            "$set": {
+                "last_modified": datetime.now(),
             }
         }
         try:
-            result: int = self.database.update_one(query, pull).modified_count
-            self.__delete_photo_result: Dict = {'success': 'Photo removed',
-                                                'quantity': result}
+            result: int = (await self.database.update_one(query, pull)).modified_count
+            await products_cache.invalidate(product_id)
+            return {'success': 'Photo removed',
+                    'quantity': result}
         except errors.OperationFailure:
-            self.__delete_photo_result: Dict = {'failed': 'An error has occurred: database operation fails'}
+            return {'failed': 'An error has occurred: database operation fails'}
         except Exception:
-            self.__delete_photo_result: Dict = {'failed': 'An error has occurred'}
+            return {'failed': 'An error has occurred'}
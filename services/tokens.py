@@ -1,7 +1,8 @@
 from typing import Dict
+from motor.motor_asyncio import AsyncIOMotorCollection
 from database import DB
 import os
-from utils import verify_hashed_value
+from utils import hashing_pool
 from dotenv import load_dotenv, find_dotenv
 import jwt
 from datetime import datetime, timedelta
@@ -17,23 +18,27 @@ ACCESS_TOKEN_EXPIRE_MINUTES = float(os.environ.get("ACCESS_TOKEN_EXPIRE_MINUTES"
 
 
 class TokensService:
-    def __init__(self):
-        self.database_clients = DB.clients
-        self.database_users = DB.users
+    @property
+    def database_clients(self) -> AsyncIOMotorCollection:
+        return DB.clients
 
-    def create_token_client(self, client: ClientAuth) -> Dict:
-        client_saved: Dict | None = self.database_clients.find_one({'email': client.email},
-                                                                   {'created_at': 0,
-                                                                    'last_modified': 0,
-                                                                    'orders': 0,
-                                                                    'name': 0,
-                                                                    'phone': 0,
-                                                                    'cpf': 0
-                                                                    })
+    @property
+    def database_users(self) -> AsyncIOMotorCollection:
+        return DB.users
+
+    async def create_token_client(self, client: ClientAuth) -> Dict:
+        client_saved: Dict | None = await self.database_clients.find_one({'email': client.email},
+                                                                         {'created_at': 0,
+                                                                          'last_modified': 0,
+                                                                          'orders': 0,
+                                                                          'name': 0,
+                                                                          'phone': 0,
+                                                                          'cpf': 0
+                                                                          })
         if not client_saved:
             return {'failed': 'Client not founded'}
-        is_valid: bool = verify_hashed_value(client.password,
-                                             client_saved['password'])
+        is_valid: bool = await hashing_pool.verify(client.password,
+                                                   client_saved['password'])
         client_saved['_id']: str = str(client_saved['_id'])
         if is_valid:
             expiration = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
@@ -52,18 +57,18 @@ class TokensService:
                     "expiration": f"{expiration}"}
         return {'failed': 'Passwords not match'}
 
-    def create_token_user(self, user: Dict) -> Dict:
-        user_saved: Dict | None = self.database_users.find_one({'email': user['email']},
-                                                               {'name': 0,
-                                                                'cpf': 0,
-                                                                'phone': 0,
-                                                                'created_at': 0,
-                                                                'last_modified': 0
-                                                                })
+    async def create_token_user(self, user: Dict) -> Dict:
+        user_saved: Dict | None = await self.database_users.find_one({'email': user['email']},
+                                                                     {'name': 0,
+                                                                      'cpf': 0,
+                                                                      'phone': 0,
+                                                                      'created_at': 0,
+                                                                      'last_modified': 0
+                                                                      })
         if not user_saved:
             return {'failed': 'User not founded'}
-        is_valid: bool = verify_hashed_value(user['password'],
-                                             user_saved['password'])
+        is_valid: bool = await hashing_pool.verify(user['password'],
+                                                   user_saved['password'])
         user_saved['_id']: str = str(user_saved['_id'])
         if is_valid:
             expiration = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
@@ -82,14 +87,14 @@ class TokensService:
                     "expiration": f"{expiration}"}
         return {'failed': 'Passwords not match'}
 
-    def verify_client_token(self, email: str, password: str) -> bool:
-        client_saved = self.database_clients.find_one({'email': email})
+    async def verify_client_token(self, email: str, password: str) -> bool:
+        client_saved = await self.database_clients.find_one({'email': email})
         if not client_saved:
             return False
         return password == client_saved['password']
 
-    def verify_user_token(self, email: str, password: str) -> bool:
-        user_saved = self.database_users.find_one({'email': email})
+    async def verify_user_token(self, email: str, password: str) -> bool:
+        user_saved = await self.database_users.find_one({'email': email})
         if not user_saved:
             return False
         return password == user_saved['password']
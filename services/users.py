@@ -1,136 +1,119 @@
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 from bson.objectid import ObjectId
-from pymongo import errors
-from database import DB
+from pymongo import errors, ASCENDING
+from motor.motor_asyncio import AsyncIOMotorCursor, AsyncIOMotorCollection
+from database import DB, SETTINGS
+from utils import keyset_filter, hashing_pool
+from cache import users_identity_cache
 from .interface import IServices
 from models import User, UserUpdate, FullUser, UserQuery
 
 
 class UsersService(IServices):
-    def __init__(self):
-        self.database = DB.users
-        self.__all_users = []
-        self.__users = []
-        self.__user = {}
-        self.__create_result = {}
-        self.__update_result = {}
-        self.__delete_result = {}
-
-    @property
-    def all(self) -> List[Dict]:
-        return self.__all_users
-
-    @property
-    def many(self) -> List[Dict]:
-        return self.__users
-
-    @property
-    def one(self) -> Dict:
-        return self.__user
-
     @property
-    def create_result(self) -> Dict:
-        return self.__create_result
+    def database(self) -> AsyncIOMotorCollection:
+        # resolved on use, so services can be built before the application starts
+        return DB.users
 
     @property
-    def update_result(self) -> Dict:
-        return self.__update_result
+    def listing(self) -> AsyncIOMotorCollection:
+        # pages of the listing can be read from secondaries, see MONGODB_LISTING_READ_PREFERENCE
+        return self.database.with_options(read_preference=SETTINGS.listing)
 
-    @property
-    def delete_result(self) -> Dict:
-        return self.__delete_result
+    def find_all(self, limit: Optional[int] = None, after: Optional[str] = None) -> AsyncIOMotorCursor:
+        cursor: AsyncIOMotorCursor = self.listing.find(keyset_filter(after),
+                                                       {'password': 0}).sort('_id', ASCENDING)
+        if limit:
+            cursor = cursor.limit(limit)
+        return cursor
 
-    def get_all(self) -> None:
+    async def get_all(self, limit: Optional[int] = None, after: Optional[str] = None) -> List[Dict] | Dict:
         try:
-            response: List[Dict] = self.database.find({},
-                                                      {'password': 0})
-            response: List[Dict] = list(response)
-            if len(response) > 0:
-                self.__all_users: List[Dict] = response
-            else:
-                self.__all_users: List = []
+            response: List[Dict] = await self.find_all(limit, after).to_list(length=None)
+            return response
         except Exception:
-            self.__all_users: Dict = {'failed': 'an error has occurred'}
+            return {'failed': 'an error has occurred'}
 
-    def get_one_by_id(self, _id: str) -> None:
+    async def get_one_by_id(self, _id: str) -> Dict:
         _id = ObjectId(_id)
         try:
-            response: Dict = self.database.find_one({"_id": _id},
-                                                    {'password': 0})
+            response: Dict = await self.database.find_one({"_id": _id},
+                                                          {'password': 0})
             if response:
-                self.__user: Dict = response
-            else:
-                self.__user: Dict = {'failed': 'user not founded',
-                                     '_id': str(_id)}
+                return response
+            return {'failed': 'user not founded',
+                    '_id': str(_id)}
         except errors.OperationFailure:
-            self.__user: Dict = {'failed': 'an error has occurred: database operation fails'}
+            return {'failed': 'an error has occurred: database operation fails'}
         except Exception:
-            self.__user = {'failed': 'an error has occurred'}
+            return {'failed': 'an error has occurred'}
 
-    def get_many(self, query: UserQuery):
+    async def get_many(self, query: UserQuery) -> List[Dict] | Dict:
         params: Dict = query.params()
         try:
-            response: List[Dict] = self.database.find(params)
-            response: List[Dict] = list(response)
-            if len(response) > 0:
-                self.__users: List[Dict] = response
-            else:
-                self.__users: List = []
+            response: AsyncIOMotorCursor = self.database.find(params)
+            response: List[Dict] = await response.to_list(length=None)
+            return response
         except errors.OperationFailure:
-            self.__users: Dict = {'failed': 'An error has occurred: database operation fails'}
+            return {'failed': 'An error has occurred: database operation fails'}
         except Exception:
-            self.__users: Dict = {'failed': 'An error has occurred'}
+            return {'failed': 'An error has occurred'}
 
-    def create_one(self, user: User) -> None:
+    async def create_one(self, user: User) -> Dict:
         user: FullUser = FullUser(**user.to_dict())
         user: Dict = user.to_dict()
+        user['password'] = await hashing_pool.hash(user['password'])
         try:
-            response: Any = self.database.insert_one(user).inserted_id
+            response: Any = (await self.database.insert_one(user)).inserted_id
             if response:
-                self.__create_result: Dict = {'success': 'created user',
-                                              '_id': str(response)}
-            else:
-                self.__create_result: Dict = {'failed': 'an error has occurred'}
+                return {'success': 'created user',
+                        '_id': str(response)}
+            return {'failed': 'an error has occurred'}
         except errors.DuplicateKeyError as error:
-            self.__create_result: Dict = {'failed': "duplicate key error",
-                                          'message': error.details.get('keyValue')}
+            return {'failed': "duplicate key error",
+                    'message': error.details.get('keyValue')}
         except errors.WriteError as error:
-            self.__create_result: Dict = {'failed': "validate error",
-                                          'message': error.details.get('keyValue')}
+            return {'failed': "validate error",
+                    'message': error.details.get('keyValue')}
         except errors.OperationFailure:
-            self.__create_result: Dict = {'failed': 'an error has occurred: database operation fails'}
+            return {'failed': 'an error has occurred: database operation fails'}
         except Exception:
-            self.__create_result: Dict = {'failed': 'an error has occurred'}
+            return {'failed': 'an error has occurred'}
 
-    def update_one_by_id(self, updates: UserUpdate) -> None:
+    async def update_one_by_id(self, updates: UserUpdate) -> Dict:
         updates = updates.params()
+        if 'password' in updates:
+            updates['password'] = await hashing_pool.hash(updates['password'])
         all_updates: Dict = {
             "$set": updates
         }
         try:
-            result: int = self.database.update_one({"_id": updates['_id']}, all_updates).modified_count
-            self.__update_result: Dict = {'success': f'{result} user(s) modified'} if result > 0 \
+            result: int = (await self.database.update_one({"_id": updates['_id']}, all_updates)).modified_count
+            if 'password' in updates or 'email' in updates:
+                users_identity_cache.invalidate_subject(str(updates['_id']))
+            return {'success': f'{result} user(s) modified'} if result > 0 \
                 else {'failed': 'User not updated',
                       '_id': str(updates['_id'])}
         except errors.DuplicateKeyError as error:
-            self.__update_result: Dict = {'failed': "duplicate key error",
-                                          'message': error.details.get('keyValue')}
+            return {'failed': "duplicate key error",
+                    'message': error.details.get('keyValue')}
         except errors.WriteError as error:
-            self.__update_result: Dict = {'failed': "validate error",
-                                          'message': error.details.get('keyValue')}
+            return {'failed': "validate error",
+                    'message': error.details.get('keyValue')}
         except errors.OperationFailure:
-            self.__update_result: Dict = {'failed': 'an error has occurred: database operation fails'}
+            return {'failed': 'an error has occurred: database operation fails'}
         except Exception:
-            self.__update_result: Dict = {'failed': 'an error has occurred'}
+            return {'failed': 'an error has occurred'}
 
-    def delete_one_by_id(self, _id: str) -> None:
+    async def delete_one_by_id(self, _id: str) -> Dict:
         _id: ObjectId = ObjectId(_id)
         try:
-            result: int = self.database.delete_one({"_id": _id}).deleted_count
-            self.__delete_result: Dict = {'success': f'{result} user(s) deleted'} if result > 0 \
+            result: int = (await self.database.delete_one({"_id": _id})).deleted_count
+            users_identity_cache.invalidate_subject(str(_id))
+            return {'success': f'{result} user(s) deleted'} if result > 0 \
                 else {'failed': 'user not deleted',
                       '_id': str(_id)}
         except errors.OperationFailure:
-            self.__delete_result: Dict = {'failed': 'an error has occurred: database operation fails'}
+            return {'failed': 'an error has occurred: database operation fails'}
         except Exception:
-            self.__delete_result: Dict = {'failed': 'an error has occurred'}
+            return {'failed': 'an error has occurred'}
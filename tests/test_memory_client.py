@@ -0,0 +1,219 @@
+"""
+Operators of the in-process database that the services rely on
+"""
+import asyncio
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Dict, List
+import pytest
+from bson import ObjectId
+from pymongo import IndexModel, ReturnDocument, UpdateOne, InsertOne, TEXT, errors
+from database.memory_client import MemoryClient, MemoryCollection
+
+
+def run(awaitable: Awaitable) -> Any:
+    return asyncio.run(awaitable)
+
+
+@pytest.fixture
+def collection() -> MemoryCollection:
+    return MemoryClient()['test']['products']
+
+
+def test_reserve_stock_only_matches_enough_quantity(collection: MemoryCollection) -> None:
+    _id: ObjectId = run(collection.insert_one({'name': 'shirt', 'quantity': 5})).inserted_id
+
+    async def reserve(quantity: int) -> Dict | None:
+        return await collection.find_one_and_update({'_id': _id, 'quantity': {'$gte': quantity}},
+                                                    {'$inc': {'quantity': -quantity}},
+                                                    projection={'quantity': 1},
+                                                    return_document=ReturnDocument.BEFORE)
+
+    assert run(reserve(3)) == {'_id': _id, 'quantity': 5}
+    assert run(reserve(3)) is None
+    assert run(reserve(2)) == {'_id': _id, 'quantity': 2}
+    assert run(collection.find_one({'_id': _id}))['quantity'] == 0
+
+
+def test_reserve_stock_returns_the_document_after(collection: MemoryCollection) -> None:
+    _id: ObjectId = run(collection.insert_one({'quantity': 5})).inserted_id
+    after: Dict = run(collection.find_one_and_update({'_id': _id, 'quantity': {'$gte': 1}},
+                                                     {'$inc': {'quantity': -1}},
+                                                     return_document=ReturnDocument.AFTER))
+    assert after['quantity'] == 4
+
+
+def test_push_and_pull(collection: MemoryCollection) -> None:
+    _id: ObjectId = run(collection.insert_one({'items': []})).inserted_id
+    run(collection.update_one({'_id': _id}, {'$push': {'items': {'_id': 'a', 'quantity': 1}}}))
+    run(collection.update_one({'_id': _id}, {'$push': {'items': {'_id': 'b', 'quantity': 2}}}))
+    run(collection.update_one({'_id': _id}, {'$push': {'photos': 'one.png'}}))
+    document: Dict = run(collection.find_one({'_id': _id}))
+    assert [item['_id'] for item in document['items']] == ['a', 'b']
+    assert document['photos'] == ['one.png']
+
+    before: Dict = run(collection.find_one_and_update({'_id': _id, 'items._id': 'a'},
+                                                      {'$pull': {'items': {'_id': 'a'}}},
+                                                      return_document=ReturnDocument.BEFORE))
+    assert len(before['items']) == 2
+    run(collection.update_one({'_id': _id}, {'$pull': {'photos': 'one.png'}}))
+    document = run(collection.find_one({'_id': _id}))
+    assert document['items'] == [{'_id': 'b', 'quantity': 2}]
+    assert document['photos'] == []
+
+
+def test_push_on_a_field_that_is_not_an_array(collection: MemoryCollection) -> None:
+    _id: ObjectId = run(collection.insert_one({'photos': 'one.png'})).inserted_id
+    with pytest.raises(errors.WriteError):
+        run(collection.update_one({'_id': _id}, {'$push': {'photos': 'two.png'}}))
+
+
+def test_unordered_bulk_write_runs_every_request(collection: MemoryCollection) -> None:
+    run(collection.create_indexes([IndexModel([('name', 1)], unique=True, name='name_unique')]))
+    first: ObjectId = run(collection.insert_one({'name': 'shirt', 'quantity': 1})).inserted_id
+    second: ObjectId = run(collection.insert_one({'name': 'socks', 'quantity': 1})).inserted_id
+    requests: List = [UpdateOne({'_id': first}, {'$inc': {'quantity': 2}}),
+                      InsertOne({'name': 'shirt'}),
+                      UpdateOne({'_id': second}, {'$inc': {'quantity': 3}})]
+    with pytest.raises(errors.BulkWriteError) as error:
+        run(collection.bulk_write(requests, ordered=False))
+    assert [failure['index'] for failure in error.value.details['writeErrors']] == [1]
+    assert error.value.details['nModified'] == 2
+    assert run(collection.find_one({'_id': second}))['quantity'] == 4
+
+
+def test_ordered_bulk_write_stops_at_the_first_error(collection: MemoryCollection) -> None:
+    run(collection.create_indexes([IndexModel([('name', 1)], unique=True, name='name_unique')]))
+    _id: ObjectId = run(collection.insert_one({'name': 'shirt', 'quantity': 1})).inserted_id
+    with pytest.raises(errors.BulkWriteError):
+        run(collection.bulk_write([InsertOne({'name': 'shirt'}),
+                                   UpdateOne({'_id': _id}, {'$inc': {'quantity': 1}})]))
+    assert run(collection.find_one({'_id': _id}))['quantity'] == 1
+
+
+def test_unordered_bulk_write_counts(collection: MemoryCollection) -> None:
+    ids: List[ObjectId] = run(collection.insert_many([{'quantity': 0}, {'quantity': 0}])).inserted_ids
+    result = run(collection.bulk_write([UpdateOne({'_id': _id}, {'$inc': {'quantity': 1}}) for _id in ids]
+                                       + [UpdateOne({'_id': ObjectId()}, {'$inc': {'quantity': 1}})],
+                                       ordered=False))
+    assert result.matched_count == 2
+    assert result.modified_count == 2
+
+
+def test_text_search_and_score(collection: MemoryCollection) -> None:
+    run(collection.create_indexes([IndexModel([('name', TEXT), ('description', TEXT)], name='products_text')]))
+    run(collection.insert_many([{'name': 'blue shirt', 'description': 'cotton shirt', 'brand': 'a'},
+                                {'name': 'red shirt', 'description': 'wool', 'brand': 'b'},
+                                {'name': 'socks', 'description': 'blue socks', 'brand': 'a'}]))
+    score: Dict = {'score': {'$meta': 'textScore'}}
+    found: List[Dict] = run(collection.find({'$text': {'$search': 'shirt'}}, score)
+                            .sort(list(score.items())).to_list(length=None))
+    assert [document['name'] for document in found] == ['blue shirt', 'red shirt']
+    assert found[0]['score'] > found[1]['score']
+
+    found = run(collection.find({'$text': {'$search': 'blue'}, 'brand': 'a',
+                                 'name': {'$regex': 'sock'}}).to_list(length=None))
+    assert [document['name'] for document in found] == ['socks']
+
+
+def test_text_search_without_a_text_index(collection: MemoryCollection) -> None:
+    run(collection.insert_one({'name': 'shirt'}))
+    with pytest.raises(errors.OperationFailure):
+        run(collection.find({'$text': {'$search': 'shirt'}}).to_list(length=None))
+
+
+@pytest.fixture
+def orders() -> MemoryCollection:
+    collection: MemoryCollection = MemoryClient()['test']['orders']
+    day: datetime = datetime(2023, 7, 1, 10)
+    run(collection.insert_many([
+        {'status': 'paid', 'created_at': day,
+         'items': [{'_id': 'a', 'name': 'shirt', 'price': 10.0, 'quantity': 2},
+                   {'_id': 'b', 'name': 'socks', 'price': 2.5, 'quantity': 4}]},
+        {'status': 'shipped', 'created_at': day + timedelta(hours=5),
+         'items': [{'_id': 'a', 'name': 'shirt', 'price': 10.0, 'quantity': 1}]},
+        {'status': 'paid', 'created_at': day + timedelta(days=1),
+         'items': [{'_id': 'b', 'name': 'socks', 'price': 2.5, 'quantity': 1}]},
+        {'status': 'cart', 'created_at': day, 'items': []},
+    ]))
+    return collection
+
+
+def test_revenue_per_day_pipeline(orders: MemoryCollection) -> None:
+    pipeline: List[Dict] = [
+        {'$match': {'status': {'$in': ['paid', 'shipped']}}},
+        {'$project': {'_id': 0,
+                      'day': {'$dateToString': {'format': '%Y-%m-%d', 'date': '$created_at'}},
+                      'revenue': {'$sum': {'$map': {'input': '$items',
+                                                    'as': 'item',
+                                                    'in': {'$multiply': ['$$item.price', '$$item.quantity']}}}},
+                      'units': {'$sum': '$items.quantity'}}},
+        {'$group': {'_id': '$day', 'revenue': {'$sum': '$revenue'}, 'units': {'$sum': '$units'},
+                    'orders': {'$sum': 1}}},
+        {'$project': {'_id': 0, 'day': '$_id', 'revenue': {'$round': ['$revenue', 2]}, 'units': 1, 'orders': 1}},
+        {'$sort': {'day': 1}},
+    ]
+    assert run(orders.aggregate(pipeline).to_list(length=None)) == [
+        {'day': '2023-07-01', 'revenue': 40.0, 'units': 7, 'orders': 2},
+        {'day': '2023-07-02', 'revenue': 2.5, 'units': 1, 'orders': 1},
+    ]
+
+
+def test_units_per_product_pipeline(orders: MemoryCollection) -> None:
+    pipeline: List[Dict] = [
+        {'$match': {'status': {'$in': ['paid', 'shipped']}}},
+        {'$unwind': '$items'},
+        {'$group': {'_id': '$items._id', 'name': {'$first': '$items.name'}, 'units': {'$sum': '$items.quantity'},
+                    'revenue': {'$sum': {'$multiply': ['$items.price', '$items.quantity']}}}},
+        {'$project': {'_id': 0, 'product_id': '$_id', 'name': 1, 'units': 1,
+                      'revenue': {'$round': ['$revenue', 2]}}},
+        {'$sort': {'units': -1, 'product_id': 1}},
+        {'$limit': 1},
+    ]
+    assert run(orders.aggregate(pipeline).to_list(length=None)) == [
+        {'product_id': 'b', 'name': 'socks', 'units': 5, 'revenue': 12.5},
+    ]
+
+
+def test_count_per_status_pipeline(orders: MemoryCollection) -> None:
+    pipeline: List[Dict] = [
+        {'$match': {'created_at': {'$lt': datetime(2023, 7, 2)}}},
+        {'$group': {'_id': '$status', 'orders': {'$sum': 1}}},
+        {'$project': {'_id': 0, 'status': '$_id', 'orders': 1}},
+        {'$sort': {'orders': -1, 'status': 1}},
+    ]
+    assert run(orders.aggregate(pipeline).to_list(length=None)) == [
+        {'status': 'cart', 'orders': 1},
+        {'status': 'paid', 'orders': 1},
+        {'status': 'shipped', 'orders': 1},
+    ]
+
+
+def test_count_stage(orders: MemoryCollection) -> None:
+    assert run(orders.aggregate([{'$match': {'status': 'paid'}}, {'$count': 'orders'}]).to_list(length=None)) \
+        == [{'orders': 2}]
+    assert run(orders.aggregate([{'$match': {'status': 'lost'}}, {'$count': 'orders'}]).to_list(length=None)) == []
+
+
+def test_unknown_stage(orders: MemoryCollection) -> None:
+    with pytest.raises(errors.OperationFailure):
+        run(orders.aggregate([{'$lookup': {}}]).to_list(length=None))
+
+
+def test_datetimes_are_stored_in_milliseconds(collection: MemoryCollection) -> None:
+    created: datetime = datetime(2023, 7, 1, 10, 0, 0, 123456)
+    _id: ObjectId = run(collection.insert_one({'created_at': created, 'history': [{'at': created}]})).inserted_id
+    document: Dict = run(collection.find_one({'_id': _id}))
+    assert document['created_at'] == datetime(2023, 7, 1, 10, 0, 0, 123000)
+    assert document['history'][0]['at'] == datetime(2023, 7, 1, 10, 0, 0, 123000)
+
+    run(collection.update_one({'_id': _id}, {'$set': {'last_modified': datetime(2023, 7, 1, 12, 0, 0, 999999)},
+                                             '$push': {'history': {'at': created}}}))
+    document = run(collection.find_one({'_id': _id}))
+    assert document['last_modified'] == datetime(2023, 7, 1, 12, 0, 0, 999000)
+    assert document['history'][1]['at'].microsecond == 123000
+
+
+def test_aware_datetimes_are_stored_in_utc(collection: MemoryCollection) -> None:
+    created: datetime = datetime(2023, 7, 1, 10, tzinfo=timezone(timedelta(hours=-3)))
+    _id: ObjectId = run(collection.insert_one({'created_at': created})).inserted_id
+    assert run(collection.find_one({'_id': _id}))['created_at'] == datetime(2023, 7, 1, 13)
@@ -0,0 +1,24 @@
+"""
+Filters of /products/many
+"""
+from database.memory_client import _matches
+from models import ProductQuery
+
+NIKE = {'name': 'Tênis Air', 'brand': 'Nike', 'description': 'Corrida (leve)', 'price': 50.0}
+
+
+def test_brand_is_a_case_insensitive_substring() -> None:
+    for brand in ('Nike', 'nike', 'ike', 'NI'):
+        assert _matches(NIKE, ProductQuery(brand=brand).params())
+    assert not _matches(NIKE, ProductQuery(brand='Adidas').params())
+
+
+def test_filters_are_matched_literally() -> None:
+    assert _matches(NIKE, ProductQuery(description='(leve)').params())
+    assert not _matches(NIKE, ProductQuery(brand='N.ke').params())
+    assert not _matches(NIKE, ProductQuery(name='A.r').params())
+
+
+def test_filters_are_anded() -> None:
+    assert _matches(NIKE, ProductQuery(brand='nik', name='air', min_price=10, max_price=60).params())
+    assert not _matches(NIKE, ProductQuery(brand='nik', name='air', max_price=40).params())
@@ -0,0 +1,61 @@
+"""
+Page invalidation of the products cache
+"""
+import asyncio
+from typing import Any, Awaitable, Dict, List
+import pytest
+from cache import ProductsCache, MemoryBackend
+
+
+def run(awaitable: Awaitable) -> Any:
+    return asyncio.run(awaitable)
+
+
+def page(*ids: int) -> List[Dict]:
+    return [{'_id': f'{_id:024x}', 'quantity': 1} for _id in ids]
+
+
+@pytest.fixture
+def cache() -> ProductsCache:
+    products_cache: ProductsCache = ProductsCache(MemoryBackend(100, 60), MemoryBackend(100, 60), 100)
+    generation: int = products_cache.generation
+    run(products_cache.set_page(2, None, page(1, 2), generation))
+    run(products_cache.set_page(2, f'{2:024x}', page(3, 4), generation))
+    run(products_cache.set_page(2, f'{4:024x}', page(5), generation))
+    return products_cache
+
+
+def cached_pages(cache: ProductsCache) -> List[Any]:
+    return [after for after in (None, f'{2:024x}', f'{4:024x}') if run(cache.get_page(2, after)) is not None]
+
+
+def test_a_write_only_drops_the_page_holding_the_product(cache: ProductsCache) -> None:
+    run(cache.invalidate(f'{3:024x}'))
+    assert cached_pages(cache) == [None, f'{4:024x}']
+
+
+def test_a_new_product_drops_the_page_it_falls_into(cache: ProductsCache) -> None:
+    run(cache.invalidate(f'{9:024x}'))
+    assert cached_pages(cache) == [None, f'{2:024x}']
+
+
+def test_a_page_read_before_a_write_is_not_stored(cache: ProductsCache) -> None:
+    generation: int = cache.generation
+    run(cache.invalidate(f'{7:024x}'))
+    run(cache.set_page(2, f'{6:024x}', page(7), generation))
+    run(cache.set_product(f'{7:024x}', page(7)[0], generation))
+    assert run(cache.get_page(2, f'{6:024x}')) is None
+    assert run(cache.get_product(f'{7:024x}')) is None
+
+
+def test_the_oldest_pages_are_dropped_past_the_limit() -> None:
+    cache: ProductsCache = ProductsCache(MemoryBackend(100, 60), MemoryBackend(100, 60), 2)
+    for after in range(3):
+        run(cache.set_page(1, f'{after:024x}', page(after + 1), cache.generation))
+    assert run(cache.get_page(1, f'{0:024x}')) is None
+    assert run(cache.get_page(1, f'{2:024x}')) == page(3)
+
+
+def test_clear_drops_every_page(cache: ProductsCache) -> None:
+    run(cache.clear())
+    assert cached_pages(cache) == []
@@ -5,3 +5,8 @@ from .convert_datetime_to_str import convert_datetime_to_str
 from .hash_value import hash_value
 from .verify_hashed_value import verify_hashed_value
 from .generate_random_string import generate_random_string
+from .keyset_filter import keyset_filter
+from .process_context import process_context, PROCESS_START_METHOD
+from .hashing_pool import HashingPool, HashQueueFullError, hashing_pool
+from .photo_upload import PhotoUploader, UploadError, photo_uploader, sniff_image
+from .image_variants import ImagePipeline, image_pipeline, render_variants, variant_paths, VARIANT_SIZES
@@ -0,0 +1,116 @@
+"""
+Bcrypt hashing and verification off the event loop
+"""
+import os
+import asyncio
+from concurrent.futures import Executor, ThreadPoolExecutor, ProcessPoolExecutor
+from typing import Any, Callable, Dict, Optional
+from dotenv import load_dotenv, find_dotenv
+from .hash_value import hash_value
+from .verify_hashed_value import verify_hashed_value
+from .process_context import process_context
+
+load_dotenv(find_dotenv())
+
+# 'thread' is enough for bcrypt, which releases the GIL; 'process' isolates it completely
+HASH_POOL_KIND = os.environ.get("HASH_POOL_KIND", "thread")
+
+HASH_POOL_WORKERS = int(os.environ.get("HASH_POOL_WORKERS", os.cpu_count() or 1))
+
+HASH_QUEUE_LIMIT = int(os.environ.get("HASH_QUEUE_LIMIT", HASH_POOL_WORKERS * 8))
+
+
+class HashQueueFullError(Exception):
+    """
+    Exception to be raised when too many hashes are already waiting for a worker
+    :param: message - str
+    """
+
+    def __init__(self, message) -> None:
+        self.message = message
+        super().__init__(self.message)
+
+
+class HashingPool:
+    """
+    Run bcrypt in a pool of workers, so a burst of logins never blocks the event loop.
+    At most workers + queue_limit hashes are accepted at once; beyond that the call
+    fails right away with HashQueueFullError instead of queueing without bound.
+    The executor is created on first use.
+    :param:  workers: int - number of threads or processes.
+    :param:  queue_limit: int - hashes allowed to wait for a free worker.
+    :param:  kind: str - 'thread' or 'process'.
+    :return: None.
+    :rtype: none.
+    """
+
+    def __init__(self, workers: int, queue_limit: int, kind: str = 'thread') -> None:
+        if kind not in ('thread', 'process'):
+            raise ValueError("kind must be 'thread' or 'process'")
+        self.__workers: int = max(workers, 1)
+        self.__queue_limit: int = max(queue_limit, 0)
+        self.__kind: str = kind
+        self.__executor: Optional[Executor] = None
+        self.__pending: int = 0
+        self.__rejected: int = 0
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        """Getter method for accessing the pool counters.
+        Returns:
+            Workers, hashes in progress or waiting, and hashes rejected so far.
+        """
+        return {'workers': self.__workers,
+                'pending': self.__pending,
+                'rejected': self.__rejected}
+
+    async def hash(self, value: str) -> str:
+        """
+        Hash a password in the pool.
+        :param value: str
+        :return: str
+        :raises: HashQueueFullError if the pool is saturated.
+        """
+        return await self.__submit(hash_value, value)
+
+    async def verify(self, password: str, hashed_password: str) -> bool:
+        """
+        Check a password against its hash in the pool.
+        :param password: str
+        :param hashed_password: str
+        :return: bool
+        :raises: HashQueueFullError if the pool is saturated.
+        """
+        return await self.__submit(verify_hashed_value, password, hashed_password)
+
+    def shutdown(self) -> None:
+        """
+        Stop the workers; a later call starts a new executor.
+        :return: None
+        """
+        if self.__executor is not None:
+            self.__executor.shutdown(wait=False, cancel_futures=True)
+            self.__executor = None
+
+    async def __submit(self, function: Callable, *args: Any) -> Any:
+        # the counter is only touched from the event loop thread, so it needs no lock
+        if self.__pending >= self.__workers + self.__queue_limit:
+            self.__rejected += 1
+            raise HashQueueFullError("Too many authentication requests, try again later.")
+        self.__pending += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self.__get_executor(), function, *args)
+        finally:
+            self.__pending -= 1
+
+    def __get_executor(self) -> Executor:
+        if self.__executor is None:
+            if self.__kind == 'process':
+                self.__executor = ProcessPoolExecutor(max_workers=self.__workers, mp_context=process_context())
+            else:
+                self.__executor = ThreadPoolExecutor(max_workers=self.__workers,
+                                                     thread_name_prefix='bcrypt')
+        return self.__executor
+
+
+hashing_pool: HashingPool = HashingPool(HASH_POOL_WORKERS, HASH_QUEUE_LIMIT, HASH_POOL_KIND)
@@ -0,0 +1,186 @@
+"""
+Resized WebP and JPEG variants of the uploaded photos, made in a process pool
+"""
+import os
+import asyncio
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Awaitable, Callable, Dict, List, Optional, Set, Tuple
+from PIL import Image, ImageOps
+from dotenv import load_dotenv, find_dotenv
+from .process_context import process_context
+
+load_dotenv(find_dotenv())
+
+IMAGE_POOL_WORKERS = int(os.environ.get("IMAGE_POOL_WORKERS", max((os.cpu_count() or 1) // 2, 1)))
+
+JPEG_QUALITY = int(os.environ.get("IMAGE_JPEG_QUALITY", 82))
+
+WEBP_QUALITY = int(os.environ.get("IMAGE_WEBP_QUALITY", 80))
+
+# longest edge of every variant, in pixels; smaller photos are never enlarged
+VARIANT_SIZES: Dict[str, int] = {'thumbnail': 240, 'medium': 800, 'full': 1600}
+
+
+def render_variants(source: str, sizes: Dict[str, int], jpeg_quality: int, webp_quality: int) -> Dict[str, Dict]:
+    """
+    Write the variants of a photo next to it, as <name>.<variant>.webp and <name>.<variant>.jpg.
+    Runs in a worker process: it only takes and returns plain values.
+    :param source: str - path of the original photo.
+    :param sizes: Dict[str, int] - longest edge of every variant.
+    :param jpeg_quality: int
+    :param webp_quality: int
+    :return: Dict[str, Dict] - per variant: width, height, and the webp and jpeg file names.
+    """
+    directory: str = os.path.dirname(source)
+    variants: Dict[str, Dict] = {}
+    written: List[str] = []
+    try:
+        with Image.open(source) as original:
+            # phones store the orientation aside: apply it, since the variants drop the metadata
+            image: Image.Image = ImageOps.exif_transpose(original)
+            transparent: bool = image.mode in ('RGBA', 'LA', 'PA') or 'transparency' in image.info
+            image = image.convert('RGBA' if transparent else 'RGB')
+            for variant, edge in sorted(sizes.items(), key=lambda item: item[1], reverse=True):
+                # each variant is reduced from the previous, larger one, which is cheaper than from the original
+                image.thumbnail((edge, edge), Image.Resampling.LANCZOS)
+                webp, jpeg = variant_names(source, variant)
+                written.append(os.path.join(directory, webp))
+                image.save(written[-1], 'WEBP', quality=webp_quality, method=4)
+                flat: Image.Image = image
+                if transparent:
+                    flat = Image.new('RGB', image.size, (255, 255, 255))
+                    flat.paste(image, mask=image.getchannel('A'))
+                written.append(os.path.join(directory, jpeg))
+                flat.save(written[-1], 'JPEG', quality=jpeg_quality, optimize=True, progressive=True)
+                variants[variant] = {'width': image.width, 'height': image.height, 'webp': webp, 'jpeg': jpeg}
+    except Exception:
+        # the caller never learns the names of a partial result
+        remove_files(written)
+        raise
+    return variants
+
+
+class ImagePipeline:
+    """
+    Make the variants of the uploaded photos in a pool of processes, in the
+    background: the upload answers as soon as the original is stored, and the
+    variant urls are recorded on the document once they exist. If the document
+    can not be updated (deleted meanwhile, photo removed), the variant files are
+    deleted. The executor is created on first use.
+    :param:  workers: int - number of processes.
+    :param:  sizes: Dict[str, int] - longest edge of every variant.
+    :return: None.
+    :rtype: none.
+    """
+
+    def __init__(self, workers: int, sizes: Dict[str, int]) -> None:
+        self.__workers: int = max(workers, 1)
+        self.__sizes: Dict[str, int] = sizes
+        self.__executor: Optional[Executor] = None
+        self.__tasks: Set[asyncio.Task] = set()
+        self.__processed: int = 0
+        self.__failed: int = 0
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        """Getter method for accessing the pipeline counters.
+        Returns:
+            Workers, photos waiting or in progress, photos processed and photos that failed.
+        """
+        return {'workers': self.__workers,
+                'pending': len(self.__tasks),
+                'processed': self.__processed,
+                'failed': self.__failed}
+
+    def submit(self, source: str, url_prefix: str, record: Callable[[Dict], Awaitable[Dict]]) -> None:
+        """
+        Schedule the variants of a stored photo.
+        :param source: str - path of the original photo.
+        :param url_prefix: str - url of the directory of the photo.
+        :param record: Callable[[Dict], Awaitable[Dict]] - stores the variant urls on the
+            document, and returns a dict with 'failed' if it could not.
+        :return: None
+        """
+        task: asyncio.Task = asyncio.get_running_loop().create_task(self.__process(source, url_prefix, record))
+        self.__tasks.add(task)
+        task.add_done_callback(self.__tasks.discard)
+
+    async def shutdown(self) -> None:
+        """
+        Let the scheduled photos finish, then stop the workers.
+        :return: None
+        """
+        if self.__tasks:
+            await asyncio.gather(*self.__tasks, return_exceptions=True)
+        if self.__executor is not None:
+            self.__executor.shutdown(wait=True)
+            self.__executor = None
+
+    async def remove(self, source: str) -> None:
+        """
+        Delete a photo and the variant files made from it.
+        :param source: str - path of the original photo.
+        :return: None
+        """
+        await asyncio.get_running_loop().run_in_executor(None, remove_files,
+                                                         [source, *variant_paths(source, self.__sizes)])
+
+    async def __process(self, source: str, url_prefix: str, record: Callable[[Dict], Awaitable[Dict]]) -> None:
+        loop: asyncio.AbstractEventLoop = asyncio.get_running_loop()
+        variants: Dict[str, Dict] = {}
+        try:
+            variants = await loop.run_in_executor(self.__get_executor(), render_variants, source, self.__sizes,
+                                                  JPEG_QUALITY, WEBP_QUALITY)
+            urls: Dict[str, Dict] = {variant: {'width': files['width'],
+                                               'height': files['height'],
+                                               'webp': f"{url_prefix}/{files['webp']}",
+                                               'jpeg': f"{url_prefix}/{files['jpeg']}"}
+                                     for variant, files in variants.items()}
+            result: Dict = await record(urls)
+            if 'failed' in result:
+                raise RuntimeError(result['failed'])
+            self.__processed += 1
+        except Exception as error:
+            print(f"photo variants of {source} failed: {error}")
+            self.__failed += 1
+            directory: str = os.path.dirname(source)
+            names: List[str] = [files[kind] for files in variants.values() for kind in ('webp', 'jpeg')]
+            await loop.run_in_executor(None, remove_files, [os.path.join(directory, name) for name in names])
+
+    def __get_executor(self) -> Executor:
+        if self.__executor is None:
+            self.__executor = ProcessPoolExecutor(max_workers=self.__workers, mp_context=process_context())
+        return self.__executor
+
+
+def variant_names(source: str, variant: str) -> Tuple[str, str]:
+    """
+    File names of a variant of a photo: <name>.<variant>.webp and <name>.<variant>.jpg.
+    :param source: str - path of the original photo.
+    :param variant: str
+    :return: Tuple[str, str] - webp and jpeg file names.
+    """
+    name: str = os.path.basename(source).rsplit('.', 1)[0]
+    return f'{name}.{variant}.webp', f'{name}.{variant}.jpg'
+
+
+def variant_paths(source: str, sizes: Dict[str, int]) -> List[str]:
+    """
+    Paths of every variant file of a photo, whether they were made or not.
+    :param source: str - path of the original photo.
+    :param sizes: Dict[str, int] - the variants.
+    :return: List[str]
+    """
+    directory: str = os.path.dirname(source)
+    return [os.path.join(directory, name) for variant in sizes for name in variant_names(source, variant)]
+
+
+def remove_files(paths: List[str]) -> None:
+    for path in paths:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+image_pipeline: ImagePipeline = ImagePipeline(IMAGE_POOL_WORKERS, VARIANT_SIZES)
@@ -0,0 +1,14 @@
+from typing import Dict, Optional
+from bson.objectid import ObjectId
+
+
+def keyset_filter(after: Optional[str] = None) -> Dict:
+    """
+    Builds the filter used by keyset pagination: documents are listed in _id order
+    and the next page starts right after the last _id already returned
+    :param after - str | None
+    :return Dict
+    """
+    if after:
+        return {'_id': {'$gt': ObjectId(after)}}
+    return {}
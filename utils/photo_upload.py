@@ -0,0 +1,267 @@
+"""
+Stream multipart photo uploads to disk without buffering them
+"""
+import os
+import asyncio
+from functools import partial
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, BinaryIO, Callable, Dict, List, Optional, Tuple
+from multipart.multipart import MultipartParser, parse_options_header
+from multipart.exceptions import MultipartParseError
+from starlette.requests import Request
+from fastapi import status
+from dotenv import load_dotenv, find_dotenv
+from .generate_random_string import generate_random_string
+
+load_dotenv(find_dotenv())
+
+# bytes gathered before each disk write
+UPLOAD_CHUNK_SIZE = int(os.environ.get("UPLOAD_CHUNK_SIZE", 1024 * 1024))
+
+MAX_UPLOAD_SIZE = int(os.environ.get("MAX_UPLOAD_SIZE", 10 * 1024 * 1024))
+
+UPLOAD_IO_WORKERS = int(os.environ.get("UPLOAD_IO_WORKERS", 4))
+
+# room for the multipart boundaries and headers around the file
+MULTIPART_OVERHEAD = 64 * 1024
+
+# leading bytes of every accepted image format, and the extension it is stored with
+IMAGE_SIGNATURES: Tuple[Tuple[bytes, str], ...] = (
+    (b'\x89PNG\r\n\x1a\n', 'png'),
+    (b'\xff\xd8\xff', 'jpg'),
+    (b'GIF87a', 'gif'),
+    (b'GIF89a', 'gif'),
+    (b'BM', 'bmp'),
+    (b'II*\x00', 'tiff'),
+    (b'MM\x00*', 'tiff'),
+)
+
+SNIFF_SIZE = 12
+
+
+def sniff_image(head: bytes) -> Optional[str]:
+    """
+    Recognize an image from its first bytes, whatever the client claims.
+    :param head: bytes - at least SNIFF_SIZE bytes when the file is that long.
+    :return: str - extension of the format, or None if it is not a supported image.
+    """
+    if head[:4] == b'RIFF' and head[8:12] == b'WEBP':
+        return 'webp'
+    return next((extension for signature, extension in IMAGE_SIGNATURES if head.startswith(signature)), None)
+
+
+class UploadError(Exception):
+    """
+    Exception to be raised when an upload is refused
+    :param: message - str
+    :param: status_code - int
+    """
+
+    def __init__(self, message, status_code: int = status.HTTP_400_BAD_REQUEST) -> None:
+        self.message = message
+        self.status_code = status_code
+        super().__init__(self.message)
+
+
+class PhotoUploader:
+    """
+    Receive the image of a multipart/form-data request straight from the request
+    stream. The bytes of the file field are gathered into chunk_size blocks and
+    written by a small pool of threads, so the event loop never blocks on the disk
+    and nothing but the current block is held in memory. The file is refused as
+    soon as it grows past max_size, and its format is taken from its first bytes,
+    never from the filename or the content type sent by the client. It is written
+    under a temporary name and renamed once complete, so a partial file is never served.
+    :param:  chunk_size: int - bytes per disk write.
+    :param:  max_size: int - largest accepted file, in bytes.
+    :param:  workers: int - threads writing to disk.
+    :return: None.
+    :rtype: none.
+    """
+
+    def __init__(self, chunk_size: int, max_size: int, workers: int) -> None:
+        self.__chunk_size: int = max(chunk_size, SNIFF_SIZE)
+        self.__max_size: int = max_size
+        self.__workers: int = max(workers, 1)
+        self.__executor: Optional[ThreadPoolExecutor] = None
+
+    @property
+    def max_size(self) -> int:
+        """Getter method for accessing the size limit.
+        Returns:
+            Largest accepted file, in bytes.
+        """
+        return self.__max_size
+
+    async def save(self, request: Request, directory: str, filename_length: int, field: str = 'file') -> Dict:
+        """
+        Store the file field of the request in directory under a random name.
+        :param request: Request - a multipart/form-data request.
+        :param directory: str - created if missing.
+        :param filename_length: int - length of the random name, without the extension.
+        :param field: str - name of the form field holding the file.
+        :return: Dict - {'filename': ..., 'path': ..., 'size': ...},
+            or {'failed': ..., 'status_code': ...} if the upload was refused.
+        """
+        try:
+            return await self.__save(request, directory, filename_length, field)
+        except UploadError as error:
+            return {'failed': error.message, 'status_code': error.status_code}
+
+    async def remove(self, path: str) -> None:
+        """
+        Delete a stored file, e.g. when the document it belongs to could not be updated.
+        :param path: str
+        :return: None
+        """
+        await self.__run(self.__unlink, path)
+
+    def shutdown(self) -> None:
+        """
+        Stop the writer threads; a later upload starts a new executor.
+        :return: None
+        """
+        if self.__executor is not None:
+            self.__executor.shutdown(wait=True)
+            self.__executor = None
+
+    async def __save(self, request: Request, directory: str, filename_length: int, field: str) -> Dict:
+        media_type, params = parse_options_header(request.headers.get('content-type', ''))
+        if media_type != b'multipart/form-data' or b'boundary' not in params:
+            raise UploadError('the photo must be sent as multipart/form-data')
+        length: Optional[str] = request.headers.get('content-length')
+        if length is not None and length.isdigit() and int(length) > self.__max_size + MULTIPART_OVERHEAD:
+            raise UploadError(f'files larger than {self.__max_size} bytes are not accepted',
+                              status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+        await self.__run(os.makedirs, directory, exist_ok=True)
+        receiver: _FieldReceiver = _FieldReceiver(field)
+        parser: MultipartParser = MultipartParser(params[b'boundary'], receiver.callbacks)
+        name: str = generate_random_string(filename_length)
+        temporary_path: str = os.path.join(directory, f'.{name}.part')
+        destination: Optional[BinaryIO] = None
+        block: bytearray = bytearray()
+        size: int = 0
+        extension: Optional[str] = None
+        try:
+            async for data in request.stream():
+                try:
+                    parser.write(data)
+                except MultipartParseError as error:
+                    print(error)
+                    raise UploadError('the multipart body is malformed')
+                for piece in receiver.take():
+                    size += len(piece)
+                    if size > self.__max_size:
+                        raise UploadError(f'files larger than {self.__max_size} bytes are not accepted',
+                                          status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+                    block += piece
+                if extension is None and (len(block) >= SNIFF_SIZE or receiver.complete):
+                    extension = self.__sniff(block)
+                if len(block) >= self.__chunk_size:
+                    if destination is None:
+                        destination = await self.__run(open, temporary_path, 'wb')
+                    await self.__run(destination.write, block)
+                    block.clear()
+                if receiver.complete:
+                    break
+            if not receiver.complete:
+                raise UploadError(f'the form field {field} with the photo is missing')
+            if extension is None:
+                extension = self.__sniff(block)
+            if destination is None:
+                destination = await self.__run(open, temporary_path, 'wb')
+            await self.__run(destination.write, block)
+            await self.__run(destination.close)
+            destination = None
+            filename: str = f'{name}.{extension}'
+            path: str = os.path.join(directory, filename)
+            await self.__run(os.replace, temporary_path, path)
+            return {'filename': filename, 'path': path, 'size': size}
+        finally:
+            if destination is not None:
+                await self.__run(destination.close)
+            await self.__run(self.__unlink, temporary_path)
+
+    @staticmethod
+    def __sniff(head: bytearray) -> str:
+        extension: Optional[str] = sniff_image(bytes(head[:SNIFF_SIZE]))
+        if extension is None:
+            raise UploadError('only png, jpeg, gif, bmp, tiff and webp images are supported',
+                              status.HTTP_415_UNSUPPORTED_MEDIA_TYPE)
+        return extension
+
+    @staticmethod
+    def __unlink(path: str) -> None:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    async def __run(self, function: Callable, *args: Any, **kwargs: Any) -> Any:
+        if self.__executor is None:
+            self.__executor = ThreadPoolExecutor(max_workers=self.__workers, thread_name_prefix='upload')
+        return await asyncio.get_running_loop().run_in_executor(self.__executor, partial(function, *args, **kwargs))
+
+
+class _FieldReceiver:
+    """
+    Multipart parser callbacks that keep the data of one form field, and drop the others.
+    :param:  field: str - name of the field to keep; only its first occurrence is kept.
+    :return: None.
+    :rtype: none.
+    """
+
+    def __init__(self, field: str) -> None:
+        self.__field: bytes = field.encode()
+        self.__header_field: bytes = b''
+        self.__header_value: bytes = b''
+        self.__disposition: bytes = b''
+        self.__in_field: bool = False
+        self.__pieces: List[bytes] = []
+        self.complete: bool = False
+        self.callbacks: Dict[str, Callable] = {'on_part_begin': self.__on_part_begin,
+                                               'on_part_data': self.__on_part_data,
+                                               'on_part_end': self.__on_part_end,
+                                               'on_header_field': self.__on_header_field,
+                                               'on_header_value': self.__on_header_value,
+                                               'on_header_end': self.__on_header_end,
+                                               'on_headers_finished': self.__on_headers_finished}
+
+    def take(self) -> List[bytes]:
+        """
+        Data received since the last call.
+        :return: List[bytes]
+        """
+        pieces, self.__pieces = self.__pieces, []
+        return pieces
+
+    def __on_part_begin(self) -> None:
+        self.__disposition = b''
+
+    def __on_header_field(self, data: bytes, start: int, end: int) -> None:
+        self.__header_field += data[start:end]
+
+    def __on_header_value(self, data: bytes, start: int, end: int) -> None:
+        self.__header_value += data[start:end]
+
+    def __on_header_end(self) -> None:
+        if self.__header_field.lower() == b'content-disposition':
+            self.__disposition = self.__header_value
+        self.__header_field = b''
+        self.__header_value = b''
+
+    def __on_headers_finished(self) -> None:
+        _, options = parse_options_header(self.__disposition)
+        self.__in_field = not self.complete and options.get(b'name') == self.__field
+
+    def __on_part_data(self, data: bytes, start: int, end: int) -> None:
+        if self.__in_field:
+            self.__pieces.append(data[start:end])
+
+    def __on_part_end(self) -> None:
+        if self.__in_field:
+            self.__in_field = False
+            self.complete = True
+
+
+photo_uploader: PhotoUploader = PhotoUploader(UPLOAD_CHUNK_SIZE, MAX_UPLOAD_SIZE, UPLOAD_IO_WORKERS)
@@ -0,0 +1,23 @@
+"""
+Start method of the worker processes
+"""
+import os
+import multiprocessing
+from multiprocessing.context import BaseContext
+from dotenv import load_dotenv, find_dotenv
+
+load_dotenv(find_dotenv())
+
+# the server runs the event loop and several thread pools: a forked child inherits their locks in
+# whatever state they were, and can deadlock on them. forkserver forks from a clean single-threaded process
+PROCESS_START_METHOD = os.environ.get("PROCESS_START_METHOD",
+                                      "forkserver" if "forkserver" in multiprocessing.get_all_start_methods()
+                                      else "spawn")
+
+
+def process_context() -> BaseContext:
+    """
+    Multiprocessing context of the process pools.
+    :return: BaseContext - PROCESS_START_METHOD, forkserver where available and spawn elsewhere.
+    """
+    return multiprocessing.get_context(PROCESS_START_METHOD)